@@ -0,0 +1,267 @@
+"""
+    Created on October 18, 2026
+
+    This is the windowed aggregation kept by every sensor resource
+
+    Readings are folded into fixed-width time buckets as they are recorded: every bucket holds, per numeric
+    field, a running count, sum, minimum and maximum, and a histogram of the values quantized on a
+    logarithmic scale with bounded relative error. A query for the statistics of the last window, in steps,
+    only merges the accumulators of the buckets it covers, so raw readings are never scanned again, and
+    percentiles are read from the merged histogram.
+
+    Example Usage:
+
+    ``>>> aggregator = WindowAggregator()``
+    ``>>> aggregator.append(time.time(), {'temperature': 21.5})``
+    ``>>> aggregator.query(60, 10, parse_statistics('mean,max,p95'))``
+
+    Python3.4 is required
+"""
+
+import collections
+import math
+import re
+import time
+
+# Default width of a bucket in seconds; query steps are rounded to whole buckets
+BUCKET_WIDTH = 1.0
+# Default number of seconds of buckets kept
+RETENTION = 900
+# Relative error of percentiles
+PERCENTILE_ACCURACY = 0.01
+# Statistics other than percentiles, which are given as pNN (e.g. p95, p99.9)
+STATISTICS = ('count', 'sum', 'mean', 'min', 'max')
+
+# Values are quantized to buckets [gamma^(i-1), gamma^i); magnitudes below MIN_MAGNITUDE count as zero
+_GAMMA = (1 + PERCENTILE_ACCURACY) / (1 - PERCENTILE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_MAGNITUDE = 1e-9
+_MIN_INDEX = int(math.floor(math.log(_MIN_MAGNITUDE) / _LOG_GAMMA))
+# Durations such as '60', '60s', '5m', '1h'
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)([smh]?)$')
+_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+
+
+def quantize(value):
+    """
+    Get the histogram key of a value; keys are ordered like the values they stand for
+
+    :param float value: value to quantize
+    :return: (int) 0 for zero, positive keys for positive values, negative keys for negative values
+    """
+    magnitude = abs(value)
+    if magnitude < _MIN_MAGNITUDE:
+        return 0
+    key = int(math.ceil(math.log(magnitude) / _LOG_GAMMA)) - _MIN_INDEX + 1
+    return key if value > 0 else -key
+
+
+def dequantize(key):
+    """
+    Get the value a histogram key stands for, within PERCENTILE_ACCURACY of every value quantized to it
+
+    :param int key: histogram key returned by quantize()
+    :return: (float) representative value
+    """
+    if key == 0:
+        return 0.0
+    value = 2 * _GAMMA ** (abs(key) + _MIN_INDEX - 1) / (_GAMMA + 1)
+    return value if key > 0 else -value
+
+
+def parse_duration(text):
+    """
+    Parse a duration of a query, e.g. '60', '60s', '5m' or '1h'
+
+    :param str text: duration, in seconds unless suffixed with s, m or h
+    :return: (float) duration in seconds
+    :raises ValueError: not a positive, finite duration
+    """
+    match = _DURATION.match(text)
+    # Hundreds of digits parse as infinity
+    if match is None or not 0 < float(match.group(1)) < float('inf'):
+        raise ValueError("invalid duration {}".format(text))
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+def parse_statistics(text):
+    """
+    Parse a comma-separated list of statistics, e.g. 'mean,min,max,p95'
+
+    :param str text: statistics, names from STATISTICS or pNN percentiles
+    :return: (list of str) statistics
+    :raises ValueError: unknown statistic or percentile out of 0~100
+    """
+    statistics = [name for name in text.split(',') if name]
+    for name in statistics:
+        if name in STATISTICS:
+            continue
+        if not (name.startswith('p') and 0 <= float(name[1:]) <= 100):
+            raise ValueError("unknown statistic {}".format(name))
+    if not statistics:
+        raise ValueError("no statistic given")
+    return statistics
+
+
+class FieldStats(object):
+    """
+    Running accumulators of one field
+    """
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'histogram')
+
+    def __init__(self):
+        """
+        Constructor of empty accumulators
+        """
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = -float('inf')
+        # histogram key -> number of values
+        self.histogram = {}
+
+    def add(self, value):
+        """
+        Account for one value
+
+        :param float value: value of the field
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        key = quantize(value)
+        self.histogram[key] = self.histogram.get(key, 0) + 1
+
+    def merge(self, other):
+        """
+        Account for all values of other accumulators
+
+        :param FieldStats other: accumulators to merge
+        """
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        for key, count in other.histogram.items():
+            self.histogram[key] = self.histogram.get(key, 0) + count
+
+    def percentile(self, q):
+        """
+        Get a percentile from the histogram
+
+        :param float q: percentile, 0~100
+        :return: (float) value within PERCENTILE_ACCURACY of the nearest-rank percentile
+        """
+        rank = max(int(math.ceil(q / 100 * self.count)), 1)
+        seen = 0
+        for key in sorted(self.histogram):
+            seen += self.histogram[key]
+            if seen >= rank:
+                return min(max(dequantize(key), self.minimum), self.maximum)
+        return self.maximum
+
+    def statistic(self, name):
+        """
+        Get one statistic
+
+        :param str name: name from STATISTICS or pNN percentile
+        :return: (float) value of the statistic
+        """
+        if name == 'count':
+            return self.count
+        if name == 'sum':
+            return self.total
+        if name == 'mean':
+            return self.total / self.count
+        if name == 'min':
+            return self.minimum
+        if name == 'max':
+            return self.maximum
+        return self.percentile(float(name[1:]))
+
+
+class WindowAggregator(object):
+    """
+    Time-bucketed accumulators of the readings of one resource
+    """
+
+    def __init__(self, width=BUCKET_WIDTH, retention=RETENTION):
+        """
+        Constructor of an empty aggregator
+
+        :param float width: width of a bucket in seconds
+        :param float retention: seconds of buckets kept; longer windows only cover the buckets kept
+        """
+        self.width = width
+        # [bucket number, number of readings, field name -> FieldStats], oldest first
+        self._buckets = collections.deque(maxlen=int(math.ceil(retention / width)))
+
+    def __len__(self):
+        return len(self._buckets)
+
+    @property
+    def retention(self):
+        return self._buckets.maxlen * self.width
+
+    def append(self, timestamp, data):
+        """
+        Fold a reading into its bucket; readings are expected in increasing timestamp order
+
+        :param float timestamp: time of the reading (seconds since epoch)
+        :param dict data: resource data, field name -> value; only numeric (and boolean) values are aggregated
+        """
+        number = int(timestamp // self.width)
+        if not self._buckets or self._buckets[-1][0] < number:
+            self._buckets.append([number, 0, {}])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+
+        for name, value in data.items():
+            if isinstance(value, (int, float)) and math.isfinite(value):
+                stats = bucket[2].get(name)
+                if stats is None:
+                    stats = bucket[2][name] = FieldStats()
+                stats.add(float(value))
+
+    def query(self, window, step=None, statistics=('mean', 'min', 'max'), now=None):
+        """
+        Get statistics of the readings of the last window, one record per step
+
+        :param float window: seconds covered, up to now
+        :param float step: seconds covered by one record, rounded to whole buckets (default: whole window)
+        :param statistics: names from STATISTICS or pNN percentiles
+        :type statistics: list of str
+        :param float now: end of the window (default: current time)
+        :return: (list of (float, dict)) start time of each step with readings and its record, field
+            'count' (number of readings) and '<field>.<statistic>' -> value; oldest first
+        """
+        now = time.time() if now is None else now
+        end = int(now // self.width) + 1
+        start = end - max(int(math.ceil(window / self.width)), 1)
+        per_step = end - start if step is None else max(int(round(step / self.width)), 1)
+
+        # Walk backwards from the newest bucket, so the cost depends on the window, not the retention
+        steps = {}
+        for number, count, fields in reversed(self._buckets):
+            if number < start:
+                break
+            if number >= end:
+                continue
+            merged = steps.setdefault((number - start) // per_step, [0, {}])
+            merged[0] += count
+            for name, stats in fields.items():
+                if name not in merged[1]:
+                    merged[1][name] = FieldStats()
+                merged[1][name].merge(stats)
+
+        records = []
+        for index in sorted(steps):
+            count, fields = steps[index]
+            record = {'count': count}
+            for name, stats in fields.items():
+                for statistic in statistics:
+                    record['{}.{}'.format(name, statistic)] = stats.statistic(statistic)
+            records.append(((start + index * per_step) * self.width, record))
+        return records
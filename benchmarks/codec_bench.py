@@ -0,0 +1,168 @@
+"""
+    Created on October 18, 2026
+
+    This script is a benchmark of the delta/varint codec of sample histories
+
+    It encodes traces of readings as a JSON history response, a packed response, a zlib-compressed JSON
+    history and a delta response, and reports payload bytes, compression ratio against JSON and encode and
+    decode times. Traces are synthetic (slow hygrothermo readings every 2 s, acceleration at 100 Hz with
+    scheduling jitter) or recorded by the server in its time-series store.
+
+    Example Usage:
+
+    ``$ python3 benchmarks/codec_bench.py``
+    ``$ python3 benchmarks/codec_bench.py --records 5000 --store /var/lib/poemodule/store``
+
+    Python3.4 is required
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import argparse
+import timeit
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from resources_def import PayloadTable, PayloadWrapper, PackedPayloadWrapper, DeltaPayloadWrapper, fp_decimals, \
+    TIME_FIELD
+from defs import DEFAULT_FP_FORMAT
+
+
+def hygrothermo_trace(records, rnd):
+    """
+    Synthetic trace of an SHT15 sampled every 2 seconds: slow drifts with sensor noise
+
+    :param int records: number of readings
+    :param random.Random rnd: random source
+    :return: (list of (float, dict)) readings
+    """
+    start = 1792300000.0
+    return [(start + 2 * i + rnd.uniform(0, 0.004),
+             {'temperature': round(21.0 + 2 * math.sin(i / 900) + rnd.gauss(0, 0.02), 2),
+              'humidity': round(45.0 - 5 * math.sin(i / 1200) + rnd.gauss(0, 0.1), 2)})
+            for i in range(records)]
+
+
+def acceleration_trace(records, rnd):
+    """
+    Synthetic trace of the accelerometer sampled at 100 Hz: gravity on z, small vibrations and timer jitter
+
+    :param int records: number of readings
+    :param random.Random rnd: random source
+    :return: (list of (float, dict)) readings
+    """
+    start = 1792300000.0
+    return [(start + 0.01 * i + rnd.uniform(0, 0.002),
+             {'x': rnd.gauss(0, 0.01), 'y': rnd.gauss(0, 0.01), 'z': 1.0 + rnd.gauss(0, 0.01)})
+            for i in range(records)]
+
+
+def recorded_traces(path, records):
+    """
+    Load the newest readings of every series recorded in a time-series store
+
+    :param str path: directory of the store
+    :param int records: maximum number of readings per series
+    :return: (list of (str, list of (float, dict))) series name and readings
+    """
+    from store import TimeSeriesStore
+
+    store = TimeSeriesStore(path, compact=False)
+    try:
+        traces = []
+        for name in store.series():
+            samples = store.query(name)[-records:]
+            if samples:
+                traces.append((name, samples))
+        return traces
+    finally:
+        store.close()
+
+
+def json_history(samples, table, fp_format):
+    """
+    JSON history response, as rendered by SampledResource.samples_response
+
+    :param samples: readings as (timestamp, resource data) pairs
+    :type samples: list of (float, dict)
+    :param PayloadTable table: table holding the header information
+    :param str fp_format: decimal format of the values
+    :return: (bytes) encoded payload
+    """
+    records = ['{{{}, "{}": {!r}}}'.format(PayloadWrapper.render_fields(data, fp_format), TIME_FIELD, timestamp)
+               for timestamp, data in samples]
+    return PayloadWrapper.serialize('[' + ', '.join(records) + ']', table)
+
+
+def measure(encode, decode, number, repeat):
+    """
+    Time an encoder and its decoder
+
+    :param encode: function() returning the payload
+    :param decode: function(payload) decoding it
+    :param int number: calls per measurement
+    :param int repeat: measurements, the best one is reported
+    :return: (int, float, float) payload size in bytes, encode and decode microseconds per call
+    """
+    payload = encode()
+    encode_time = min(timeit.repeat(encode, number=number, repeat=repeat)) / number
+    decode_time = min(timeit.repeat(lambda: decode(payload), number=number, repeat=repeat)) / number
+    return len(payload), encode_time * 1e6, decode_time * 1e6
+
+
+def compare(name, samples, fp_format, number, repeat):
+    """
+    Print sizes and times of all encodings of a trace
+
+    :param str name: name of the trace
+    :param samples: readings as (timestamp, resource data) pairs
+    :type samples: list of (float, dict)
+    :param str fp_format: decimal format of the values
+    :param int number: calls per measurement
+    :param int repeat: measurements, the best one is reported
+    """
+    table = PayloadTable(name, True, 1)
+    decimals = fp_decimals(fp_format)
+    encodings = (('json', lambda: json_history(samples, table, fp_format),
+                  lambda payload: json.loads(payload.decode('utf-8'))),
+                 ('json+zlib', lambda: zlib.compress(json_history(samples, table, fp_format)),
+                  lambda payload: json.loads(zlib.decompress(payload).decode('utf-8'))),
+                 ('packed', lambda: PackedPayloadWrapper.wrap(samples, table), PackedPayloadWrapper.unwrap),
+                 ('delta', lambda: DeltaPayloadWrapper.wrap(samples, table, decimals), DeltaPayloadWrapper.unwrap))
+
+    print("{} ({} readings, {} fields, {} decimals)".format(name, len(samples), len(samples[0][1]), decimals))
+    results = [(encoding, measure(encode, decode, number, repeat)) for encoding, encode, decode in encodings]
+    baseline = results[0][1][0]
+    for encoding, (size, encode_time, decode_time) in results:
+        print("  {:<10} {:>9} {:>8.1f}x {:>10.0f} {:>10.0f} {:>10.2f}".format(
+            encoding, size, baseline / size, encode_time, decode_time, size / len(samples)))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare encodings of sample histories")
+    p.add_argument('--records', type=int, default=1000, help="number of readings per trace")
+    p.add_argument('--store', help="directory of a time-series store to take recorded traces from")
+    p.add_argument('--fp-format', default=DEFAULT_FP_FORMAT, help="decimal format of the values")
+    p.add_argument('--number', type=int, default=10, help="calls per measurement")
+    p.add_argument('--repeat', type=int, default=3, help="measurements per encoding, best is reported")
+    options = p.parse_args()
+
+    rnd = random.Random(0)
+    if options.store:
+        traces = recorded_traces(options.store, options.records)
+    else:
+        traces = [('hygrothermo', hygrothermo_trace(options.records, rnd)),
+                  ('acceleration', acceleration_trace(options.records, rnd))]
+
+    print("  {:<10} {:>9} {:>9} {:>10} {:>10} {:>10}".format(
+        'encoding', 'bytes', 'ratio', 'encode us', 'decode us', 'bytes/rec'))
+    for name, samples in traces:
+        compare(name, samples, options.fp_format, options.number, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,508 @@
+"""
+    Created on October 18, 2026
+
+    This script is an end-to-end load benchmark of the CoAP server running on mock drivers
+
+    It starts server.py on localhost with a configuration holding the chosen resources (mock drivers are used
+    on x86_64), drives it with concurrent aiocoap clients sending GETs and PUTs at target rates while
+    observers are notified at a given period, and reports throughput, latency percentiles, notification
+    jitter and the resident memory of the server. Requests are sent on schedule whether or not earlier ones
+    were answered (open loop), so an overloaded server shows up as latency and errors rather than as a lower
+    request rate. Results are written as JSON, tagged with the commit, so that runs can be compared. With
+    --simulate, the server uses the hardware simulators of sensors.simulators, so that driver latencies (e.g.
+    the SHT15 conversions) weigh on the results as on a Raspberry Pi.
+
+    Notification jitter is the deviation of the time between two notifications from the nearest multiple of
+    the observation period, as notification policies (e.g. deadband) may skip notifications.
+
+    Example Usage:
+
+    ``$ python3 benchmarks/load_bench.py --output before.json``
+    ``$ python3 benchmarks/load_bench.py --simulate 1 --output simulated.json``
+    ``$ python3 benchmarks/load_bench.py --resources temperature,AccX --clients 20 --get-rate 500 \
+        --observers 50 --observe-period 1 --duration 60 --output after.json``
+
+    Python3.4 is required
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import signal
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, REPO)
+
+import aiocoap
+
+# Seconds a request may take before it counts as an error
+REQUEST_TIMEOUT = 10.0
+# Seconds the server may take to answer its first request
+START_TIMEOUT = 60.0
+# Seconds between two samples of the server's memory
+RSS_INTERVAL = 1.0
+
+
+def percentile(values, q):
+    """
+    Get a nearest-rank percentile
+
+    :param values: sorted values
+    :type values: list of float
+    :param float q: percentile, 0~100
+    :return: (float) percentile, None without values
+    """
+    if not values:
+        return None
+    return values[max(int(math.ceil(q / 100 * len(values))), 1) - 1]
+
+
+def distribution(values, scale=1000.0):
+    """
+    Summarize values by their percentiles
+
+    :param values: values, e.g. latencies in seconds
+    :type values: list of float
+    :param float scale: factor applied to the values, e.g. 1000 for milliseconds
+    :return: (dict) p50, p99, p999, mean and max of the scaled values
+    """
+    values = sorted(value * scale for value in values)
+    return {'p50': percentile(values, 50),
+            'p99': percentile(values, 99),
+            'p999': percentile(values, 99.9),
+            'mean': sum(values) / len(values) if values else None,
+            'max': values[-1] if values else None}
+
+
+class OperationStats(object):
+    """
+    Latencies and errors of one kind of request, counted from the end of the warm-up
+    """
+
+    def __init__(self):
+        """
+        Constructor of empty statistics
+        """
+        self.latencies = []
+        self.errors = 0
+        # Requests not sent because too many were outstanding
+        self.dropped = 0
+        # perf_counter time from which requests are counted
+        self.since = float('inf')
+
+    def record(self, start, latency=None):
+        """
+        Account for one request
+
+        :param float start: perf_counter time the request was sent
+        :param float latency: seconds until the response, None for an error
+        """
+        if start < self.since:
+            return
+        if latency is None:
+            self.errors += 1
+        else:
+            self.latencies.append(latency)
+
+    def summary(self, duration):
+        """
+        Get the results
+
+        :param float duration: seconds measured
+        :return: (dict) count, errors, dropped, throughput (responses per second) and latency in milliseconds
+        """
+        return {'count': len(self.latencies),
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'throughput': len(self.latencies) / duration,
+                'latency_ms': distribution(self.latencies)}
+
+
+class NotificationStats(object):
+    """
+    Arrival times of the notifications of all observers
+    """
+
+    def __init__(self, period):
+        """
+        Constructor of empty statistics
+
+        :param float period: observation period asked for by the observers
+        """
+        self.period = period
+        self.jitter = []
+        self.count = 0
+        self.errors = 0
+        self.since = float('inf')
+
+    def record(self, previous, arrival):
+        """
+        Account for one notification
+
+        :param float previous: perf_counter time of the previous notification of the observer, None for the first
+        :param float arrival: perf_counter time of the notification
+        """
+        if arrival < self.since:
+            return
+        self.count += 1
+        if previous is not None and previous >= self.since:
+            interval = arrival - previous
+            self.jitter.append(abs(interval - max(round(interval / self.period), 1) * self.period))
+
+    def summary(self, duration):
+        """
+        Get the results
+
+        :param float duration: seconds measured
+        :return: (dict) count, errors, notifications per second and jitter in milliseconds
+        """
+        return {'count': self.count,
+                'errors': self.errors,
+                'throughput': self.count / duration,
+                'jitter_ms': distribution(self.jitter)}
+
+
+def memory(pid):
+    """
+    Get resident memory of a process (Linux only)
+
+    :param int pid: process id
+    :return: (dict) current ('rss_kb') and peak ('hwm_kb') resident set size, None where unavailable
+    """
+    result = {'rss_kb': None, 'hwm_kb': None}
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    result['rss_kb'] = int(line.split()[1])
+                elif line.startswith('VmHWM:'):
+                    result['hwm_kb'] = int(line.split()[1])
+    except OSError:
+        pass
+    return result
+
+
+def commit():
+    """
+    Get the commit of the benchmarked tree
+
+    :return: (str) commit hash, None outside a git checkout
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_config(directory, base, names, port, speedup=None):
+    """
+    Write the configuration of the benchmarked server
+
+    :param str directory: working directory of the server
+    :param dict base: configuration the sensors are taken from
+    :param names: names of the sensors to keep, None for all
+    :type names: list of str
+    :param int port: UDP port of the server
+    :param float speedup: speed-up factor of the hardware simulators, None to keep the drivers (or mocks)
+    :return: (list of dict) sensors of the configuration
+    :raises ValueError: a sensor name is not in the base configuration
+    """
+    sensors = [sensor for sensor in base['sensors'] if names is None or sensor['name'] in names]
+    missing = set(names or []) - set(sensor['name'] for sensor in sensors)
+    if missing:
+        raise ValueError("unknown sensors {}".format(', '.join(sorted(missing))))
+
+    config = dict(base, sensors=sensors, server=dict(base.get('server', {}), port=port))
+    if speedup is not None:
+        config['simulation'] = dict(base.get('simulation', {}), speedup=speedup)
+    with open(os.path.join(directory, 'config.json'), 'w') as f:
+        json.dump(config, f, indent=2)
+    return sensors
+
+
+@asyncio.coroutine
+def timed_request(context, message, stats):
+    """
+    Send a request and account for its latency
+
+    :param context: aiocoap client context
+    :param aiocoap.Message message: request
+    :param OperationStats stats: statistics of the kind of request
+    """
+    start = time.perf_counter()
+    try:
+        response = yield from asyncio.wait_for(context.request(message).response, REQUEST_TIMEOUT)
+    except Exception:
+        stats.record(start)
+    else:
+        stats.record(start, time.perf_counter() - start if response.code.is_successful() else None)
+
+
+@asyncio.coroutine
+def request_loop(context, make_request, rate, deadline, stats, max_outstanding):
+    """
+    Send requests at a fixed rate until the deadline, without waiting for responses
+
+    :param context: aiocoap client context
+    :param make_request: function(index) returning the next request message
+    :param float rate: requests per second
+    :param float deadline: loop time at which sending stops
+    :param OperationStats stats: statistics of the requests
+    :param int max_outstanding: requests waiting for a response beyond which requests are dropped
+    """
+    loop = asyncio.get_event_loop()
+    pending = set()
+    index = 0
+    # Clients start at different phases of the rate
+    next_time = loop.time() + (id(context) % 1000) / 1000 / rate
+    while next_time < deadline:
+        yield from asyncio.sleep(max(next_time - loop.time(), 0))
+        if len(pending) < max_outstanding:
+            task = asyncio.Task(timed_request(context, make_request(index), stats))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        elif time.perf_counter() >= stats.since:
+            stats.dropped += 1
+        index += 1
+        next_time += 1 / rate
+    if pending:
+        yield from asyncio.wait(pending)
+
+
+@asyncio.coroutine
+def observe_loop(context, uri, deadline, stats):
+    """
+    Observe a resource until the deadline
+
+    :param context: aiocoap client context
+    :param str uri: URI of the resource, with the observation period in the query
+    :param float deadline: loop time at which the observation is cancelled
+    :param NotificationStats stats: statistics of the notifications
+    """
+    loop = asyncio.get_event_loop()
+    message = aiocoap.Message(code=aiocoap.GET)
+    message.set_request_uri(uri)
+    message.opt.observe = 0
+    request = context.request(message)
+    last = [None]
+
+    def notified(response):
+        arrival = time.perf_counter()
+        stats.record(last[0], arrival)
+        last[0] = arrival
+
+    def failed(exception):
+        stats.errors += 1
+
+    request.observation.register_callback(notified)
+    request.observation.register_errback(failed)
+    try:
+        yield from asyncio.wait_for(request.response, REQUEST_TIMEOUT)
+    except Exception:
+        stats.errors += 1
+        return
+    last[0] = time.perf_counter()
+    yield from asyncio.sleep(max(deadline - loop.time(), 0))
+    request.observation.cancel()
+
+
+@asyncio.coroutine
+def wait_ready(context, base_uri, process):
+    """
+    Wait until the server answers
+
+    :param context: aiocoap client context
+    :param str base_uri: URI of the server
+    :param subprocess.Popen process: server process
+    :raises RuntimeError: server exited or did not answer in time
+    """
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited with {}".format(process.returncode))
+        message = aiocoap.Message(code=aiocoap.GET)
+        message.set_request_uri(base_uri + '.well-known/core')
+        try:
+            yield from asyncio.wait_for(context.request(message).response, 1.0)
+            return
+        except Exception:
+            yield from asyncio.sleep(0.2)
+    raise RuntimeError("server did not answer within {} s".format(START_TIMEOUT))
+
+
+@asyncio.coroutine
+def sample_memory(pid, samples, deadline):
+    """
+    Sample resident memory of the server until the deadline
+
+    :param int pid: server process id
+    :param list samples: receives resident set sizes in kB
+    :param float deadline: loop time at which sampling stops
+    """
+    loop = asyncio.get_event_loop()
+    while loop.time() < deadline:
+        rss = memory(pid)['rss_kb']
+        if rss is not None:
+            samples.append(rss)
+        yield from asyncio.sleep(RSS_INTERVAL)
+
+
+@asyncio.coroutine
+def run(options, sensors, process):
+    """
+    Drive the server with the workload of the options
+
+    :param options: parsed command line options
+    :param sensors: sensors of the server configuration
+    :type sensors: list of dict
+    :param subprocess.Popen process: server process
+    :return: (dict) results
+    """
+    loop = asyncio.get_event_loop()
+    base_uri = 'coap://localhost:{}/'.format(options.port)
+    contexts = []
+    for _ in range(options.clients):
+        contexts.append((yield from aiocoap.Context.create_client_context()))
+
+    yield from wait_ready(contexts[0], base_uri, process)
+    rss_idle = memory(process.pid)['rss_kb']
+
+    get_paths = [sensor['url'] for sensor in sensors]
+    observe_paths = [sensor['url'] for sensor in sensors if sensor.get('active')]
+    put_path, _, put_payload = (options.put or '').partition('=')
+    if options.put is None and any(sensor['name'] == 'hello' for sensor in sensors):
+        put_path, put_payload = 'hello', 'load'
+
+    def get_request(index):
+        message = aiocoap.Message(code=aiocoap.GET)
+        message.set_request_uri(base_uri + get_paths[index % len(get_paths)])
+        return message
+
+    def put_request(index):
+        message = aiocoap.Message(code=aiocoap.PUT, payload=put_payload.encode('utf-8'))
+        message.set_request_uri(base_uri + put_path)
+        return message
+
+    gets, puts = OperationStats(), OperationStats()
+    notifications = NotificationStats(options.observe_period)
+    start = loop.time()
+    deadline = start + options.warmup + options.duration
+    tasks = []
+    for index, context in enumerate(contexts):
+        if options.get_rate and get_paths:
+            tasks.append(request_loop(context, get_request, options.get_rate / options.clients, deadline, gets,
+                                      options.max_outstanding))
+        if options.put_rate and put_path:
+            tasks.append(request_loop(context, put_request, options.put_rate / options.clients, deadline, puts,
+                                      options.max_outstanding))
+    for index in range(options.observers if observe_paths else 0):
+        uri = '{}{}?period={}'.format(base_uri, observe_paths[index % len(observe_paths)], options.observe_period)
+        tasks.append(observe_loop(contexts[index % len(contexts)], uri, deadline, notifications))
+    rss_samples = []
+    tasks.append(sample_memory(process.pid, rss_samples, deadline))
+
+    @asyncio.coroutine
+    def end_warmup():
+        yield from asyncio.sleep(options.warmup)
+        gets.since = puts.since = notifications.since = time.perf_counter()
+
+    tasks.append(end_warmup())
+    yield from asyncio.gather(*tasks)
+
+    return {'gets': gets.summary(options.duration),
+            'puts': puts.summary(options.duration),
+            'notifications': notifications.summary(options.duration),
+            'server_memory_kb': dict(memory(process.pid), idle=rss_idle,
+                                     peak_sampled=max(rss_samples) if rss_samples else None)}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load benchmark of the CoAP server on mock drivers")
+    p.add_argument('--config', default=os.path.join(REPO, 'config.json'), help="configuration to take sensors from")
+    p.add_argument('--resources', help="comma-separated sensor names to serve (default: all sensors of --config)")
+    p.add_argument('--port', type=int, default=5690, help="UDP port of the benchmarked server")
+    p.add_argument('--simulate', type=float, metavar='SPEEDUP',
+                   help="use the timing-faithful hardware simulators, with durations divided by SPEEDUP")
+    p.add_argument('--clients', type=int, default=10, help="number of client contexts (UDP sockets)")
+    p.add_argument('--get-rate', type=float, default=200, help="GETs per second over all clients")
+    p.add_argument('--put-rate', type=float, default=10, help="PUTs per second over all clients")
+    p.add_argument('--put', help="PUT target as path=payload (default: hello=load if hello is served)")
+    p.add_argument('--observers', type=int, default=20, help="number of observations of active resources")
+    p.add_argument('--observe-period', type=float, default=1.0, help="notification period asked by observers")
+    p.add_argument('--max-outstanding', type=int, default=100, help="requests waiting per client and kind "
+                                                                      "beyond which requests are dropped")
+    p.add_argument('--warmup', type=float, default=5, help="seconds of load before measuring")
+    p.add_argument('--duration', type=float, default=30, help="seconds measured")
+    p.add_argument('--output', help="file receiving the JSON results (default: standard output)")
+    options = p.parse_args()
+
+    with open(options.config) as f:
+        base = json.load(f)
+    names = options.resources.split(',') if options.resources else None
+
+    with tempfile.TemporaryDirectory() as directory:
+        sensors = write_config(directory, base, names, options.port, options.simulate)
+        with open(os.path.join(directory, 'server.log'), 'w') as log:
+            process = subprocess.Popen([sys.executable, os.path.join(REPO, 'server.py')], cwd=directory,
+                                       stdout=log, stderr=subprocess.STDOUT)
+            try:
+                loop = asyncio.get_event_loop()
+                results = loop.run_until_complete(run(options, sensors, process))
+            finally:
+                # SIGINT lets the server close its store and profiler
+                process.send_signal(signal.SIGINT)
+                try:
+                    process.wait(10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+
+    report = {'commit': commit(),
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(),
+              'machine': platform.machine(),
+              'options': vars(options),
+              'resources': [sensor['name'] for sensor in sensors],
+              'results': results}
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for name in ('gets', 'puts'):
+        result = results[name]
+        latency = result['latency_ms']
+        print("{:<14} {:>8.1f}/s  p50 {} ms  p99 {} ms  p999 {} ms  errors {}  dropped {}".format(
+            name, result['throughput'], format_ms(latency['p50']), format_ms(latency['p99']),
+            format_ms(latency['p999']), result['errors'], result['dropped']), file=sys.stderr)
+    result = results['notifications']
+    print("{:<14} {:>8.1f}/s  jitter p50 {} ms  p99 {} ms  errors {}".format(
+        'notifications', result['throughput'], format_ms(result['jitter_ms']['p50']),
+        format_ms(result['jitter_ms']['p99']), result['errors']), file=sys.stderr)
+    print("server memory  {} kB (idle {} kB, peak {} kB)".format(
+        results['server_memory_kb']['rss_kb'], results['server_memory_kb']['idle'],
+        results['server_memory_kb']['hwm_kb']), file=sys.stderr)
+
+
+def format_ms(value):
+    """
+    Format milliseconds of the summary
+
+    :param float value: milliseconds, None without data
+    :return: (str) formatted value
+    """
+    return '-' if value is None else '{:.2f}'.format(value)
+
+
+if __name__ == '__main__':
+    main()
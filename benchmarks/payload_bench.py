@@ -0,0 +1,95 @@
+"""
+    Created on October 18, 2026
+
+    This script is a microbenchmark of the JSON payload serialization of a resource response
+
+    It compares the original double-encoding path (json.dumps of the formatted reading, then
+    PayloadWrapper.wrap over the whole PayloadTable) against PayloadWrapper.serialize, which splices the
+    reading behind the pre-rendered header of the table, and reports responses and bytes per second.
+
+    Example Usage:
+
+    ``$ python3 benchmarks/payload_bench.py``
+    ``$ python3 benchmarks/payload_bench.py --fields 8 --number 200000``
+
+    Python3.4 is required
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from resources_def import PayloadTable, PayloadWrapper
+from defs import DEFAULT_FP_FORMAT
+
+
+def double_encoding(data, table, timestamp):
+    """
+    Serialization path used before PayloadWrapper.serialize: values formatted as strings, reading
+        JSON-encoded into the data field, then the whole table JSON-encoded again
+
+    :param dict data: resource data, field name -> value
+    :param PayloadTable table: table holding the header information
+    :param float timestamp: time of the reading (unused, the table is stamped with datetime.now())
+    :return: (bytes) encoded payload
+    """
+    formatted = {name: str(value) if isinstance(value, bool) else format(value, DEFAULT_FP_FORMAT)
+                 for name, value in data.items()}
+    return PayloadWrapper.wrap(json.dumps(formatted, sort_keys=True), table)
+
+
+def spliced(data, table, timestamp):
+    """
+    Serialization path of PayloadWrapper.serialize
+
+    :param dict data: resource data, field name -> value
+    :param PayloadTable table: table holding the header information
+    :param float timestamp: time of the reading
+    :return: (bytes) encoded payload
+    """
+    return PayloadWrapper.serialize(data, table, timestamp, DEFAULT_FP_FORMAT)
+
+
+def run(serializer, data, number, repeat):
+    """
+    Time a serializer
+
+    :param serializer: function(data, table, timestamp) returning the encoded payload
+    :param dict data: resource data, field name -> value
+    :param int number: serializations per measurement
+    :param int repeat: measurements, the best one is reported
+    :return: (float, int) responses per second and payload size in bytes
+    """
+    table = PayloadTable('acceleration', True, 1)
+    timestamp = 1792300000.123456
+    size = len(serializer(data, table, timestamp))
+    best = min(timeit.repeat(lambda: serializer(data, table, timestamp), number=number, repeat=repeat))
+    return number / best, size
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare JSON payload serialization paths")
+    p.add_argument('--fields', type=int, default=3, help="number of fields in the reading")
+    p.add_argument('--number', type=int, default=50000, help="serializations per measurement")
+    p.add_argument('--repeat', type=int, default=5, help="measurements per path, best is reported")
+    options = p.parse_args()
+
+    rnd = random.Random(0)
+    data = {'f{}'.format(i): rnd.uniform(-3.0, 3.0) for i in range(options.fields)}
+
+    results = [(name, run(serializer, data, options.number, options.repeat))
+               for name, serializer in (('double encoding', double_encoding), ('spliced', spliced))]
+    baseline = results[0][1][0]
+
+    print("{:<16} {:>12} {:>8} {:>14} {:>8}".format('path', 'responses/s', 'bytes', 'bytes/s', 'speedup'))
+    for name, (rate, size) in results:
+        print("{:<16} {:>12.0f} {:>8} {:>14.0f} {:>7.2f}x".format(name, rate, size, rate * size, rate / baseline))
+
+
+if __name__ == '__main__':
+    main()
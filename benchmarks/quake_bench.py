@@ -0,0 +1,154 @@
+"""
+    Created on October 18, 2026
+
+    This script is a benchmark of the STA/LTA earthquake detector of the alert resource
+
+    Synthetic 3-axis earthquake traces (sensor noise, then a shaking burst of given peak acceleration) are
+    replayed through MCP3008Mock into the same ring buffer the accelerometer stream uses, and the detector
+    is run block by block as the alert resource does. Signal time is simulated, so a trace is processed as
+    fast as possible. For every peak acceleration the detection latency (from the true onset to the end of
+    the block raising the alert) and the CPU time per second of signal are reported, and a noise-only trace
+    checks for false alarms. With --trace, an accelerometer session recorded on the device (see sensors.trace)
+    is replayed as fast as possible instead, reporting when the detector alerts.
+
+    Example Usage:
+
+    ``$ python3 benchmarks/quake_bench.py``
+    ``$ python3 benchmarks/quake_bench.py --rate 200 --block 0.1``
+    ``$ python3 benchmarks/quake_bench.py --trace traces/mcp3008-20261018-120000-1234.trace``
+
+    Python3.4 is required
+"""
+
+import os
+import sys
+import math
+import random
+import argparse
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from quake_detector import StaLtaDetector
+from sensors.adc_stream import RingBuffer
+from sensors.mcp3008 import MCP3008Mock, ACC_CHANNELS, ZERO_G_REF, DELTA_PER_G
+from sensors.trace import ReplayMcp3008
+
+
+def synthetic_trace(rate, duration, onset, peak, seed=0):
+    """
+    Generate raw accelerometer counts of a synthetic earthquake
+
+    :param float rate: sampling rate in Hz
+    :param float duration: length of the trace in seconds
+    :param float onset: start of the shaking in seconds, None for a noise-only trace
+    :param float peak: peak acceleration of the shaking in units of g
+    :param int seed: random seed
+    :return: (list of tuple of int) raw counts of x, y, z per sample
+    """
+    rnd = random.Random(seed)
+    trace = []
+    for i in range(int(duration * rate)):
+        t = i / rate
+        shaking = [0.0, 0.0, 0.0]
+        if onset is not None and t >= onset:
+            # Envelope rising in 1 s and decaying over 10 s, 2~8 Hz ground motion on every axis
+            dt = t - onset
+            envelope = peak * min(dt, 1.0) * math.exp(-max(dt - 1.0, 0.0) / 10.0)
+            shaking = [envelope * math.sin(2 * math.pi * f * dt + phase)
+                       for f, phase in ((2.0, 0.0), (5.0, 1.0), (8.0, 2.0))]
+        counts = []
+        for axis in range(3):
+            value = ZERO_G_REF[axis] + DELTA_PER_G[axis] * shaking[axis] + rnd.gauss(0.0, 0.7)
+            counts.append(min(max(int(round(value)), 0), 1023))
+        trace.append(tuple(counts))
+    return trace
+
+
+def recorded_trace(path):
+    """
+    Load the accelerometer scans of a recorded MCP3008 trace
+
+    :param str path: trace file, or directory holding traces (the newest MCP3008 trace is used)
+    :return: (list of tuple of int, float) raw counts of x, y, z per sample, and mean sampling rate in Hz
+    """
+    replay = ReplayMcp3008(path, speed=0, loop=False)
+    trace = []
+    try:
+        while True:
+            trace.append(tuple(replay.scan(ACC_CHANNELS)))
+    except EOFError:
+        pass
+    times = replay.replay.streams[ACC_CHANNELS[0]][0]
+    return trace, (len(times) - 1) / (times[-1] - times[0])
+
+
+def run(trace, rate, block):
+    """
+    Replay a trace through MCP3008Mock and the detector
+
+    :param trace: raw counts of x, y, z per sample
+    :type trace: list of tuple of int
+    :param float rate: sampling rate in Hz
+    :param float block: seconds of samples per detector run
+    :return: (float, float) end time of the block raising the first alert (None if none), detector CPU seconds
+    """
+    mock = MCP3008Mock()
+    mock.set_source(trace, ACC_CHANNELS)
+    buffer = RingBuffer(len(ACC_CHANNELS))
+    detector = StaLtaDetector(rate, axes=len(ACC_CHANNELS))
+
+    per_block = max(int(round(block * rate)), 1)
+    sequence = 0
+    cpu = 0.0
+    alert = None
+    for start in range(0, len(trace), per_block):
+        for i in range(start, min(start + per_block, len(trace))):
+            buffer.append(i / rate, mock.scan(ACC_CHANNELS))
+
+        begin = time.process_time()
+        sequence, timestamps, counts = buffer.since(sequence)
+        onset = detector.process(timestamps, counts)
+        cpu += time.process_time() - begin
+
+        if onset is not None and alert is None:
+            alert = sequence / rate
+    return alert, cpu
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the STA/LTA earthquake detector")
+    p.add_argument('--rate', type=float, default=100, help="sampling rate in Hz")
+    p.add_argument('--block', type=float, default=0.25, help="seconds of samples per detector run")
+    p.add_argument('--duration', type=float, default=60, help="length of each trace in seconds")
+    p.add_argument('--onset', type=float, default=30, help="start of the shaking in seconds")
+    p.add_argument('--trace', help="recorded MCP3008 trace to replay instead of the synthetic traces")
+    options = p.parse_args()
+
+    if options.trace:
+        trace, rate = recorded_trace(options.trace)
+        alert, cpu = run(trace, rate, options.block)
+        duration = len(trace) / rate
+        print("{} samples at {:.1f} Hz ({:.1f} s): alert {}, CPU {:.3f} ms/s signal".format(
+            len(trace), rate, duration, 'none' if alert is None else 'at {:.2f} s'.format(alert),
+            1000 * cpu / duration))
+        return
+
+    print("{:<10} {:>12} {:>18}".format('peak (g)', 'latency (s)', 'CPU (ms/s signal)'))
+    for peak in (None, 0.02, 0.05, 0.1, 0.3, 1.0):
+        onset = None if peak is None else options.onset
+        trace = synthetic_trace(options.rate, options.duration, onset, peak or 0.0)
+        alert, cpu = run(trace, options.rate, options.block)
+
+        if alert is None:
+            latency = 'none'
+        elif onset is None:
+            latency = 'FALSE {:.2f}'.format(alert)
+        else:
+            latency = '{:.2f}'.format(alert - onset)
+        print("{:<10} {:>12} {:>18.3f}".format('noise' if peak is None else peak, latency,
+                                               1000 * cpu / options.duration))
+
+
+if __name__ == '__main__':
+    main()
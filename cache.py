@@ -0,0 +1,129 @@
+"""
+    Created on October 18, 2026
+
+    This is the sample cache placed in front of every sensor resource
+
+    A reading younger than the allowed maximum age is served from the cache instead of the hardware,
+    so the cost of a sensor is bounded by its sampling rate rather than the number of requests and
+    observers. Concurrent refreshes are coalesced into a single driver transaction.
+
+    Python3.4 is required
+"""
+
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Sample(object):
+    """
+    A single reading of a resource
+    """
+
+    def __init__(self, value, timestamp, acquired):
+        """
+        Constructor of a sample
+
+        :param value: reading returned by the acquisition coroutine
+        :param float timestamp: wall-clock time of the reading (seconds since epoch)
+        :param float acquired: monotonic time of the reading
+        """
+        self.value = value
+        self.timestamp = timestamp
+        self.acquired = acquired
+
+
+class SampleCache(object):
+    """
+    Freshness-bounded cache holding the latest reading of a resource
+    """
+
+    def __init__(self, acquire):
+        """
+        Constructor of the cache
+
+        :param acquire: coroutine function reading the hardware and returning a new value
+        """
+        self.acquire = acquire
+        self.sample = None
+        self._pending = None
+        # Functions called with every newly acquired sample
+        self.listeners = []
+
+    def age(self):
+        """
+        Get age of the cached reading
+
+        :return: (float) seconds since the reading was taken, None if nothing is cached
+        """
+        if self.sample is None:
+            return None
+        return time.monotonic() - self.sample.acquired
+
+    def is_fresh(self, max_age):
+        """
+        Check whether the cached reading may still be served
+
+        :param float max_age: maximum allowed age in seconds
+        :return: (bool) cached reading exists and is younger than max_age
+        """
+        age = self.age()
+        return age is not None and age < max_age
+
+    def remaining(self, max_age):
+        """
+        Get how long the cached reading stays fresh, as used for the CoAP Max-Age option
+
+        :param float max_age: maximum allowed age in seconds
+        :return: (int) whole seconds the cached reading remains fresh
+        """
+        age = self.age()
+        if age is None:
+            return 0
+        return max(int(max_age - age), 0)
+
+    def invalidate(self):
+        """
+        Drop the cached reading, forcing the next read to go to the hardware
+        """
+        self.sample = None
+
+    @asyncio.coroutine
+    def read(self, max_age):
+        """
+        Get a reading no older than max_age, refreshing the cache if necessary
+
+        :param float max_age: maximum allowed age in seconds
+        :return: (Sample) cached or newly acquired reading
+        """
+        if self.is_fresh(max_age):
+            return self.sample
+        return (yield from self.refresh())
+
+    @asyncio.coroutine
+    def refresh(self):
+        """
+        Acquire a new reading; callers arriving while an acquisition is running share its result
+
+        :return: (Sample) newly acquired reading
+        """
+        if self._pending is None:
+            self._pending = asyncio.Task(self._acquire())
+        return (yield from asyncio.shield(self._pending))
+
+    @asyncio.coroutine
+    def _acquire(self):
+        try:
+            value = yield from self.acquire()
+            self.sample = Sample(value, time.time(), time.monotonic())
+            # A failing listener (e.g. a derived resource) must not keep the others from the sample
+            for listener in self.listeners:
+                try:
+                    listener(self.sample)
+                except Exception:
+                    logger.exception("Sample listener %r failed", listener)
+            return self.sample
+        finally:
+            self._pending = None
@@ -21,16 +21,21 @@ import asyncio
 import socket
 import functools
 import signal
+import datetime
 
 from aiocoap import *
 from defs import *
+from resources_def import PackedPayloadWrapper
+from resources_def import DeltaPayloadWrapper
 
 # Default client configuration:
 # IP is (local) 127.0.0.1
 server_IP = 'localhost'
 # resources independent from hardware implementation
 resources = {'hello': {'url': 'hello'},
-             'time': {'url': 'time'}}
+             'time': {'url': 'time'},
+             'snapshot': {'url': 'snapshot', 'active': True},
+             'profile': {'url': '.well-known/profile', 'active': False}}
 # Octave plotting data file
 data_file = 'data.txt'
 # flag to enable Octave plotting
@@ -75,7 +80,10 @@ def plot_octave(jpayload):
 
         try:
             # TODO: data format for plotting should be more dynamic
-            jvalue = json.loads(jpayload['data'])
+            # Data is a nested object; older servers send it as a JSON string
+            jvalue = jpayload['data']
+            if isinstance(jvalue, str):
+                jvalue = json.loads(jvalue)
             #print("{}".format(jvalue))
             if jpayload['name'] == 'joystick':
                 data += [float('NaN'), float('NaN'), float('NaN'),
@@ -130,20 +138,34 @@ def incoming_data(response):
     """
     global run_demo
 
-    payload = response.payload.decode(UTF8)
-
-    if response.opt.content_format is not JSON_FORMAT_CODE:
-        print("Result:\n{}: {}".format(response.code, payload))
+    if response.opt.content_format in (PACKED_FORMAT_CODE, DELTA_FORMAT_CODE):
+        if response.opt.content_format == PACKED_FORMAT_CODE:
+            ppayload = PackedPayloadWrapper.unwrap(response.payload)
+            print("Result (packed):\n{}: {}".format(response.code, ppayload))
+        else:
+            ppayload = DeltaPayloadWrapper.unwrap(response.payload)
+            print("Result (delta):\n{}: {}".format(response.code, ppayload))
+
+        if not ppayload['records']:
+            return
+        # Plot latest reading, in the same shape as a JSON payload
+        timestamp, data = ppayload['records'][-1]
+        jpayload = {'name': ppayload['name'],
+                    'data': data,
+                    'time': str(datetime.datetime.fromtimestamp(timestamp))}
+    elif response.opt.content_format != JSON_FORMAT_CODE:
+        print("Result:\n{}: {}".format(response.code, response.payload.decode(UTF8)))
+        return
     else:
-        jpayload = json.loads(payload)
+        jpayload = json.loads(response.payload.decode(UTF8))
         print("Result (JSON):\n{}: {}".format(response.code, jpayload))
 
-        try:
-            plot_octave(jpayload)
-        except Exception as e:
-            print("{}".format(e))
-            print("Disabling Octave script...")
-            run_demo = False
+    try:
+        plot_octave(jpayload)
+    except Exception as e:
+        print("{}".format(e))
+        print("Disabling Octave script...")
+        run_demo = False
 
 
 def end_observation(loop):
@@ -186,17 +208,20 @@ def post_impl(jargs):
         incoming_data(response)
 
 @asyncio.coroutine
-def get_impl(url=''):
+def get_impl(url='', accept=None):
     """
     Implementation of CoAP GET request
 
     :param str url: url to locate resource
+    :param int accept: content format asked from server (default: server's choice, JSON)
     :raises RuntimeError: incorrect Context for client
     """
     context = yield from Context.create_client_context()
 
     request = Message(code=GET)
     request.set_request_uri('coap://{}/{}'.format(server_IP, url))
+    if accept is not None:
+        request.opt.accept = accept
 
     try:
         response = yield from context.request(request).response
@@ -229,11 +254,36 @@ def put_impl(url='', payload=""):
         incoming_data(response)
 
 @asyncio.coroutine
-def observe_impl(url=''):
+def delete_impl(url=''):
+    """
+    Implementation of CoAP DELETE request
+
+    :param str url: url to locate resource
+    :raises RuntimeError: incorrect Context for client, or server did not remove the resource
+    """
+    context = yield from Context.create_client_context()
+
+    request = Message(code=DELETE)
+    request.set_request_uri('coap://{}/{}'.format(server_IP, url))
+
+    try:
+        response = yield from context.request(request).response
+    except Exception as e:
+        raise RuntimeError("Failed to remove resource: {}".format(e))
+    else:
+        incoming_data(response)
+
+    # e.g. 4.04 for a resource already gone, 4.05 for a resource that cannot be removed
+    if not response.code.is_successful():
+        raise RuntimeError("Server did not remove resource: {}".format(response.code))
+
+@asyncio.coroutine
+def observe_impl(url='', accept=None):
     """
     Implementation of CoAP Observe request
 
     :param str url: url to locate resource
+    :param int accept: content format asked from server (default: server's choice, JSON)
     :raises NameError: cannot locate resource at given url
     :raises RuntimeError: server responds code is unsuccessful
     """
@@ -241,6 +291,8 @@ def observe_impl(url=''):
 
     request = Message(code=GET)
     request.set_request_uri('coap://{}/{}'.format(server_IP, url))
+    if accept is not None:
+        request.opt.accept = accept
 
     request.opt.observe = 0
     observation_is_over = asyncio.Future()
@@ -428,6 +480,32 @@ class Commands():
         except Exception as e:
             raise RuntimeError("Failed to complete CoAP request: {}".format(e))
 
+    @staticmethod
+    @asyncio.coroutine
+    def do_remove(name):
+        """
+        Remove resource from server
+
+        Syntax: >>>remove [name]
+
+        Example: ``>>>remove new_r``
+
+        :param str name: name of the resource
+        :raises AttributeError: resource name not found
+        :raises RuntimeError: DELETE request failed
+        """
+        try:
+            url = resources[name]['url']
+        except KeyError as e:
+            raise AttributeError("Resource name not found: {}".format(e))
+
+        try:
+            yield from delete_impl(url)
+        except Exception as e:
+            raise RuntimeError("Failed to complete CoAP request: {}".format(e))
+        else:
+            del resources[name]
+
     @staticmethod
     @asyncio.coroutine
     def do_resource(name, code='GET', *args):
@@ -436,13 +514,21 @@ class Commands():
 
         Once observation starts, use Ctrl + c to end observation
 
-        Syntax: >>>[resource] [code] ([-o]) ([payload])
+        Syntax: >>>[resource] [code] ([-o] ([-p [sec]])) ([-b] | [-z]) ([-q [query]]) ([payload])
         resource: full resource list can be acquired by help command
         code: GET/PUT
         -o: following GET to observe this resource
+        -p: following -o to be notified every given seconds instead of the resource's period
+        -b: following GET to ask for packed binary payload instead of JSON
+        -z: following GET to ask for delta compressed payload instead of JSON, e.g. for past readings
+        -q: following GET to send a URI query, e.g. past readings or statistics of past readings
 
         Example: ``>>>temperature GET -o``
+        Example: ``>>>temperature GET -o -p 60``
+        Example: ``>>>temperature GET -q agg=mean,max,p95&window=10m&step=1m``
+        Example: ``>>>acceleration GET -o -b``
         Example: ``>>>temperature PUT period 5``
+        Example: ``>>>profile PUT sampling 60``
 
         :param str name: name of the resource
         :param str code: type of CoAP request
@@ -461,7 +547,21 @@ class Commands():
         #print("do_resource: payload={}".format(payload))
         try:
             if code == 'GET':
-                if payload.startswith('-o'):
+                accept = None
+                if '-b' in args:
+                    accept = PACKED_FORMAT_CODE
+                elif '-z' in args:
+                    accept = DELTA_FORMAT_CODE
+                query = []
+                if '-q' in args:
+                    query.append(args[args.index('-q') + 1])
+                if '-o' in args and '-p' in args:
+                    # Observer's own notification period
+                    query.append('period={}'.format(args[args.index('-p') + 1]))
+                if query:
+                    url = '{}?{}'.format(url, '&'.join(query))
+
+                if '-o' in args:
                     if resource['active'] is True:
                         # Create new event loop for observation
                         loop = asyncio.new_event_loop()
@@ -476,7 +576,7 @@ class Commands():
                             print("Observation running forever...")
                             print("Press Ctrl + c to end observation")
 
-                            loop.run_until_complete(observe_impl(url))
+                            loop.run_until_complete(observe_impl(url, accept))
                         finally:
                             # In case of exceptions, must terminate observation loop and
                             #   switch back to client event loop
@@ -484,11 +584,11 @@ class Commands():
                             asyncio.set_event_loop(client_event_loop)
 
                     else:   # Resource is not configured to observable
-                        yield from get_impl(url)
+                        yield from get_impl(url, accept)
                         print("Warning: resource is not observable")
 
                 else:
-                    yield from get_impl(url)
+                    yield from get_impl(url, accept)
 
             elif code == 'PUT':
                 yield from put_impl(url, payload)
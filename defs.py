@@ -19,4 +19,10 @@ TEXT_PLAIN_CODE = 0
 # application/link-format: describe hosted resources, attributes and relationships
 LINK_FORMAT_CODE = 40
 # application/json
-JSON_FORMAT_CODE = 50
\ No newline at end of file
+JSON_FORMAT_CODE = 50
+# Packed binary resource data (experimental use range): header, field names, then records of
+#   big-endian doubles with numeric epoch timestamps, see resources_def.PackedPayloadWrapper
+PACKED_FORMAT_CODE = 65000
+# Delta/varint coded series of resource data (experimental use range): packed header, then
+#   delta-of-delta timestamps and quantized value deltas as varints, see series_codec
+DELTA_FORMAT_CODE = 65001
@@ -0,0 +1,79 @@
+"""
+    Created on October 18, 2026
+
+    This is the bounded sample history kept by every sensor resource
+
+    Clients reconnecting after a gap fetch the samples they missed with one bulk GET
+    (?since=<timestamp>&limit=<n>) instead of replaying an observation.
+
+    Python3.4 is required
+"""
+
+import collections
+
+# Default number of samples kept per resource
+DEFAULT_HISTORY_SIZE = 1024
+
+
+class SampleHistory(object):
+    """
+    Bounded, time-ordered history of the readings of one resource
+    """
+
+    def __init__(self, size=DEFAULT_HISTORY_SIZE):
+        """
+        Constructor of an empty history
+
+        :param int size: maximum number of samples kept; oldest samples are dropped first
+        """
+        self._samples = collections.deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def size(self):
+        return self._samples.maxlen
+
+    def resize(self, size):
+        """
+        Change maximum number of samples kept, keeping the newest ones
+
+        :param int size: maximum number of samples kept
+        """
+        self._samples = collections.deque(self._samples, maxlen=size)
+
+    def append(self, timestamp, data):
+        """
+        Add a sample; samples are expected in increasing timestamp order
+
+        :param float timestamp: time of the sample (seconds since epoch)
+        :param dict data: resource data, field name -> value
+        """
+        self._samples.append((timestamp, data))
+
+    def query(self, since=None, limit=None):
+        """
+        Get samples newer than a timestamp
+
+        With since, the oldest samples after it are returned first, so a client can page forward by
+            passing the timestamp of the last sample received; without since, the newest samples are returned
+
+        :param float since: only samples with a later timestamp are returned (default: all samples)
+        :param int limit: maximum number of samples returned (default: no limit)
+        :return: (list of (float, dict)) samples in increasing timestamp order
+        """
+        selected = []
+        # Walk backwards from the newest sample, so the cost depends on the size of the result
+        for timestamp, data in reversed(self._samples):
+            if since is None:
+                if limit is not None and len(selected) >= limit:
+                    break
+            elif timestamp <= since:
+                break
+            selected.append((timestamp, data))
+
+        selected.reverse()
+        if since is not None and limit is not None:
+            del selected[limit:]
+        return selected
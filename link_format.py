@@ -0,0 +1,110 @@
+"""
+    Created on October 18, 2026
+
+    This is the CoRE link-format (RFC 6690) directory served at /.well-known/core
+
+    The document is rendered once from the resources of the site and an index of every attribute value is
+    built alongside it, so that discovery requests, filtered with ?rt=, ?if=, ?href= etc., are answered
+    from the index and a cache of rendered results instead of walking the site. The site throws the
+    index away whenever a resource is added or removed.
+
+    Python3.4 is required
+"""
+
+# Maximum number of rendered filter results kept
+FILTER_CACHE_SIZE = 64
+# Attributes holding space-separated lists of values, matched value by value (RFC 6690, section 4.1)
+MULTI_VALUE_ATTRIBUTES = ('rt', 'if', 'rel', 'ct')
+
+
+def render_link(href, attributes):
+    """
+    Render one link in link-format
+
+    :param str href: target of the link, e.g. '/hygrothermo/temperature'
+    :param dict attributes: attribute name -> value, None for attributes without value (e.g. obs)
+    :return: (str) link, e.g. '</time>;rt="time";obs'
+    """
+    link = '<{}>'.format(href)
+    for name in sorted(attributes):
+        value = attributes[name]
+        if value is None:
+            link += ';{}'.format(name)
+        elif isinstance(value, int):
+            link += ';{}={}'.format(name, value)
+        else:
+            link += ';{}="{}"'.format(name, value)
+    return link
+
+
+class LinkIndex(object):
+    """
+    Rendered link-format document of a site with an index of attribute values for query filtering
+    """
+
+    def __init__(self, links):
+        """
+        Constructor rendering the document and building the index
+
+        :param links: link target and attributes of every listed resource
+        :type links: iterable of (str, dict)
+        """
+        self.links = []
+        # attribute name -> value -> positions of links having that value
+        self.index = {}
+        self._cache = {}
+
+        for position, (href, attributes) in enumerate(sorted(links, key=lambda link: link[0])):
+            self.links.append(render_link(href, attributes))
+            values = dict(attributes)
+            values['href'] = href
+            for name, value in values.items():
+                tokens = [''] if value is None else [str(value)]
+                if name in MULTI_VALUE_ATTRIBUTES and value is not None:
+                    tokens = str(value).split()
+                for token in tokens:
+                    self.index.setdefault(name, {}).setdefault(token, []).append(position)
+
+        self.document = ','.join(self.links)
+
+    def __len__(self):
+        return len(self.links)
+
+    def lookup(self, name, value):
+        """
+        Find links whose attribute matches a filter value
+
+        :param str name: attribute name, or 'href' for the link target
+        :param str value: value to match; a trailing '*' matches any value with that prefix, an empty value
+            matches any link having the attribute
+        :return: (set of int) positions of matching links
+        """
+        values = self.index.get(name, {})
+        if not value:
+            return {position for positions in values.values() for position in positions}
+        if value.endswith('*'):
+            prefix = value[:-1]
+            return {position for token, positions in values.items() if token.startswith(prefix)
+                    for position in positions}
+        return set(values.get(value, ()))
+
+    def render(self, filters=None):
+        """
+        Get the document, or the links matching all given filters
+
+        :param dict filters: attribute name -> filter value, as parsed from the URI query
+        :return: (str) link-format document
+        """
+        if not filters:
+            return self.document
+
+        key = tuple(sorted(filters.items()))
+        if key not in self._cache:
+            matches = None
+            for name, value in key:
+                found = self.lookup(name, value)
+                matches = found if matches is None else matches & found
+            if len(self._cache) >= FILTER_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = ','.join(self.links[position] for position in sorted(matches))
+        return self._cache[key]
@@ -0,0 +1,350 @@
+"""
+    Created on October 18, 2026
+
+    This is the metrics registry of the server, served by the metrics resource at /.well-known/metrics
+
+    Counters and histograms are numbers updated in place without locks, as every metric series has a
+    single writer at a time: request, notification and event loop metrics are only updated on the event
+    loop, and driver timings are only updated by driver calls holding the lock of their bus. Histograms have
+    fixed buckets, so an observation costs one bisection and two additions and the instrumentation can stay
+    on in production. Gauges read from other components (scheduler, bus workers, store, observers) are
+    pulled by collector functions when the metrics are rendered, as JSON or in the Prometheus text format.
+
+    Example Usage:
+
+    ``>>> registry.increment('requests_total', (('path', '/temperature'), ('code', '2.05')))``
+    ``>>> registry.observe('render_seconds', (('path', '/temperature'),), 0.0012)``
+    ``>>> text = registry.render_prometheus()``
+
+    Python3.4 is required
+"""
+
+import bisect
+import collections
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prefix of metric names in the Prometheus text format
+NAMESPACE = 'poe'
+# Upper bounds in seconds of the buckets of latency histograms
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0)
+# Seconds between two measurements of the event loop lag
+LAG_INTERVAL = 1.0
+
+
+class Histogram(object):
+    """
+    Histogram with fixed buckets, counting values less than or equal to each upper bound
+    """
+
+    __slots__ = ('bounds', 'counts', 'total')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """
+        Constructor of an empty histogram
+
+        :param bounds: increasing upper bounds of the buckets; larger values fall in a last, unbounded bucket
+        :type bounds: tuple of float
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        """
+        Account for one value
+
+        :param float value: observed value, e.g. a duration in seconds
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def cumulative(self):
+        """
+        Get cumulative bucket counts
+
+        :return: (list of (float, int)) upper bound (inf for the last bucket) and number of values up to it
+        """
+        buckets = []
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            buckets.append((bound, seen))
+        return buckets
+
+
+class MetricsRegistry(object):
+    """
+    Named metric families, each holding one series per set of labels
+    """
+
+    def __init__(self):
+        """
+        Constructor of an empty registry
+        """
+        # metric name -> (type, help text, histogram bounds), in order of declaration
+        self._families = collections.OrderedDict()
+        # metric name -> labels -> [value] for counters and gauges, Histogram for histograms; labels are
+        #   tuples of (label name, value) pairs
+        self._series = {}
+        # Functions called when the metrics are rendered, returning gauges as a list of (metric name, labels,
+        #   value); metrics not declared are rendered as gauges
+        self.collectors = []
+
+    def _declare(self, name, kind, help_text, bounds=None):
+        self._families[name] = (kind, help_text, bounds)
+        self._series.setdefault(name, {})
+
+    def counter(self, name, help_text):
+        """
+        Declare a counter
+
+        :param str name: metric name
+        :param str help_text: description of the metric
+        """
+        self._declare(name, 'counter', help_text)
+
+    def gauge(self, name, help_text):
+        """
+        Declare a gauge
+
+        :param str name: metric name
+        :param str help_text: description of the metric
+        """
+        self._declare(name, 'gauge', help_text)
+
+    def histogram(self, name, help_text, bounds=LATENCY_BUCKETS):
+        """
+        Declare a histogram
+
+        :param str name: metric name
+        :param str help_text: description of the metric
+        :param bounds: increasing upper bounds of the buckets
+        :type bounds: tuple of float
+        """
+        self._declare(name, 'histogram', help_text, bounds)
+
+    def increment(self, name, labels=(), amount=1):
+        """
+        Increment a counter
+
+        :param str name: name of a declared counter
+        :param labels: (label name, value) pairs, always given in the same order for a series
+        :type labels: tuple of (str, str)
+        :param amount: increment
+        """
+        series = self._series[name]
+        cell = series.get(labels)
+        if cell is None:
+            cell = series[labels] = [0]
+        cell[0] += amount
+
+    def set(self, name, labels, value):
+        """
+        Set a gauge
+
+        :param str name: name of a declared gauge
+        :param labels: (label name, value) pairs
+        :type labels: tuple of (str, str)
+        :param value: current value
+        """
+        self._series[name][labels] = [value]
+
+    def observe(self, name, labels, value):
+        """
+        Account for one value in a histogram
+
+        :param str name: name of a declared histogram
+        :param labels: (label name, value) pairs, always given in the same order for a series
+        :type labels: tuple of (str, str)
+        :param float value: observed value
+        """
+        series = self._series[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(self._families[name][2])
+        histogram.observe(value)
+
+    def collect(self):
+        """
+        Get all metrics, including the gauges of the collectors
+
+        :return: (list of (str, str, str, list)) name, type, help text and (labels, value) pairs of every
+            metric with at least one series; values of histograms are Histogram objects
+        """
+        collected = collections.OrderedDict((name, []) for name in self._families)
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    if value is not None:
+                        collected.setdefault(name, []).append((labels, [value]))
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+
+        metrics = []
+        for name, pulled in collected.items():
+            kind, help_text, _ = self._families.get(name, ('gauge', '', None))
+            # Series may be added by driver threads meanwhile; list() copies the dict without releasing the GIL
+            series = sorted(list(self._series.get(name, {}).items()) + pulled, key=lambda item: item[0])
+            if series:
+                metrics.append((name, kind, help_text, [(labels, value if kind == 'histogram' else value[0])
+                                                        for labels, value in series]))
+        return metrics
+
+    def render_json(self):
+        """
+        Render all metrics as JSON
+
+        :return: (str) JSON object, metric name -> type, help and 'values': list of {'labels', 'value'}, or
+            of {'labels', 'count', 'sum', 'buckets'} for histograms with cumulative [upper bound, count] buckets
+        """
+        document = collections.OrderedDict()
+        for name, kind, help_text, series in self.collect():
+            values = []
+            for labels, value in series:
+                entry = {'labels': dict(labels)}
+                if kind == 'histogram':
+                    entry['count'] = value.count
+                    entry['sum'] = value.total
+                    entry['buckets'] = [['+Inf' if bound == float('inf') else bound, count]
+                                        for bound, count in value.cumulative()]
+                else:
+                    entry['value'] = value
+                values.append(entry)
+            document[name] = {'type': kind, 'help': help_text, 'values': values}
+        return json.dumps(document)
+
+    def render_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format (version 0.0.4)
+
+        :return: (str) metrics text
+        """
+        lines = []
+        for name, kind, help_text, series in self.collect():
+            name = '{}_{}'.format(NAMESPACE, name)
+            if help_text:
+                lines.append('# HELP {} {}'.format(name, help_text.replace('\\', '\\\\').replace('\n', '\\n')))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            for labels, value in series:
+                if kind == 'histogram':
+                    for bound, count in value.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append('{}_bucket{} {}'.format(name, format_labels(labels + (('le', le),)), count))
+                    lines.append('{}_sum{} {!r}'.format(name, format_labels(labels), value.total))
+                    lines.append('{}_count{} {}'.format(name, format_labels(labels), value.count))
+                else:
+                    lines.append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """
+    Format labels of a series in the Prometheus text format
+
+    :param labels: (label name, value) pairs
+    :type labels: tuple of (str, str)
+    :return: (str) labels in braces, empty string without labels
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                           .replace('\n', '\\n'))
+                          for name, value in labels) + '}'
+
+
+def format_value(value):
+    """
+    Format a sample value in the Prometheus text format
+
+    :param value: number (booleans are 0 or 1)
+    :return: (str) formatted value
+    """
+    if isinstance(value, int):
+        return str(int(value))
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), -float('inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def statistics_collector(prefix, statistics, label=None):
+    """
+    Make a collector exposing statistics of a component as gauges, e.g. SamplingScheduler.statistics
+
+    :param str prefix: prefix of the metric names, followed by the statistic name
+    :param statistics: function returning a dict, statistic name -> number; with label, returning a dict
+        label value -> such dict (e.g. BusSupervisor.statistics)
+    :param str label: label name of the outer keys of nested statistics
+    :return: collector function for MetricsRegistry.collectors
+    """
+    def collect():
+        values = statistics()
+        groups = values.items() if label is not None else [(None, values)]
+        return [('{}_{}'.format(prefix, name), ((label, key),) if label is not None else (), value)
+                for key, group in groups for name, value in group.items()
+                if isinstance(value, (int, float))]
+
+    return collect
+
+
+class LoopLagMonitor(object):
+    """
+    Measurement of the event loop lag: how late a timer callback runs compared with its deadline
+    """
+
+    def __init__(self, registry, interval=LAG_INTERVAL):
+        """
+        Constructor of a monitor, started with start()
+
+        :param MetricsRegistry registry: registry receiving the loop_lag_seconds histogram and gauge
+        :param float interval: seconds between two measurements
+        """
+        self.registry = registry
+        self.interval = interval
+        self._loop = None
+        self._deadline = None
+        self._timer = None
+
+    def start(self, loop):
+        """
+        Start measuring on an event loop
+
+        :param loop: event loop of the server
+        """
+        self._loop = loop
+        self._deadline = loop.time() + self.interval
+        self._timer = loop.call_at(self._deadline, self._measure)
+
+    def _measure(self):
+        lag = max(self._loop.time() - self._deadline, 0.0)
+        self.registry.observe('loop_lag_seconds', (), lag)
+        self.registry.set('loop_lag_last_seconds', (), lag)
+        self.start(self._loop)
+
+    def stop(self):
+        """
+        Stop measuring
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+# Metrics of the server
+registry = MetricsRegistry()
+registry.counter('requests_total', "CoAP requests rendered (including observe notifications), by path and code")
+registry.histogram('render_seconds', "Time to render a CoAP response, by path")
+registry.counter('notifications_total', "Observe notifications triggered, by resource")
+registry.gauge('observers', "Current observers, by path")
+registry.histogram('driver_seconds', "Duration of driver calls holding the bus lock, by driver and method")
+registry.histogram('loop_lag_seconds', "Lateness of a periodic event loop timer")
+registry.gauge('loop_lag_last_seconds', "Lateness of the last event loop timer measured")
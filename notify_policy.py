@@ -0,0 +1,192 @@
+"""
+    Created on October 18, 2026
+
+    This is the notification policy deciding which samples of an observable resource are sent to observers
+
+    Resources are still sampled every observation period, but observers are only notified when the reading
+    moved by more than a deadband (absolute, or relative to the last notified value), never more often than
+    a minimum interval, and at least once per maximum silent interval (heartbeat). Without any setting every
+    sample is notified, as before. A change held back by the minimum interval is pending, and is notified
+    when the interval expires (trailing notification) unless the reading went back meanwhile.
+
+    The policy holds the settings of a resource; what was last notified is kept per observer, as observers
+    asking for their own period are notified at different times and must each see changes made since their
+    own last notification.
+
+    Example Usage:
+
+    ``>>> policy = NotificationPolicy(deadband=0.5, max_interval=60)``
+    ``>>> policy.configure('deadband', '5%')``
+    ``>>> policy.should_notify({'temperature': 21.5}, NotificationState())``
+
+    Python3.4 is required
+"""
+
+import time
+
+# PUT/config commands understood by NotificationPolicy.configure
+POLICY_COMMANDS = ('deadband', 'mininterval', 'heartbeat')
+
+
+class NotificationState(object):
+    """
+    What one observer was last notified of
+    """
+
+    __slots__ = ('last_data', 'last_time', 'pending')
+
+    def __init__(self, last_data=None, last_time=None):
+        """
+        Constructor of the state of an observer
+
+        :param dict last_data: resource data last sent to the observer, None if unknown
+        :param float last_time: monotonic time it was sent, None if never
+        """
+        self.last_data = last_data
+        self.last_time = last_time
+        # The latest sample is a change held back by the minimum interval
+        self.pending = False
+
+
+class NotificationPolicy(object):
+    """
+    Change-of-value policy of one observable resource
+    """
+
+    def __init__(self, deadband=None, relative=False, min_interval=0, max_interval=0):
+        """
+        Constructor of a policy; default notifies every sample
+
+        :param float deadband: minimum change of any numeric field to notify, 0 for any change, None to
+            notify every sample
+        :param bool relative: deadband is a fraction of the last notified value instead of an absolute change
+        :param float min_interval: minimum seconds between two notifications, 0 for no limit
+        :param float max_interval: maximum seconds without notification (heartbeat), 0 for no heartbeat
+        """
+        self.deadband = deadband
+        self.relative = relative
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        # Number of samples not sent to an observer
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a policy from the optional keys of a sensor entry in config.json
+
+        :param dict config: sensor entry; 'deadband', 'relative_deadband' (fraction), 'min_interval' and
+            'heartbeat' (seconds) are used if present
+        :return: (NotificationPolicy) policy of the sensor
+        :raises ValueError: setting not a non-negative number
+        """
+        policy = cls(min_interval=cls._non_negative(config.get('min_interval', 0)),
+                     max_interval=cls._non_negative(config.get('heartbeat', 0)))
+        if 'relative_deadband' in config:
+            policy.deadband, policy.relative = cls._non_negative(config['relative_deadband']), True
+        elif 'deadband' in config:
+            policy.deadband = cls._non_negative(config['deadband'])
+        return policy
+
+    def configure(self, command, value):
+        """
+        Apply one PUT command
+
+        'deadband N' sets an absolute deadband, 'deadband N%' a relative one, 'deadband off' notifies every
+            sample; 'mininterval N' and 'heartbeat N' set the intervals in seconds, 0 to disable
+
+        :param str command: one of POLICY_COMMANDS
+        :param str value: new setting
+        :raises ValueError: unknown command or invalid value
+        """
+        if command == 'deadband':
+            if value == 'off':
+                self.deadband, self.relative = None, False
+            elif value.endswith('%'):
+                self.deadband, self.relative = self._non_negative(value[:-1]) / 100, True
+            else:
+                self.deadband, self.relative = self._non_negative(value), False
+        elif command == 'mininterval':
+            self.min_interval = self._non_negative(value)
+        elif command == 'heartbeat':
+            self.max_interval = self._non_negative(value)
+        else:
+            raise ValueError("Unknown notification policy command {}".format(command))
+
+    @staticmethod
+    def _non_negative(value):
+        # Only numbers, or their PUT text; float() would also take booleans and, with a TypeError, other types
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError("Value must be a number: {!r}".format(value))
+        number = float(value)
+        if not number >= 0:
+            raise ValueError("Value must not be negative: {}".format(value))
+        return number
+
+    def changed(self, data, last_data):
+        """
+        Check whether data moved out of the deadband around the last notified data
+
+        :param dict data: resource data, field name -> value
+        :param dict last_data: resource data last notified, None if unknown
+        :return: (bool) any field changed by more than the deadband
+        """
+        if self.deadband is None or last_data is None:
+            return True
+
+        for name, value in data.items():
+            last = last_data.get(name)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or last is None:
+                if value != last:
+                    return True
+                continue
+            band = self.deadband * abs(last) if self.relative else self.deadband
+            if abs(value - last) > band or (band == 0 and value != last):
+                return True
+        return False
+
+    def should_notify(self, data, state, now=None):
+        """
+        Decide whether the latest sample is sent to an observer, and record it in its state if so
+
+        :param dict data: resource data of the latest sample, field name -> value
+        :param NotificationState state: what the observer was last notified of
+        :param float now: monotonic time of the decision (default: time.monotonic())
+        :return: (bool) observer is to be notified
+        """
+        if now is None:
+            now = time.monotonic()
+
+        if state.last_time is not None:
+            elapsed = now - state.last_time
+            if elapsed < self.min_interval:
+                notify = False
+                # Remember the change for a trailing notification, or forget it if the reading went back
+                state.pending = self.changed(data, state.last_data)
+            else:
+                notify = (self.max_interval and elapsed >= self.max_interval) or self.changed(data, state.last_data)
+        else:
+            notify = True
+
+        if notify:
+            state.last_data = dict(data)
+            state.last_time = now
+            state.pending = False
+        else:
+            self.suppressed += 1
+        return bool(notify)
+
+    def describe(self):
+        """
+        Get current settings in PUT syntax
+
+        :return: (str) settings, e.g. 'deadband 5% mininterval 0 heartbeat 60'
+        """
+        if self.deadband is None:
+            deadband = 'off'
+        elif self.relative:
+            deadband = '{:g}%'.format(self.deadband * 100)
+        else:
+            deadband = '{:g}'.format(self.deadband)
+        return 'deadband {} mininterval {:g} heartbeat {:g}'.format(deadband, self.min_interval, self.max_interval)
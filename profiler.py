@@ -0,0 +1,314 @@
+"""
+    Created on October 18, 2026
+
+    This is the opt-in profiler of the server, switched on for a bounded window by configuration or by PUT
+    to the profile resource at /.well-known/profile
+
+    Two modes are offered:
+        cprofile: deterministic profiling with cProfile of the event loop thread (resource handlers, payload
+            encoding, aiocoap) and of every driver call on the driver threads (e.g. SHT1x bit-banging);
+            statistics are written in pstats format
+        sampling: a background thread samples the stacks of all threads at a fixed interval; stacks are
+            written in the collapsed format of flame graph tools ("frame;frame;frame count" lines)
+    When profiling is off, the only cost left is one attribute lookup per driver call.
+
+    Example Usage:
+
+    ``>>> profiler = Profiler('profiles')``
+    ``>>> profiler.start(loop, 'sampling', duration=30)``
+    ``>>> profiler.status()['summary']``
+
+    Python3.4 is required
+"""
+
+import collections
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sampling')
+# Default and longest profiling window in seconds
+DEFAULT_DURATION = 30
+MAX_DURATION = 600
+# Default seconds between two stack samples
+SAMPLING_INTERVAL = 0.005
+# Default directory of the profile files
+DEFAULT_PATH = 'profiles'
+# Number of functions listed in a summary
+SUMMARY_SIZE = 20
+
+
+def frame_label(code):
+    """
+    Get the label of a function in stacks and summaries
+
+    :param code: code object of the function
+    :return: (str) function name, file name and first line, e.g. 'wrap (resources_def.py:40)'
+    """
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+class DeterministicProfile(object):
+    """
+    cProfile of the event loop thread, together with the driver calls made on other threads
+    """
+
+    suffix = '.pstats'
+
+    def __init__(self):
+        """
+        Constructor of a profile, started with start()
+        """
+        self._loop_profile = cProfile.Profile()
+        # Statistics of finished driver calls, merged under the lock as driver threads run concurrently
+        self._driver_stats = pstats.Stats()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start profiling the calling thread, which must be the event loop thread
+        """
+        self._loop_profile.enable()
+
+    def stop(self):
+        """
+        Stop profiling; must be called on the event loop thread
+        """
+        self._loop_profile.disable()
+
+    def runcall(self, method, *args):
+        """
+        Run a driver call under its own profile, merged into the statistics when it returns
+
+        :param method: driver method
+        :param args: arguments passed to the method
+        :return: return value of the method
+        """
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(method, *args)
+        finally:
+            with self._lock:
+                self._driver_stats.add(profile)
+
+    def stats(self):
+        """
+        Get statistics of the event loop thread and of all driver calls
+
+        :return: (pstats.Stats) merged statistics
+        """
+        stats = pstats.Stats(self._loop_profile)
+        with self._lock:
+            stats.add(self._driver_stats)
+        return stats
+
+    def write(self, file_path):
+        """
+        Write statistics in pstats format
+
+        :param str file_path: output file
+        """
+        self.stats().dump_stats(file_path)
+
+    def summary(self, limit=SUMMARY_SIZE):
+        """
+        Get the functions taking most time of their own
+
+        :param int limit: number of functions listed
+        :return: (dict) 'functions': list of {'function', 'calls', 'own', 'cumulative'} with times in seconds
+        """
+        stats = self.stats().stats
+        functions = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return {'total': sum(entry[2] for entry in stats.values()),
+                # Built-in functions have no file ('~')
+                'functions': [{'function': name if file_name == '~' else
+                               '{} ({}:{})'.format(name, os.path.basename(file_name), line),
+                               'calls': entry[1], 'own': entry[2], 'cumulative': entry[3]}
+                              for (file_name, line, name), entry in functions]}
+
+
+class SamplingProfile(object):
+    """
+    Stacks of all threads sampled by a background thread
+    """
+
+    suffix = '.collapsed'
+
+    def __init__(self, interval=SAMPLING_INTERVAL):
+        """
+        Constructor of a profile, started with start()
+
+        :param float interval: seconds between two samples
+        """
+        self.interval = interval
+        # (thread name, frame labels from the outermost frame) -> number of samples
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the sampling thread
+        """
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the sampling thread
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)),) + tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, file_path):
+        """
+        Write stacks in collapsed format, thread name first
+
+        :param str file_path: output file
+        """
+        with open(file_path, 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write('{} {}\n'.format(';'.join(stack), count))
+
+    def summary(self, limit=SUMMARY_SIZE):
+        """
+        Get the functions found most often on top of a stack
+
+        :param int limit: number of functions listed
+        :return: (dict) 'functions': list of {'function', 'own', 'cumulative'} as fractions of the samples of
+            all threads
+        """
+        own = collections.Counter()
+        cumulative = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            # Recursive functions count once per stack
+            for label in set(stack[1:]):
+                cumulative[label] += count
+        total = sum(self.stacks.values()) or 1
+        return {'samples': self.samples,
+                'functions': [{'function': label, 'own': count / total, 'cumulative': cumulative[label] / total}
+                              for label, count in own.most_common(limit)]}
+
+
+class Profiler(object):
+    """
+    Owner of the current profile: starts it, stops it when its window ends and keeps the summary of the
+        last one
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Constructor of an idle profiler
+
+        :param str path: directory of the profile files, created when the first profile is written
+        """
+        self.path = path
+        self.profile = None
+        self.mode = None
+        self.ends = None
+        # Output file and summary of the last profile
+        self.last_file = None
+        self.last_summary = None
+        self._timer = None
+        # Functions called with the running DeterministicProfile when profiling starts, and None when it stops,
+        #   to hook driver calls (e.g. setting AsyncDriver.profile)
+        self.listeners = []
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self, loop, mode, duration=DEFAULT_DURATION, interval=SAMPLING_INTERVAL):
+        """
+        Start profiling on the event loop thread for a bounded window
+
+        :param loop: event loop of the server
+        :param str mode: one of MODES
+        :param float duration: length of the window in seconds, at most MAX_DURATION
+        :param float interval: seconds between two stack samples in sampling mode
+        :raises ValueError: unknown mode, invalid duration or profiling already running
+        """
+        if mode not in MODES:
+            raise ValueError("unknown profiling mode {}".format(mode))
+        if not 0 < duration <= MAX_DURATION:
+            raise ValueError("duration must be within 0~{} seconds".format(MAX_DURATION))
+        if self.active:
+            raise ValueError("{} profiling already running".format(self.mode))
+
+        self.profile = DeterministicProfile() if mode == 'cprofile' else SamplingProfile(interval)
+        self.mode = mode
+        self.ends = time.time() + duration
+        self.profile.start()
+        if mode == 'cprofile':
+            for listener in self.listeners:
+                listener(self.profile)
+        self._timer = loop.call_later(duration, self.stop)
+        logger.info("Started {} profiling for {} s".format(mode, duration))
+
+    def stop(self):
+        """
+        Stop profiling, on the event loop thread, and write the profile to the profile directory
+
+        :return: (str) path of the profile file, None if profiling was not running
+        """
+        if not self.active:
+            return None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.mode == 'cprofile':
+            for listener in self.listeners:
+                listener(None)
+        self.profile.stop()
+
+        os.makedirs(self.path, exist_ok=True)
+        now = time.time()
+        stamp = '{}-{:03d}'.format(time.strftime('%Y%m%d-%H%M%S', time.localtime(now)), int(now % 1 * 1000))
+        file_path = os.path.join(self.path, 'profile-{}-{}{}'.format(stamp, self.mode, self.profile.suffix))
+        try:
+            self.profile.write(file_path)
+        except OSError as e:
+            logger.error("Failed to write profile {}: {}".format(file_path, e))
+            file_path = None
+        self.last_file = file_path
+        self.last_summary = dict(self.profile.summary(), mode=self.mode)
+        self.profile = self.mode = self.ends = None
+        logger.info("Profile written to {}".format(file_path))
+        return file_path
+
+    def status(self):
+        """
+        Get state of the profiler
+
+        :return: (dict) active, mode and seconds remaining of the current profile; file and summary of the
+            last one
+        """
+        return {'active': self.active,
+                'mode': self.mode,
+                'remaining': max(self.ends - time.time(), 0) if self.active else None,
+                'file': self.last_file,
+                'summary': self.last_summary}
@@ -0,0 +1,126 @@
+"""
+    Created on October 18, 2026
+
+    This is the STA/LTA earthquake detector used by the alert resource
+
+    The characteristic function is the energy of the 3-axis acceleration around its moving mean over the
+    LTA window (removing gravity and sensor offsets), summed over the axes. Its short-term average (STA) is
+    compared with its long-term average (LTA); an event is declared when STA/LTA rises above the trigger
+    ratio and ends when it falls below the detrigger ratio. Samples are processed in blocks with NumPy: the
+    moving averages of a whole block are obtained from cumulative sums over the block and the LTA window
+    preceding it, so there is no per-sample Python work.
+
+    Example Usage:
+
+    ``>>> detector = StaLtaDetector(rate=100)``
+    ``>>> onset = detector.process(timestamps, counts)``
+
+    Python3.4 is required
+"""
+
+import numpy as np
+
+# Default detector settings
+STA_WINDOW = 0.5
+LTA_WINDOW = 10.0
+TRIGGER_RATIO = 4.0
+DETRIGGER_RATIO = 1.5
+
+
+class StaLtaDetector(object):
+    """
+    Block-wise STA/LTA trigger over multi-axis acceleration samples
+    """
+
+    def __init__(self, rate, sta=STA_WINDOW, lta=LTA_WINDOW, on=TRIGGER_RATIO, off=DETRIGGER_RATIO, axes=3):
+        """
+        Constructor of a detector
+
+        :param float rate: sampling rate of the input in Hz
+        :param float sta: short-term window in seconds
+        :param float lta: long-term window in seconds, longer than sta
+        :param float on: STA/LTA ratio declaring an event
+        :param float off: STA/LTA ratio ending an event
+        :param int axes: number of axes per sample
+        """
+        self.rate = rate
+        self.n_sta = max(int(round(sta * rate)), 1)
+        self.n_lta = max(int(round(lta * rate)), self.n_sta + 1)
+        self.on = on
+        self.off = off
+        self.axes = axes
+        self.reset()
+
+    def reset(self):
+        """
+        Forget past samples; the next LTA window of samples is used for warming up
+        """
+        # Samples and characteristic function of the last n_lta samples
+        self._samples = np.zeros((0, self.axes))
+        self._tail = np.zeros(0)
+        self.triggered = False
+        # Time of the last onset and the STA/LTA ratio at the end of the last block
+        self.onset = None
+        self.ratio = 0.0
+
+    def process(self, timestamps, counts):
+        """
+        Run the detector over a block of samples
+
+        :param timestamps: time of each sample (seconds since epoch)
+        :type timestamps: sequence or buffer of float, e.g. memoryview from RingBuffer
+        :param counts: samples, sample-major with one value per axis
+        :type counts: sequence or buffer of numbers, e.g. memoryview from RingBuffer
+        :return: (float) time of the first onset in the block, None if no event started in the block
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        samples = np.asarray(counts, dtype=np.float64).reshape(-1, self.axes)
+        if not len(samples):
+            return None
+
+        # Moving means at every sample of the block are taken from one cumulative sum over tail + block
+        history = np.concatenate((self._samples, samples))
+        csum = np.concatenate((np.zeros((1, self.axes)), np.cumsum(history, axis=0)))
+        end = np.arange(len(self._samples) + 1, len(history) + 1)
+        start = np.maximum(end - self.n_lta, 0)
+        baseline = (csum[end] - csum[start]) / (end - start)[:, np.newaxis]
+        self._samples = history[-self.n_lta:]
+
+        # Characteristic function: energy around the moving mean, summed over the axes
+        deviation = samples - baseline
+        cf = np.einsum('ij,ij->i', deviation, deviation)
+
+        history = np.concatenate((self._tail, cf))
+        csum = np.concatenate(([0.0], np.cumsum(history)))
+        end = np.arange(len(self._tail) + 1, len(history) + 1)
+        sta = (csum[end] - csum[np.maximum(end - self.n_sta, 0)]) / self.n_sta
+        lta = (csum[end] - csum[np.maximum(end - self.n_lta, 0)]) / self.n_lta
+        self._tail = history[-self.n_lta:]
+
+        # No decision until the LTA window is full
+        valid = (end >= self.n_lta) & (lta > 0)
+        ratio = np.zeros(len(cf))
+        np.divide(sta, lta, out=ratio, where=valid)
+        self.ratio = float(ratio[-1])
+
+        onset = None
+        position = 0
+        while position < len(ratio):
+            if self.triggered:
+                below = np.flatnonzero(ratio[position:] < self.off)
+                if not len(below):
+                    break
+                self.triggered = False
+                position += below[0] + 1
+            else:
+                above = np.flatnonzero(ratio[position:] > self.on)
+                if not len(above):
+                    break
+                position += above[0]
+                self.triggered = True
+                self.onset = float(timestamps[position])
+                if onset is None:
+                    onset = self.onset
+                position += 1
+
+        return onset
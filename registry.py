@@ -0,0 +1,124 @@
+"""
+    Created on October 18, 2026
+
+    This is the registry of resource types the server can create, by configuration file or POST
+
+    Resource types are registered under a sensor type name, either as a class or as a 'module:attribute'
+    string imported on first use. Third-party resource types are discovered as setuptools entry points of
+    the ENTRY_POINT_GROUP group, e.g. in the setup.py of a plugin package:
+
+    ``entry_points={'poemodule.resources': ['barometer = poe_barometer:Barometer']}``
+
+    Entry points are only scanned the first time a type is not found among the registered ones, so a
+    configuration using built-in types only does not pay for importing pkg_resources.
+
+    Python3.4 is required
+"""
+
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# setuptools entry point group of resource plugins
+ENTRY_POINT_GROUP = 'poemodule.resources'
+
+
+class ResourceRegistry(object):
+    """
+    Resource classes keyed by sensor type
+    """
+
+    def __init__(self, default=None):
+        """
+        Constructor of an empty registry
+
+        :param str default: type used for sensors whose type is not registered, None to reject them
+        """
+        self.default = default
+        # type name -> class, or 'module:attribute' string until first use
+        self._types = {}
+        self._plugins_loaded = False
+
+    def __contains__(self, name):
+        if name not in self._types and not self._plugins_loaded:
+            self.load_entry_points()
+        return name in self._types
+
+    def names(self):
+        """
+        Get registered type names
+
+        :return: (list of str) sorted type names
+        """
+        return sorted(self._types)
+
+    def register(self, name, factory):
+        """
+        Register a resource type, replacing any type of the same name
+
+        :param str name: sensor type name
+        :param factory: resource class, or 'module:attribute' string imported on first use; a class with a
+            from_config class method is created from the sensor configuration, otherwise without arguments
+        :type factory: class or str
+        """
+        self._types[name] = factory
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """
+        Register the resource types published by installed plugins; plugins are imported on first use
+
+        :param str group: setuptools entry point group
+        :return: (int) number of types registered
+        """
+        self._plugins_loaded = True
+        try:
+            import pkg_resources
+        except ImportError:
+            logger.warning("setuptools (pkg_resources) not available, resource plugins are not loaded")
+            return 0
+
+        count = 0
+        for entry_point in pkg_resources.iter_entry_points(group):
+            # Built-in types take precedence over plugins
+            if entry_point.name not in self._types:
+                self.register(entry_point.name, '{}:{}'.format(entry_point.module_name,
+                                                               '.'.join(entry_point.attrs)))
+                count += 1
+        return count
+
+    def get(self, name):
+        """
+        Get the class of a resource type, importing it on first use
+
+        :param str name: sensor type name
+        :return: resource class
+        :raises KeyError: type not registered and no default type
+        """
+        if name not in self:
+            if self.default is None:
+                raise KeyError("Unknown resource type {}".format(name))
+            name = self.default
+
+        factory = self._types[name]
+        if isinstance(factory, str):
+            module_name, _, attributes = factory.partition(':')
+            factory = importlib.import_module(module_name)
+            for attribute in attributes.split('.'):
+                factory = getattr(factory, attribute)
+            self._types[name] = factory
+        return factory
+
+    def create(self, sensor):
+        """
+        Create a resource from its sensor configuration
+
+        :param dict sensor: sensor entry of config.json or POST payload; 'type' selects the resource type and
+            defaults to 'name'
+        :return: new resource instance
+        :raises KeyError: type not registered and no default type
+        """
+        factory = self.get(sensor.get('type', sensor['name']))
+        if hasattr(factory, 'from_config'):
+            return factory.from_config(sensor)
+        return factory()
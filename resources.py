@@ -16,27 +16,194 @@
 import time
 import json
 import asyncio
+import logging
 
 import aiocoap.resource as resource
+import aiocoap.optiontypes as optiontypes
+import aiocoap.error as error
 import aiocoap
 
 from resources_def import PayloadTable
 from resources_def import UTF8 as UTF8
 from resources_def import PayloadWrapper
+from resources_def import PackedPayloadWrapper
+from resources_def import DeltaPayloadWrapper
 import resources_def as r_defs
+from scheduler import SamplingScheduler
+from store import series_directory
+from cache import SampleCache
+from history import SampleHistory
+from aggregate import WindowAggregator, parse_duration, parse_statistics
+from notify_policy import NotificationPolicy, NotificationState, POLICY_COMMANDS
+from link_format import LinkIndex
+from registry import ResourceRegistry
+import metrics
+import profiler
+
+# Sensor drivers (and mocks on x86_64) are loaded when a resource first uses them; hardware modules
+#   and NumPy are imported inside the resources needing them, so unused sensors cost nothing at start-up
+from sensors import drivers
+from sensors.drivers import SharedDriver
+from sensors.async_driver import bus_lock
+from sensors.async_driver import SPI_BUS
+from sensors.adc_stream import AdcStream
+
+logger = logging.getLogger(__name__)
+
+
+def parse_query(request):
+    """
+    Parse URI query options of a request
+
+    :param request: Message struct containing incoming request
+    :type request: aiocoap.message.Message
+    :return: (dict) query argument name -> value ('' for arguments given without value)
+    """
+    query = {}
+    for argument in request.opt.uri_query:
+        name, _, value = argument.partition('=')
+        query[name] = value
+    return query
+
+
+class SensorSite(resource.Site):
+    """
+    Site holding all resources of the server, whose resources can be added and removed while the server
+        is running
+
+    Resources are added to and removed from the live site in place, so the server context and its socket
+        stay the same. Removed resources are shut down, so that their sampling jobs and streams stop and their
+        observers are told that the resource is gone.
+    The link-format directory of the site is built on demand and kept until a resource is added or removed.
+    """
+
+    def __init__(self):
+        """
+        Constructor creating an empty site
+        """
+        super(SensorSite, self).__init__()
+        # Paths of resources that cannot be removed with DELETE
+        self.fixed = set()
+        self._link_index = None
+
+    def link_index(self):
+        """
+        Get the link-format directory of all listed resources
+
+        Resources with a false 'visible' attribute are not listed
+
+        :return: (link_format.LinkIndex) directory, rebuilt only after resources were added or removed
+        """
+        if self._link_index is None:
+            links = []
+            for path, child in self._resources.items():
+                if not getattr(child, 'visible', True):
+                    continue
+                attributes = child.get_link_description() if hasattr(child, 'get_link_description') else {}
+                links.append(('/' + '/'.join(path), attributes))
+            self._link_index = LinkIndex(links)
+        return self._link_index
+
+    def items(self, prefixes=None):
+        """
+        Get resources of the site, optionally only those at or below given paths
+
+        :param prefixes: paths selecting resources, e.g. [('hygrothermo',)]; None selects all resources
+        :type prefixes: list of tuple of str
+        :return: (list of (tuple of str, resource)) path and resource, sorted by path
+        """
+        return [(path, child) for path, child in sorted(self._resources.items())
+                if prefixes is None or any(path[:len(prefix)] == prefix for prefix in prefixes)]
+
+    def add_resource(self, path, resource, removable=True):
+        """
+        Add a resource, replacing (and shutting down) any resource at the same path
+
+        :param path: path of the resource
+        :type path: tuple of str
+        :param resource: resource to add
+        :param bool removable: resource can be removed with DELETE
+        """
+        path = tuple(path)
+        if path in self._resources:
+            self.remove_resource(path)
+        super(SensorSite, self).add_resource(path, resource)
+        if hasattr(resource, 'store_series'):
+            try:
+                resource.store_series = '/'.join(path)
+                series_directory(resource.store_series)
+            except ValueError:
+                logger.warning("Readings of /{} are not stored, its path cannot name a series".format('/'.join(path)))
+                resource.store_series = None
+        if not removable:
+            self.fixed.add(path)
+        self._link_index = None
+
+    def remove_resource(self, path):
+        """
+        Remove a resource and shut it down
+
+        :param path: path of the resource
+        :type path: tuple of str
+        :raises KeyError: no resource at path
+        """
+        path = tuple(path)
+        removed = self._resources.pop(path)
+        self.fixed.discard(path)
+        self._link_index = None
+        if hasattr(removed, 'shutdown'):
+            removed.shutdown()
+
+    @asyncio.coroutine
+    def render(self, request):
+        """
+        Dispatch request, counting it by path and response code and timing it in the metrics
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        path = request.opt.uri_path
+        # Paths of unknown resources are not kept apart, so that scans cannot grow the metrics
+        label = '/' + '/'.join(path) if path in self._resources else 'unknown'
+        code = aiocoap.INTERNAL_SERVER_ERROR
+        start = time.perf_counter()
+        try:
+            response = yield from self.dispatch(request)
+            code = response.code
+            return response
+        except error.RenderableError as e:
+            code = e.code
+            raise
+        finally:
+            metrics.registry.increment('requests_total', (('path', label), ('code', code.dotted)))
+            metrics.registry.observe('render_seconds', (('path', label),), time.perf_counter() - start)
 
-# Mock Classes import since Raspberry Pi is running 32 bit operating system
-import platform
-if platform.machine() == 'x86_64':
-    from sensors.mcp3008 import MCP3008Mock as MCP3008
-    from sensors.temp_sensor import WaitingSht15Mock as WaitingSht15
-    from sensors.se10 import Se10Mock as Se10
-else:
-    from sensors.mcp3008 import MCP3008
-    from sensors.temp_sensor import WaitingSht15
-    from sensors.se10 import Se10
+    @asyncio.coroutine
+    def dispatch(self, request):
+        """
+        Dispatch request to the resource at its path; DELETE removes the resource itself
 
-# TODO: Add logging
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        if request.code != aiocoap.DELETE:
+            return (yield from super(SensorSite, self).render(request))
+
+        path = request.opt.uri_path
+        if path not in self._resources:
+            response = aiocoap.Message(code=aiocoap.NOT_FOUND, payload=b'')
+        elif path in self.fixed:
+            response = aiocoap.Message(code=aiocoap.METHOD_NOT_ALLOWED, payload=b'')
+        else:
+            self.remove_resource(path)
+            payload = "Successful remove /{}/".format('/'.join(path)).encode(UTF8)
+            response = aiocoap.Message(code=aiocoap.DELETED, payload=payload)
+        response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+        return response
 
 
 class RootResource(resource.Resource):
@@ -100,43 +267,24 @@ class RootResource(resource.Resource):
             err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
             return err_response
 
-        # Try to locate the resource class using its name(resource_name)
-        if resource_name in IMPLEMENTED_RESOURCES:
-            self.root.add_resource(tuple(path.split('/')), IMPLEMENTED_RESOURCES[resource_name]())
-        # Use template resource if resource name is not known
-        else:
-            try:
-                active = jpayload['active']
-                period = jpayload['frequency']
-                channel = jpayload['channel']
-            except Exception as e:
-                # Invalid JSON contents
-                err_msg = ("Invalid JSON contents: " + str(e)).encode(UTF8)
-                err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
-                err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
-                return err_response
-
-            try:
-                min = jpayload['min']
-                max = jpayload['max']
-            # In case of min/max is not given
-            except KeyError:
-                self.root.add_resource(tuple(path.split('/')),
-                                       ResourceTemplate(name=resource_name,
-                                                        active=active,
-                                                        period=period,
-                                                        channel=channel))
-            else:
-                self.root.add_resource(tuple(path.split('/')),
-                                       ResourceTemplate(name=resource_name,
-                                                        active=active,
-                                                        period=period,
-                                                        min=min,
-                                                        max=max,
-                                                        channel=channel))
+        # Resources that cannot be removed with DELETE cannot be replaced either
+        if tuple(path.split('/')) in self.root.fixed:
+            err_msg = "Resource at /{}/ cannot be replaced".format(path).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.METHOD_NOT_ALLOWED, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
 
-        # Refresh server
-        asyncio.async(aiocoap.Context.create_server_context(self.root))
+        # Resource type is given by 'type', or by the resource name for pre-defined sensors; unknown
+        #   resources use template resource
+        try:
+            new_resource = create_resource(jpayload)
+        except (KeyError, ValueError, TypeError) as e:
+            # Missing or invalid settings of the resource type
+            err_msg = ("Invalid JSON contents: " + str(e)).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+        self.root.add_resource(tuple(path.split('/')), new_resource)
 
         payload = "Successful add {} at /{}/".format(resource_name, path).encode(UTF8)
         response = aiocoap.Message(code=aiocoap.CREATED, payload=payload)
@@ -144,19 +292,25 @@ class RootResource(resource.Resource):
         return response
 
 
-# FIXME: This resource is broken, this resource should provide a list of registered resources on server
 class CoreResource(resource.Resource):
     """
-    Example Resource that provides list of links hosted by a server.
+    Resource that provides list of links hosted by a server in CoRE link-format (RFC 6690).
     Normally it should be hosted at /.well-known/core
 
-    Notice that self.visible is not set - that means that resource won't
+    The list is served from the link index of the site, filtered by the URI query (e.g. ?rt=temperature,
+        ?if=sensor, ?href=/hygro*). Lists larger than one datagram are sent by aiocoap with Block2.
+
+    Notice that self.visible is set to False - that means that resource won't
     be listed in the link format it hosts.
     """
 
+    visible = False
+
     def __init__(self, root):
         """
         Constructor initializing resource instance
+
+        :param SensorSite root: site whose resources are listed
         """
         resource.Resource.__init__(self)
         self.root = root
@@ -171,9 +325,7 @@ class CoreResource(resource.Resource):
 
         :return: Message struct containing outgoing response
         """
-        data = []
-        self.root.generate_resource_list(data, "")
-        payload = ",".join(data).encode(UTF8)
+        payload = self.root.link_index().render(parse_query(request)).encode(UTF8)
 
         response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
         response.opt.content_format = r_defs.LINK_FORMAT_CODE
@@ -181,6 +333,136 @@ class CoreResource(resource.Resource):
         return response
 
 
+class MetricsResource(resource.Resource):
+    """
+    Resource serving the metrics of the server, normally hosted at /.well-known/metrics
+
+    Metrics are served as JSON, or in the Prometheus text format to clients accepting text/plain or asking
+        for ?format=prometheus. Observer counts of the resources of the site are collected on every GET.
+
+    Notice that self.visible is set to False, like /.well-known/core
+    """
+
+    visible = False
+
+    def __init__(self, root, registry=metrics.registry):
+        """
+        Constructor initializing resource instance
+
+        :param SensorSite root: site whose observers are counted
+        :param metrics.MetricsRegistry registry: metrics served
+        """
+        resource.Resource.__init__(self)
+        self.root = root
+        self.registry = registry
+        registry.collectors.append(self.observer_counts)
+
+    def observer_counts(self):
+        """
+        Collector of the number of observers of every observable resource
+
+        :return: (list of (str, tuple, int)) observers gauge of every path
+        """
+        return [('observers', (('path', '/' + '/'.join(path)),), len(child._observations))
+                for path, child in self.root.items() if isinstance(child, resource.ObservableResource)]
+
+    @asyncio.coroutine
+    def render_GET(self, request):
+        """
+        Implementation of GET request, returning all metrics
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        if (request.opt.accept == r_defs.TEXT_PLAIN_CODE or
+                parse_query(request).get('format') == 'prometheus'):
+            payload = self.registry.render_prometheus()
+            content_format = r_defs.TEXT_PLAIN_CODE
+        else:
+            payload = self.registry.render_json()
+            content_format = r_defs.JSON_FORMAT_CODE
+
+        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload.encode(UTF8))
+        response.opt.content_format = content_format
+
+        return response
+
+
+class ProfileResource(resource.Resource):
+    """
+    Resource switching the profiler of the server, normally hosted at /.well-known/profile
+
+    PUT 'cprofile [sec]' or 'sampling [sec]' profiles the server for a bounded window, after which the profile
+        is written to disk; PUT 'off' ends the window early. GET returns the state of the profiler with the
+        summary of the last profile as JSON.
+
+    Notice that self.visible is set to False, like /.well-known/core
+    """
+
+    visible = False
+
+    def __init__(self, profiler):
+        """
+        Constructor initializing resource instance
+
+        :param profiler.Profiler profiler: profiler of the server
+        """
+        resource.Resource.__init__(self)
+        self.profiler = profiler
+
+    @asyncio.coroutine
+    def render_GET(self, request):
+        """
+        Implementation of GET request, returning state of the profiler and summary of the last profile
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        payload = json.dumps(self.profiler.status()).encode(UTF8)
+
+        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
+        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+
+        return response
+
+    @asyncio.coroutine
+    def render_PUT(self, request):
+        """
+        Implementation of PUT request, starting or stopping profiling
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        args = request.payload.decode(UTF8).split()
+
+        if args == ['off']:
+            file_path = self.profiler.stop()
+            payload = "Profile written to {}".format(file_path) if file_path else "Profiling is not running"
+        else:
+            try:
+                if not 1 <= len(args) <= 2:
+                    raise ValueError("expected 'cprofile [sec]', 'sampling [sec]' or 'off'")
+                duration = float(args[1]) if len(args) == 2 else profiler.DEFAULT_DURATION
+                self.profiler.start(asyncio.get_event_loop(), args[0], duration)
+            except ValueError as e:
+                err_msg = ("Invalid profiling request: " + str(e)).encode(UTF8)
+                err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+                err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+                return err_response
+            payload = "Started {} profiling for {} s".format(args[0], duration)
+
+        response = aiocoap.Message(code=aiocoap.CHANGED, payload=payload.encode(UTF8))
+        response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+
+        return response
+
+
 class HelloWorld(resource.Resource):
     """
     HelloWorld resource that contains a pre-defined string message
@@ -205,14 +487,22 @@ class HelloWorld(resource.Resource):
 
         :return: Message struct containing outgoing response
         """
-        payload = PayloadWrapper.wrap(json.dumps({'hello': self.content}),
-                                      self.payload)
+        payload = PayloadWrapper.serialize({'hello': self.content}, self.payload)
 
         response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
         response.opt.content_format = r_defs.JSON_FORMAT_CODE
 
         return response
 
+    @asyncio.coroutine
+    def read_data(self):
+        """
+        Get data of the resource, as collected by the snapshot resource
+
+        :return: (float, dict) time of the data (seconds since epoch) and resource data
+        """
+        return time.time(), {'hello': self.content}
+
     @asyncio.coroutine
     def render_PUT(self, request):
         """
@@ -234,7 +524,608 @@ class HelloWorld(resource.Resource):
         return response
 
 
-class LocalTime(resource.ObservableResource):
+class SampledResource(resource.ObservableResource):
+    """
+    Parent of all observable resources that are sampled periodically
+
+    Resources reading hardware implement the acquire() coroutine and to_data(); their readings are
+        then kept in a sample cache, refreshed on every sampling tick and served to GETs and observers
+        while fresh, and recorded in a bounded history that can be queried with GET ?since=&limit=
+    Readings are also folded into windowed aggregates, queried with GET ?agg=mean,min,max,p95&window=60s&step=10s
+    If the server keeps a time-series store, readings are also stored on the device and can be read back
+        with GET ?from=&to=&limit=
+    Which samples are notified to observers is decided by the resource's notification policy, against what
+        each observer was last notified of
+    Observers may ask for their own notification period with ?period= in the observe request; the resource
+        is then sampled at the fastest period in use and each observer is only notified at its own period
+    """
+
+    # All periodic acquisitions share one scheduler, so that resources due in the
+    #   same tick are sampled in a single wakeup
+    scheduler = SamplingScheduler()
+
+    # Coroutine function returning a new reading, None for resources without hardware
+    acquire = None
+
+    # Shortest notification period an observer may ask for, in seconds; sensors that cannot be sampled that
+    #   fast raise it to their own limit
+    min_observer_period = 0.1
+
+    # Time-series store shared by all resources, set by the server if readings are stored on the device
+    store = None
+    # Series of the resource in the store: its path, unique unlike its name; set when added to the site
+    store_series = None
+    # Maximum number of stored readings returned by one GET ?from=&to=
+    store_query_limit = 1000
+
+    def __init__(self):
+        """
+        Constructor initializing resource instance
+        """
+        super(SampledResource, self).__init__()
+
+        self.observe_period = 1
+        self.sampling_job = None
+
+        # Maximum age of a cached reading; None follows observation period
+        self.cache_max_age = None
+        self.cache = SampleCache(self.acquire) if self.acquire is not None else None
+        self.history = None
+        self.aggregates = None
+        # Observers are notified of every sample unless configured otherwise
+        self.policy = NotificationPolicy()
+        # Observation -> notification period asked for by the observer (None: observation period), and
+        #   notification state (what it was last notified of, and when)
+        self.observer_periods = {}
+        self._observer_states = {}
+        # Timer of the next trailing notification of a change held back by the minimum interval
+        self._trailing = None
+        if self.cache is not None:
+            self.history = SampleHistory()
+            self.aggregates = WindowAggregator()
+            self.cache.listeners.append(self.record_sample)
+
+    @property
+    def max_age(self):
+        """
+        Maximum age in seconds of a cached reading served to clients
+        """
+        if self.cache_max_age is None:
+            return self.observe_period
+        return self.cache_max_age
+
+    def start_sampling(self):
+        """
+        Register resource with the sampling scheduler at its observation period
+        """
+        if self.sampling_job is None:
+            self.sampling_job = self.scheduler.add(self.notify, self.sampling_period())
+
+    def stop_sampling(self):
+        """
+        Unregister resource from the sampling scheduler
+        """
+        if self.sampling_job is not None:
+            self.scheduler.remove(self.sampling_job)
+            self.sampling_job = None
+
+    def sampling_period(self):
+        """
+        Get period of the sampling job: the observation period, or the shortest period asked for by an observer
+
+        :return: (float) sampling period in seconds
+        """
+        return min([self.observe_period] + [period for period in self.observer_periods.values()
+                                            if period is not None])
+
+    def update_sampling_period(self):
+        """
+        Move the sampling job to the grid of the current sampling period, if it changed
+        """
+        period = self.sampling_period()
+        if self.sampling_job is not None and self.sampling_job.period != period:
+            self.scheduler.set_period(self.sampling_job, period)
+
+    def set_observe_period(self, period):
+        """
+        Set observation period, used by observers that did not ask for their own period, and move the
+            resource to the matching sampling grid
+
+        :param int period: new observation period in seconds
+        """
+        self.observe_period = period
+        # PUT new value to non-data field requires updating payload wrapper content
+        self.payload.set_sample_rate(self.observe_period)
+        self.update_sampling_period()
+
+    @asyncio.coroutine
+    def add_observation(self, request, serverobservation):
+        """
+        Register an observer, with the notification period given by ?period= in its request if any
+
+        :param request: Message struct containing the observe request
+        :type request: aiocoap.message.Message
+        :param serverobservation: observation of the observer
+        :type serverobservation: aiocoap.protocol.ServerObservation
+        """
+        period = None
+        value = parse_query(request).get('period')
+        if value:
+            try:
+                period = max(float(value), self.min_observer_period)
+            except ValueError:
+                logger.warning("Ignoring invalid observer period {}".format(value))
+
+        self._observations.add(serverobservation)
+        self.observer_periods[serverobservation] = period
+        # Observer got the current state with the response to its request
+        current = self.cache.sample if self.cache is not None else None
+        self._observer_states[serverobservation] = NotificationState(
+            self.to_data(current.value) if current is not None else None, time.monotonic())
+        serverobservation.accept(lambda observation=serverobservation: self.remove_observation(observation))
+        self.update_sampling_period()
+
+    def remove_observation(self, serverobservation):
+        """
+        Forget an observer whose observation ended
+
+        :param serverobservation: observation of the observer
+        :type serverobservation: aiocoap.protocol.ServerObservation
+        """
+        self._observations.discard(serverobservation)
+        self.observer_periods.pop(serverobservation, None)
+        self._observer_states.pop(serverobservation, None)
+        self.update_sampling_period()
+
+    def notify_observers(self, data=None):
+        """
+        Notify observers whose notification period has elapsed since their last notification and whose
+            notification policy lets the latest sample through
+
+        An observer not due yet keeps its last notified data, so a change made meanwhile is still compared
+            against it, and notified, once it comes due
+
+        :param dict data: resource data of the latest sample, None to notify without policy (no reading)
+        """
+        now = time.monotonic()
+        # Ticks of the sampling grid may come slightly early; half a sampling period keeps observers on the grid
+        slack = self.sampling_period() / 2
+        notified = 0
+        trailing = None
+        for observation in list(self._observations):
+            state = self._observer_states.get(observation)
+            if state is None:
+                state = self._observer_states[observation] = NotificationState()
+            period = self.observer_periods.get(observation) or self.observe_period
+            if state.last_time is not None and now - state.last_time < period - slack:
+                due = False
+            elif data is None:
+                state.last_time = now
+                due = True
+            else:
+                due = self.policy.should_notify(data, state, now)
+            if due:
+                observation.trigger()
+                notified += 1
+            elif state.pending:
+                # Pending change is sent once both the minimum interval and the observer's period are over
+                at = state.last_time + max(self.policy.min_interval, period - slack)
+                trailing = at if trailing is None else min(trailing, at)
+        if trailing is not None and self._trailing is None:
+            self._trailing = asyncio.get_event_loop().call_later(max(trailing - now, 0), self.notify_trailing)
+        if notified:
+            metrics.registry.increment('notifications_total', (('resource', self.payload[r_defs.NAME_FIELD]),),
+                                       notified)
+
+    def notify_trailing(self):
+        """
+        Notify observers of changes held back by the minimum interval of the notification policy, once it is
+            over, so that the reading a burst of changes settled on is not held back until the next change
+        """
+        self._trailing = None
+        if self.cache is not None and self.cache.sample is not None:
+            self.notify_observers(self.to_data(self.cache.sample.value))
+
+    def get_link_description(self):
+        """
+        Get attributes of the resource listed in /.well-known/core
+
+        :return: (dict) link-format attribute name -> value
+        """
+        link = super(SampledResource, self).get_link_description()
+        link['rt'] = self.payload[r_defs.NAME_FIELD]
+        if self.cache is not None:
+            link['if'] = 'sensor'
+            link['ct'] = '{} {} {}'.format(r_defs.JSON_FORMAT_CODE, r_defs.PACKED_FORMAT_CODE,
+                                           r_defs.DELTA_FORMAT_CODE)
+        else:
+            link['ct'] = r_defs.JSON_FORMAT_CODE
+        return link
+
+    def shutdown(self):
+        """
+        Release the resource when it is removed from the site: stop sampling, leave the shared cache and
+            end all observations with 4.04
+        """
+        self.stop_sampling()
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+        if self.cache is not None and self.record_sample in self.cache.listeners:
+            self.cache.listeners.remove(self.record_sample)
+
+        gone = aiocoap.Message(code=aiocoap.NOT_FOUND, payload=b'')
+        # Observations remove themselves from the set when they end
+        for observation in list(self._observations):
+            observation.trigger(gone)
+
+    def set_max_age(self, max_age):
+        """
+        Set maximum age of cached readings
+
+        :param int max_age: maximum age in seconds, None to follow observation period
+        """
+        self.cache_max_age = max_age
+
+    def notify(self):
+        """
+        callback function for observation to occur periodically
+        """
+        if self.cache is None:
+            self.notify_observers()
+        else:
+            asyncio.Task(self.sample())
+
+    @asyncio.coroutine
+    def sample(self):
+        """
+        Refresh cached reading, then notify observers, who are served from the cache, if the
+            notification policy lets the new reading through
+        """
+        try:
+            sample = yield from self.cache.refresh()
+        except Exception as e:
+            logger.error("Failed to sample {}: {}".format(self.payload[r_defs.NAME_FIELD], e))
+        else:
+            self.notify_observers(self.to_data(sample.value))
+
+    @asyncio.coroutine
+    def read_sample(self):
+        """
+        Get latest reading, from the cache while it is fresh, otherwise from the hardware
+
+        :return: (cache.Sample) latest reading
+        """
+        return (yield from self.cache.read(self.max_age))
+
+    @asyncio.coroutine
+    def read_data(self):
+        """
+        Get latest data of the resource, as collected by the snapshot resource
+
+        :return: (float, dict) time of the reading (seconds since epoch) and resource data
+        """
+        sample = yield from self.read_sample()
+        return sample.timestamp, self.to_data(sample.value)
+
+    def set_max_age_option(self, response):
+        """
+        Set CoAP Max-Age option of response to the remaining freshness of the cached reading
+
+        :param response: Message struct containing outgoing response
+        :type response: aiocoap.message.Message
+        """
+        response.opt.add_option(optiontypes.UintOption(aiocoap.OptionNumber.MAX_AGE,
+                                                       self.cache.remaining(self.max_age)))
+
+    def to_data(self, value):
+        """
+        Convert a reading returned by acquire() into resource data; by default the reading already is the
+            resource data
+
+        :param value: reading returned by acquire()
+        :return: (dict) resource data, field name -> value
+        """
+        return value
+
+    def record_sample(self, sample):
+        """
+        Record a newly acquired reading in the history and the aggregates
+
+        :param cache.Sample sample: newly acquired reading
+        """
+        data = self.to_data(sample.value)
+        self.history.append(sample.timestamp, data)
+        self.aggregates.append(sample.timestamp, data)
+        if self.store is not None and self.store_series is not None:
+            self.store.append(self.store_series, sample.timestamp, data)
+
+    @asyncio.coroutine
+    def render_GET(self, request):
+        """
+        Implementation of GET request, returning latest reading in payload wrapper, past readings
+            if 'since' or 'limit' is given in the query, stored readings if 'from' or 'to' is given, or
+            statistics of past readings if 'agg' is given
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        content_format = self.negotiate_format(request)
+        if content_format is None:
+            return self.not_acceptable_response()
+
+        query = parse_query(request)
+        if 'agg' in query:
+            return self.render_aggregate(query, content_format)
+        if 'from' in query or 'to' in query:
+            return (yield from self.render_stored(query, content_format))
+        if 'since' in query or 'limit' in query:
+            return self.render_history(query, content_format)
+
+        sample = yield from self.read_sample()
+        if content_format != r_defs.JSON_FORMAT_CODE:
+            response = self.samples_response([(sample.timestamp, self.to_data(sample.value))], content_format)
+        else:
+            # Wrap data with sensor related information and timestamps
+            payload = PayloadWrapper.serialize(self.to_data(sample.value), self.payload,
+                                               sample.timestamp, self.fp_format)
+
+            response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
+            response.opt.content_format = content_format
+        self.set_max_age_option(response)
+
+        return response
+
+    @staticmethod
+    def negotiate_format(request):
+        """
+        Pick content format of the response from the CoAP Accept option of the request
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+        :return: (int) JSON_FORMAT_CODE (default), PACKED_FORMAT_CODE or DELTA_FORMAT_CODE, None if the
+            requested format is not supported
+        """
+        accept = request.opt.accept
+        if accept is None:
+            return r_defs.JSON_FORMAT_CODE
+        if accept in (r_defs.JSON_FORMAT_CODE, r_defs.PACKED_FORMAT_CODE, r_defs.DELTA_FORMAT_CODE):
+            return accept
+        return None
+
+    @staticmethod
+    def not_acceptable_response():
+        """
+        Build 4.06 response for a request asking for an unsupported content format
+
+        :return: Message struct containing outgoing response
+        """
+        err_msg = "Supported content formats: {} (JSON), {} (packed), {} (delta)".format(
+            r_defs.JSON_FORMAT_CODE, r_defs.PACKED_FORMAT_CODE, r_defs.DELTA_FORMAT_CODE).encode(UTF8)
+        err_response = aiocoap.Message(code=aiocoap.NOT_ACCEPTABLE, payload=err_msg)
+        err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+        return err_response
+
+    def render_history(self, query, content_format=r_defs.JSON_FORMAT_CODE):
+        """
+        Return past readings selected by 'since' (timestamp, exclusive) and 'limit' (count) in payload wrapper
+
+        Responses larger than one datagram are sent by aiocoap with Block2
+
+        :param dict query: parsed URI query of the request
+        :param int content_format: JSON_FORMAT_CODE, PACKED_FORMAT_CODE or DELTA_FORMAT_CODE
+        :return: Message struct containing outgoing response
+        """
+        try:
+            since = float(query['since']) if query.get('since') else None
+            limit = int(query['limit']) if query.get('limit') else None
+        except ValueError as e:
+            err_msg = ("Invalid history query: " + str(e)).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+
+        return self.samples_response(self.history.query(since, limit), content_format)
+
+    @asyncio.coroutine
+    def render_stored(self, query, content_format=r_defs.JSON_FORMAT_CODE):
+        """
+        Return readings kept in the time-series store between 'from' (timestamp, exclusive) and 'to'
+            (timestamp), oldest first, at most 'limit' (default: store_query_limit) in payload wrapper
+
+        :param dict query: parsed URI query of the request
+        :param int content_format: JSON_FORMAT_CODE, PACKED_FORMAT_CODE or DELTA_FORMAT_CODE
+        :return: Message struct containing outgoing response
+        """
+        if self.store is None:
+            err_response = aiocoap.Message(code=aiocoap.NOT_FOUND, payload=b"Readings are not stored")
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+
+        try:
+            since = float(query['from']) if query.get('from') else None
+            until = float(query['to']) if query.get('to') else None
+            limit = min(int(query['limit']), self.store_query_limit) if query.get('limit') else self.store_query_limit
+        except ValueError as e:
+            err_msg = ("Invalid store query: " + str(e)).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+
+        # Segment files are read in the thread pool, where the store is also flushed
+        samples = yield from asyncio.get_event_loop().run_in_executor(
+            None, self.store.query, self.store_series or '', since, until, limit)
+        return self.samples_response(samples, content_format)
+
+    def render_aggregate(self, query, content_format=r_defs.JSON_FORMAT_CODE):
+        """
+        Return statistics of past readings in payload wrapper, one record per 'step' over the last 'window'
+
+        'agg' lists the statistics (count, sum, mean, min, max and percentiles such as p95); 'window'
+            (default 60s) and 'step' (default: whole window) are durations such as 60, 60s, 5m or 1h.
+            Each record holds the number of readings 'count' and '<field>.<statistic>' for every numeric
+            field, and is timed at the start of its step.
+
+        :param dict query: parsed URI query of the request
+        :param int content_format: JSON_FORMAT_CODE, PACKED_FORMAT_CODE or DELTA_FORMAT_CODE
+        :return: Message struct containing outgoing response
+        """
+        try:
+            statistics = parse_statistics(query['agg'])
+            # Windows longer than the retention only cover the buckets kept
+            window = min(parse_duration(query.get('window') or '60'), self.aggregates.retention)
+            step = min(parse_duration(query['step']), window) if query.get('step') else None
+        except ValueError as e:
+            err_msg = ("Invalid aggregate query: " + str(e)).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+
+        return self.samples_response(self.aggregates.query(window, step, statistics), content_format)
+
+    def samples_response(self, samples, content_format=r_defs.JSON_FORMAT_CODE):
+        """
+        Build response carrying a list of timed records in payload wrapper
+
+        Responses larger than one datagram are sent by aiocoap with Block2
+
+        :param samples: records as (timestamp in seconds since epoch, resource data) pairs
+        :type samples: list of (float, dict)
+        :param int content_format: JSON_FORMAT_CODE, PACKED_FORMAT_CODE or DELTA_FORMAT_CODE
+        :return: Message struct containing outgoing response
+        """
+        try:
+            if content_format == r_defs.PACKED_FORMAT_CODE:
+                payload = PackedPayloadWrapper.wrap(samples, self.payload)
+            elif content_format == r_defs.DELTA_FORMAT_CODE:
+                # Values are only sent to the precision of the resource's data format
+                payload = DeltaPayloadWrapper.wrap(samples, self.payload, r_defs.fp_decimals(self.fp_format))
+            else:
+                payload = None
+        except ValueError as e:
+            # e.g. an aggregate query asking for more fields than a binary payload holds; JSON has no limit
+            err_response = aiocoap.Message(code=aiocoap.NOT_ACCEPTABLE, payload=str(e).encode(UTF8))
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+        if payload is None:
+            records = ['{{{}, "{}": {!r}}}'.format(PayloadWrapper.render_fields(data, self.fp_format),
+                                                   r_defs.TIME_FIELD, timestamp)
+                       for timestamp, data in samples]
+            payload = PayloadWrapper.serialize('[' + ', '.join(records) + ']', self.payload)
+
+        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
+        response.opt.content_format = content_format
+
+        return response
+
+
+class SnapshotResource(SampledResource):
+    """
+    Snapshot resource returning the latest data of many resources in one payload, under one timestamp
+
+    Resources are selected with ?paths= (comma-separated paths, each selecting the resources at or below
+        it, e.g. ?paths=hygrothermo,acceleration); all resources providing data are listed otherwise.
+        Sensor data comes from the sample caches, so a snapshot only reaches the hardware for readings
+        that are no longer fresh. Each entry carries the age of its data in seconds relative to the shared
+        timestamp. Observers are notified every observation period, each with its own selection.
+    """
+
+    # Snapshots do not list themselves
+    read_data = None
+
+    def __init__(self, root):
+        """
+        Constructor initializing resource instance, creating payload wrapper and set observation
+
+        :param SensorSite root: site whose resources are collected
+        """
+        super(SnapshotResource, self).__init__()
+        self.root = root
+
+        self.observe_period = 5
+        self.payload = PayloadTable('snapshot', True, self.observe_period)
+
+        self.start_sampling()
+
+    @asyncio.coroutine
+    def render_GET(self, request):
+        """
+        Implementation of GET request, returning latest data of the selected resources in payload wrapper
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        if request.opt.accept not in (None, r_defs.JSON_FORMAT_CODE):
+            err_msg = "Supported content formats: {} (JSON)".format(r_defs.JSON_FORMAT_CODE).encode(UTF8)
+            err_response = aiocoap.Message(code=aiocoap.NOT_ACCEPTABLE, payload=err_msg)
+            err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+            return err_response
+
+        query = parse_query(request)
+        prefixes = None
+        if query.get('paths'):
+            prefixes = [tuple(path.strip('/').split('/')) for path in query['paths'].split(',')]
+
+        selected = [(path, child) for path, child in self.root.items(prefixes)
+                    if getattr(child, 'read_data', None) is not None]
+        # Readings that are not fresh are acquired concurrently; buses still serialize their own transfers
+        results = yield from asyncio.gather(*[child.read_data() for _, child in selected], return_exceptions=True)
+
+        now = time.time()
+        entries = []
+        for (path, child), result in zip(selected, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to read /{} for snapshot: {}".format('/'.join(path), result))
+                continue
+            timestamp, data = result
+            entries.append('{}: {{{}, "age": {:.3f}}}'.format(
+                json.dumps('/'.join(path)), PayloadWrapper.render_fields(data, getattr(child, 'fp_format', None)),
+                max(now - timestamp, 0)))
+
+        payload = PayloadWrapper.serialize('{' + ', '.join(entries) + '}', self.payload, now)
+
+        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
+        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+
+        return response
+
+    @asyncio.coroutine
+    def render_PUT(self, request):
+        """
+        Implementation of PUT request, setting observation period
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+        err_msg = ("argument is not correctly formatted. Follow 'period [sec]' to " \
+                   "update period to observe 'snapshot' resource\n\n").encode(UTF8)
+        err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+        err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+
+        args = request.payload.decode(UTF8).split()
+        if len(args) != 2:
+            return err_response
+
+        # Observe with period = 0 is not allowed
+        if (args[0] == 'period') and (args[1].isdigit() and args[1] != '0'):
+            self.set_observe_period(int(args[1]))
+        else:
+            return err_response
+
+        payload = ("PUT %s=%s to resource" % (args[0], self.observe_period)).encode(UTF8)
+        response = aiocoap.Message(code=aiocoap.CHANGED, payload=payload)
+        response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+
+        return response
+
+
+class LocalTime(SampledResource):
     """
     LocalTime resource that corresponds to system time
     """
@@ -248,40 +1139,176 @@ class LocalTime(resource.ObservableResource):
         self.observe_period = 10
         self.payload = PayloadTable('time', True, self.observe_period)
 
-        self.notify()
+        self.start_sampling()
 
-    def notify(self):
+    @asyncio.coroutine
+    def render_GET(self, request):
         """
-        callback function for observation to occur periodically
+        Implementation of GET request, returning system time in payload wrapper
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
+        """
+
+        # TODO: local time should be differentiated from timestamp (datetime.now())
+        #        e.g. local time = time since last boot
+        payload = PayloadWrapper.serialize({'time': time.time()}, self.payload)
+
+        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
+        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+
+        return response
+
+    @asyncio.coroutine
+    def read_data(self):
+        """
+        Get system time, as collected by the snapshot resource
+
+        :return: (float, dict) time of the data (seconds since epoch) and resource data
+        """
+        now = time.time()
+        return now, {'time': now}
+
+    @asyncio.coroutine
+    def render_PUT(self, request):
+        """
+        Implementation of PUT request, setting observation period
+
+        :param request: Message struct containing incoming request
+        :type request: aiocoap.message.Message
+
+        :return: Message struct containing outgoing response
         """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+
+        #print("PUT %s to resource" % request.payload)
+        # FIXME: This should probably be formatted with corresponding error code
+        err_msg = ("argument is not correctly formatted. Follow 'period [sec]' to " \
+                   "update period to observe 'time' resource\n\n").encode(UTF8)
+        err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
+        err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+
+        args = request.payload.decode(UTF8).split()
+        if len(args) != 2:
+            return err_response
+
+        # Observe with period = 0 is not allowed
+        if (args[0] == 'period') and (args[1].isdigit() and args[1] != '0'):
+            # TODO: if period = 0, observation should be disabled
+            self.set_observe_period(int(args[1]))
+        else:
+            return err_response
+
+        payload = ("PUT %s=%s to resource" % (args[0], self.observe_period)).encode(UTF8)
+        response = aiocoap.Message(code=aiocoap.CHANGED, payload=payload)
+        response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+
+        return response
+
+
+class Adc8Channel(SampledResource):
+    """
+    Parent of all resources based on ADC chip
+    """
+
+    # ADC driver must be a class variable, because possibly >1 instances may
+    #   be initialized as child of Adc8Channel class
+    mcp3008 = SharedDriver('mcp3008')
+
+    def __init__(self):
+        """
+        Constructor initializing resource instance
+        """
+        super(Adc8Channel, self).__init__()
+
+        # High-rate acquisition of the resource's channels, None unless streaming
+        self.stream = None
+
+    def start_stream(self, channels, rate):
+        """
+        Start sampling given channels continuously into a ring buffer
+
+        :param channels: ADC channels to sample (0~7 each)
+        :type channels: tuple of int
+        :param int rate: sampling rate in Hz
+        :raises RuntimeError: ADC sampled by a bus worker
+        """
+        self.stop_stream()
+        driver = self.mcp3008.driver
+        if drivers.supervisor is not None:
+            from sensors.bus_worker import SharedSampleReader
+
+            # A reader only has the newest sample of the worker: a stream would repeat it with made-up times
+            if isinstance(driver, SharedSampleReader):
+                raise RuntimeError("ADC streaming is not available while a bus worker samples the ADC")
+        # Stream shares the bus lock with driver calls made on the thread of the bus
+        self.stream = AdcStream(driver, channels, rate, lock=bus_lock(SPI_BUS))
+        self.stream.start()
+
+    def stop_stream(self):
+        """
+        Stop continuous sampling
+        """
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+
+    def shutdown(self):
+        """
+        Release the resource when it is removed from the site, including its stream
+        """
+        self.stop_stream()
+        super(Adc8Channel, self).shutdown()
+
+
+class Acceleration(Adc8Channel):
+    """
+    Acceleration resource that reads accelerometer readings
+    """
+
+    def __init__(self):
+        """
+        Constructor initializing resource instance, creating payload wrapper and set observation
+        """
+        super(Acceleration, self).__init__()
+
+        self.observe_period = 1
+        self.fp_format = r_defs.DEFAULT_FP_FORMAT
+
+        self.payload = PayloadTable('acceleration', True, self.observe_period)
+
+        # start observing resource
+        self.start_sampling()
 
     @asyncio.coroutine
-    def render_GET(self, request):
+    def acquire(self):
         """
-        Implementation of GET request, returning system time in payload wrapper
+        Read 3-axis acceleration from the ADC, or take the newest streamed sample while streaming
 
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
-
-        :return: Message struct containing outgoing response
+        :return: (float, float, float) 3 acceleration readings in units of g
         """
+        if self.stream is not None and self.stream.buffer.written:
+            from sensors.mcp3008 import convert_raw_to_g
 
-        # TODO: local time should be differentiated from timestamp (datetime.now())
-        #        e.g. local time = time since last boot
-        json_time = json.dumps({'time': time.time()})
-        payload = PayloadWrapper.wrap(json_time, self.payload)
+            _, _, counts = self.stream.buffer.latest(1)
+            return tuple(convert_raw_to_g(raw, axis) for axis, raw in enumerate(counts))
+        return (yield from self.mcp3008.acceleration())
 
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+    def to_data(self, value):
+        """
+        Convert acceleration reading into resource data
 
-        return response
+        :param value: (float, float, float) 3 acceleration readings in units of g
+        :return: (dict) acceleration of each axis
+        """
+        x, y, z = value
+        return {'x': x, 'y': y, 'z': z}
 
     @asyncio.coroutine
     def render_PUT(self, request):
         """
-        Implementation of PUT request, setting observation period
+        Implementation of PUT request, setting observation period and data format
 
         :param request: Message struct containing incoming request
         :type request: aiocoap.message.Message
@@ -290,9 +1317,11 @@ class LocalTime(resource.ObservableResource):
         """
 
         #print("PUT %s to resource" % request.payload)
-        # FIXME: This should probably be formatted with corresponding error code
+        # TODO: This should probably be formatted with corresponding error code:
+        #           different error messages for different PUT methods
         err_msg = ("argument is not correctly formatted. Follow 'period [sec]' to " \
-                   "update period to observe 'time' resource\n\n").encode(UTF8)
+                   "update period to observe 'acceleration' resource, or 'stream [Hz]' " \
+                   "to sample it continuously (0 to stop)\n\n").encode(UTF8)
         err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
         err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
 
@@ -302,71 +1331,111 @@ class LocalTime(resource.ObservableResource):
 
         # Observe with period = 0 is not allowed
         if (args[0] == 'period') and (args[1].isdigit() and args[1] != '0'):
-            # TODO: if period = 0, observation should be disabled
-            self.observe_period = int(args[1])
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            self.set_observe_period(int(args[1]))
+        elif args[0] == 'decimal':
+            self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
+        elif (args[0] == 'stream') and args[1].isdigit():
+            if args[1] == '0':
+                self.stop_stream()
+            else:
+                from sensors.mcp3008 import ACC_CHANNELS
+
+                try:
+                    self.start_stream(ACC_CHANNELS, int(args[1]))
+                except RuntimeError as e:
+                    response = aiocoap.Message(code=aiocoap.SERVICE_UNAVAILABLE, payload=str(e).encode(UTF8))
+                    response.opt.content_format = r_defs.TEXT_PLAIN_CODE
+                    return response
         else:
             return err_response
 
-        payload = ("PUT %s=%s to resource" % (args[0], self.observe_period)).encode(UTF8)
+        payload = ("PUT %s=%s to resource" % (args[0], args[1])).encode(UTF8)
         response = aiocoap.Message(code=aiocoap.CHANGED, payload=payload)
         response.opt.content_format = r_defs.TEXT_PLAIN_CODE
 
         return response
 
 
-class Alert(resource.ObservableResource):
+class Alert(Adc8Channel):
     """
-    Alert resource that simulates an earthquake detection algorithm
+    Alert resource raising an earthquake alert from an STA/LTA detector run over the accelerometer stream
+
+    Not enabled by default: its stream thread reads the ADC at stream_rate, competing for the SPI bus lock
+        with the other ADC resources. Enable it with {"name": "alert", "url": "alert", "active": true} in
+        the sensors of config.json
     """
-    # TODO: Should be an real earthquake detection algorithm based on accelerometer reading
-    #       Now it's only based on a counter
+
+    # Sampling rate of the accelerometer stream in Hz
+    stream_rate = 100
+    # Seconds of samples analysed per detector run; an onset is notified at most one block late
+    block_period = 0.25
 
     def __init__(self):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
         """
-        self.count = 0
-
         super(Alert, self).__init__()
 
         self.observe_period = 1
         self.payload = PayloadTable('alert', True, self.observe_period)
 
-        self.notify()
+        from sensors.mcp3008 import ACC_CHANNELS
+        from quake_detector import StaLtaDetector
+
+        self.channels = ACC_CHANNELS
+        self.detector = StaLtaDetector(self.stream_rate, axes=len(self.channels))
+        # Sequence number of the last streamed sample passed to the detector
+        self.sequence = 0
         self.alert_status = False
 
-        ## Not tested
-        # self.sensor = MCP3008()
+        self.start_sampling()
 
-    def notify(self):
+    def start_sampling(self):
         """
-        callback function for checking counter value periodically
+        Start streaming the accelerometer and run the detector every block period
         """
-        # Only update resource if an alert is raised
-        if self.detect_alert():
-            self.alert_status = True
-            self.updated_state()
-        else:
-            asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        if self.sampling_job is None:
+            try:
+                self.start_stream(self.channels, self.stream_rate)
+            except RuntimeError as e:
+                logger.warning("Alert detection is off: {}".format(e))
+                return
+            self.sequence = 0
+            self.detector.reset()
+            self.sampling_job = self.scheduler.add(self.notify, self.sampling_period())
 
-    def detect_alert(self):
+    def sampling_period(self):
         """
-        Alert setoff algorithm
+        Get period of detector runs, independent of observers: alerts are notified as soon as they are raised
+
+        :return: (float) block period in seconds
         """
+        return self.block_period
 
-        ## Not tested
-        #THRESHOLD = 1.5
-        #total_acceleration = sum(self.sensor.acceleration)
-        #if total_acceleration > THRESHOLD:
-            #return True
+    def stop_sampling(self):
+        """
+        Stop detector runs and the accelerometer stream
+        """
+        super(Alert, self).stop_sampling()
+        self.stop_stream()
 
-        if self.count > 10:
-            return True
-        else:
-            self.count += 1
-            return False
+    def notify(self):
+        """
+        callback function running the detector over the samples streamed since its last run
+        """
+        self.sequence, timestamps, counts = self.stream.buffer.since(self.sequence)
+        # Only update resource if an alert is raised; checking stops until alert is turned off
+        if self.detector.process(timestamps, counts) is not None:
+            self.alert_status = True
+            self.stop_sampling()
+            self.updated_state()
 
     @asyncio.coroutine
     def render_GET(self, request):
@@ -378,14 +1447,22 @@ class Alert(resource.ObservableResource):
 
         :return: Message struct containing outgoing response
         """
-        json_status = json.dumps({"alert": self.alert_status})
-        payload = PayloadWrapper.wrap(json_status, self.payload)
+        payload = PayloadWrapper.serialize({"alert": self.alert_status}, self.payload)
 
         response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
         response.opt.content_format = r_defs.JSON_FORMAT_CODE
 
         return response
 
+    @asyncio.coroutine
+    def read_data(self):
+        """
+        Get alert status, as collected by the snapshot resource
+
+        :return: (float, dict) time of the data (seconds since epoch) and resource data
+        """
+        return time.time(), {'alert': self.alert_status}
+
     @asyncio.coroutine
     def render_PUT(self, request):
         """
@@ -398,10 +1475,9 @@ class Alert(resource.ObservableResource):
         :return: Message struct containing outgoing response
         """
         self.alert_status = False
-        self.count = 0
+        self.start_sampling()
 
-        json_status = json.dumps({"alert": self.alert_status})
-        payload = PayloadWrapper.wrap(json_status, self.payload)
+        payload = PayloadWrapper.serialize({"alert": self.alert_status}, self.payload)
 
         response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
         response.opt.content_format = r_defs.JSON_FORMAT_CODE
@@ -409,69 +1485,43 @@ class Alert(resource.ObservableResource):
         return response
 
 
-class Adc8Channel(resource.ObservableResource):
-    """
-    Parent of all resources based on ADC chip
-    """
-
-    # ADC driver must be a class variable, because possibly >1 instances may
-    #   be initialized as child of Adc8Channel class
-    mcp3008 = MCP3008()
-
-    def __init__(self):
-        """
-        Constructor initializing resource instance
-        """
-        super(Adc8Channel, self).__init__()
-
-
-class Acceleration(Adc8Channel):
+class Joystick(Adc8Channel):
     """
-    Acceleration resource that reads accelerometer readings
+    Joystick resource that reads strain gauges position of the joystick
     """
 
     def __init__(self):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
         """
-        super(Acceleration, self).__init__()
+        super(Joystick, self).__init__()
 
         self.observe_period = 1
         self.fp_format = r_defs.DEFAULT_FP_FORMAT
 
-        self.payload = PayloadTable('acceleration', True, self.observe_period)
-
-        # start observing resource
-        self.notify()
+        self.payload = PayloadTable('joystick', True, self.observe_period)
 
-    def notify(self):
-        """
-        callback function for observation to occur periodically
-        """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        # Start observing resource
+        self.start_sampling()
 
     @asyncio.coroutine
-    def render_GET(self, request):
+    def acquire(self):
         """
-        Implementation of GET request, returning acceleration reading in payload wrapper
-
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
+        Read 2-axis joystick position from the ADC
 
-        :return: Message struct containing outgoing response
+        :return: (int, int) relative positions of two axis of the joystick
         """
-        x, y, z = self.mcp3008.acceleration()
-        # Wrap data with sensor related information and timestamps
-        json_acc = json.dumps({'x': format(x, self.fp_format),
-                               'y': format(y, self.fp_format),
-                               'z': format(z, self.fp_format)}, sort_keys=True)
-        payload = PayloadWrapper.wrap(json_acc, self.payload)
+        return (yield from self.mcp3008.joystick())
 
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+    def to_data(self, value):
+        """
+        Convert joystick reading into resource data
 
-        return response
+        :param value: (int, int) relative positions of two axis of the joystick
+        :return: (dict) position of each axis
+        """
+        leftright, updown = value
+        return {'leftright': leftright, 'updown': updown}
 
     @asyncio.coroutine
     def render_PUT(self, request):
@@ -485,10 +1535,10 @@ class Acceleration(Adc8Channel):
         """
 
         #print("PUT %s to resource" % request.payload)
-        # TODO: This should probably be formatted with corresponding error code:
-        #           different error messages for different PUT methods
+        # FIXME: This should probably be formatted with corresponding error code
+        # FIXME: Various error messages for different PUT methods
         err_msg = ("argument is not correctly formatted. Follow 'period [sec]' to " \
-                   "update period to observe 'acceleration' resource\n\n").encode(UTF8)
+                   "update period to observe 'joystick' resource\n\n").encode(UTF8)
         err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
         err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
 
@@ -498,11 +1548,16 @@ class Acceleration(Adc8Channel):
 
         # Observe with period = 0 is not allowed
         if (args[0] == 'period') and (args[1].isdigit() and args[1] != '0'):
-            self.observe_period = int(args[1])
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            self.set_observe_period(int(args[1]))
         elif args[0] == 'decimal':
             self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
         else:
             return err_response
 
@@ -513,53 +1568,71 @@ class Acceleration(Adc8Channel):
         return response
 
 
-class Joystick(Adc8Channel):
+class HygroThermo(SampledResource):
     """
-    Joystick resource that reads strain gauges position of the joystick
+    parent class implements HygroThermo (temperature + humidity) sensor
     """
 
+    # Sensor driver must be a class variable, because HygroThermo class may
+    #   be initialized more than once
+    driver = SharedDriver('sht15')
+    # Cache shared by all HygroThermo resources: a single acquisition cycle produces
+    #   both temperature and humidity, instead of each resource reading the sensor
+    shared_cache = None
+    # Observers may not sample faster than PUT period allows (more than 2 seconds)
+    min_observer_period = 3
+
     def __init__(self):
         """
-        Constructor initializing resource instance, creating payload wrapper and set observation
+        Constructor initializing resource instance, sharing sample cache with other HygroThermo resources
         """
-        super(Joystick, self).__init__()
+        super(HygroThermo, self).__init__()
 
-        self.observe_period = 1
-        self.fp_format = r_defs.DEFAULT_FP_FORMAT
+        if HygroThermo.shared_cache is None:
+            HygroThermo.shared_cache = self.cache
+        else:
+            self.cache = HygroThermo.shared_cache
+            self.cache.listeners.append(self.record_sample)
 
-        self.payload = PayloadTable('joystick', True, self.observe_period)
+    @asyncio.coroutine
+    def acquire(self):
+        """
+        Read temperature and humidity from the sensor in one acquisition cycle
 
-        # Start observing resource
-        self.notify()
+        Humidity needs a temperature conversion for its correction anyway, so reading both
+            together saves one slow conversion compared to reading them separately
 
-    def notify(self):
-        """
-        callback function for observation to occur periodically
+        :return: (float, float) temperature in Celsius, and humidity in percentage
         """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        return (yield from self.driver.read_temperature_and_Humidity())
 
-    @asyncio.coroutine
-    def render_GET(self, request):
-        """
-        Implementation of GET request, returning joystick position in payload wrapper
 
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
+class Temperature(HygroThermo):
+    """
+    Temperature resource that reads temperature sensor
+    """
 
-        :return: Message struct containing outgoing response
+    def __init__(self):
         """
-        leftright, updown = self.mcp3008.joystick()
+        Constructor initializing resource instance, creating payload wrapper and set observation
+        """
+        super(Temperature, self).__init__()
 
-        # Wrap data with sensor related information and timestamps
-        jdata = json.dumps({'leftright': format(leftright, self.fp_format),
-                            'updown': format(updown, self.fp_format)}, sort_keys=True)
-        payload = PayloadWrapper.wrap(jdata, self.payload)
+        self.observe_period = 5
+        self.fp_format = r_defs.DEFAULT_FP_FORMAT
+        self.payload = PayloadTable('temperature', True, self.observe_period)
 
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+        self.start_sampling()
 
-        return response
+    def to_data(self, value):
+        """
+        Convert HygroThermo reading into resource data
+
+        :param value: (float, float) temperature in Celsius, and humidity in percentage
+        :return: (dict) temperature
+        """
+        temp, _ = value
+        return {'temperature': temp}
 
     @asyncio.coroutine
     def render_PUT(self, request):
@@ -575,8 +1648,9 @@ class Joystick(Adc8Channel):
         #print("PUT %s to resource" % request.payload)
         # FIXME: This should probably be formatted with corresponding error code
         # FIXME: Various error messages for different PUT methods
-        err_msg = ("argument is not correctly formatted. Follow 'period [sec]' to " \
-                   "update period to observe 'joystick' resource\n\n").encode(UTF8)
+        err_msg = ("argument is not correctly formatted.\n\n"                           \
+                   "Follow 'period [sec]' to update period to observe 'temperature'"    \
+                   "resource. [sec] > 2.\n\n").encode(UTF8)
         err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
         err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
 
@@ -586,11 +1660,21 @@ class Joystick(Adc8Channel):
 
         # Observe with period = 0 is not allowed
         if (args[0] == 'period') and (args[1].isdigit() and args[1] != '0'):
-            self.observe_period = int(args[1])
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            new_period = int(args[1])
+            # Physical constraint of the sensor does not allow update faster than 1 sec;
+            #   double the value to improve reliability
+            if new_period <= 2:
+                return err_response
+            self.set_observe_period(new_period)
         elif args[0] == 'decimal':
             self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
         else:
             return err_response
 
@@ -601,64 +1685,32 @@ class Joystick(Adc8Channel):
         return response
 
 
-class HygroThermo(resource.ObservableResource):
-    """
-    parent class implements HygroThermo (temperature + humidity) sensor
-    """
-
-    # Sensor driver must be a class variable, because HygroThermo class may
-    #   be initialized more than once
-    driver = WaitingSht15()
-
-    def __init__(self):
-        """
-        Constructor initializing resource instance
-        """
-        super(HygroThermo, self).__init__()
-
-
-class Temperature(HygroThermo):
+class Humidity(HygroThermo):
     """
-    Temperature resource that reads temperature sensor
+    Humidity resource that reads humidity sensor
     """
 
     def __init__(self):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
         """
-        super(Temperature, self).__init__()
+        super(Humidity, self).__init__()
 
         self.observe_period = 5
         self.fp_format = r_defs.DEFAULT_FP_FORMAT
-        self.payload = PayloadTable('temperature', True, self.observe_period)
-
-        self.notify()
+        self.payload = PayloadTable('humidity', True, self.observe_period)
 
-    def notify(self):
-        """
-        callback function for observation to occur periodically
-        """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        self.start_sampling()
 
-    @asyncio.coroutine
-    def render_GET(self, request, query=None):
+    def to_data(self, value):
         """
-        Implementation of GET request, returning temperature reading in payload wrapper
+        Convert HygroThermo reading into resource data
 
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
-
-        :return: Message struct containing outgoing response
+        :param value: (float, float) temperature in Celsius, and humidity in percentage
+        :return: (dict) humidity
         """
-        temp = self.driver.read_temperature_C()
-        json_temp = json.dumps({'temperature': format(temp, self.fp_format)})
-        payload = PayloadWrapper.wrap(json_temp, self.payload)
-
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
-
-        return response
+        _, humidity = value
+        return {'humidity': humidity}
 
     @asyncio.coroutine
     def render_PUT(self, request):
@@ -675,7 +1727,7 @@ class Temperature(HygroThermo):
         # FIXME: This should probably be formatted with corresponding error code
         # FIXME: Various error messages for different PUT methods
         err_msg = ("argument is not correctly formatted.\n\n"                           \
-                   "Follow 'period [sec]' to update period to observe 'temperature'"    \
+                   "Follow 'period [sec]' to update period to observe 'humidity'"       \
                    "resource. [sec] > 2.\n\n").encode(UTF8)
         err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
         err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
@@ -691,11 +1743,16 @@ class Temperature(HygroThermo):
             #   double the value to improve reliability
             if new_period <= 2:
                 return err_response
-            self.observe_period = new_period
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            self.set_observe_period(new_period)
         elif args[0] == 'decimal':
             self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
         else:
             return err_response
 
@@ -706,48 +1763,34 @@ class Temperature(HygroThermo):
         return response
 
 
-class Humidity(HygroThermo):
+class DewPoint(HygroThermo):
     """
-    Humidity resource that reads humidity sensor
+    DewPoint resource derived from temperature and humidity readings of the HygroThermo sensor
     """
 
     def __init__(self):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
         """
-        super(Humidity, self).__init__()
+        super(DewPoint, self).__init__()
 
         self.observe_period = 5
         self.fp_format = r_defs.DEFAULT_FP_FORMAT
-        self.payload = PayloadTable('humidity', True, self.observe_period)
-
-        self.notify()
+        self.payload = PayloadTable('dewpoint', True, self.observe_period)
 
-    def notify(self):
-        """
-        callback function for observation to occur periodically
-        """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        self.start_sampling()
 
-    @asyncio.coroutine
-    def render_GET(self, request):
+    def to_data(self, value):
         """
-        Implementation of GET request, returning humidity reading in payload wrapper
+        Convert HygroThermo reading into resource data
 
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
-
-        :return: Message struct containing outgoing response
+        :param value: (float, float) temperature in Celsius, and humidity in percentage
+        :return: (dict) dew point
         """
-        humidity = self.driver.read_humidity()
-        json_humidity = json.dumps({'humidity': format(humidity, self.fp_format)})
-        payload = PayloadWrapper.wrap(json_humidity, self.payload)
+        # Derived from the shared acquisition, no extra sensor transaction needed
+        from sensors.temp_sensor import calculate_dew_point
 
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
-
-        return response
+        return {'dewpoint': calculate_dew_point(*value)}
 
     @asyncio.coroutine
     def render_PUT(self, request):
@@ -764,7 +1807,7 @@ class Humidity(HygroThermo):
         # FIXME: This should probably be formatted with corresponding error code
         # FIXME: Various error messages for different PUT methods
         err_msg = ("argument is not correctly formatted.\n\n"                           \
-                   "Follow 'period [sec]' to update period to observe 'humidity'"       \
+                   "Follow 'period [sec]' to update period to observe 'dewpoint'"       \
                    "resource. [sec] > 2.\n\n").encode(UTF8)
         err_response = aiocoap.Message(code=aiocoap.BAD_REQUEST, payload=err_msg)
         err_response.opt.content_format = r_defs.TEXT_PLAIN_CODE
@@ -780,11 +1823,16 @@ class Humidity(HygroThermo):
             #   double the value to improve reliability
             if new_period <= 2:
                 return err_response
-            self.observe_period = new_period
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            self.set_observe_period(new_period)
         elif args[0] == 'decimal':
             self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
         else:
             return err_response
 
@@ -795,61 +1843,54 @@ class Humidity(HygroThermo):
         return response
 
 
-class Motion(resource.ObservableResource):
+class Motion(SampledResource):
     """
     Motion resource that reads on/off motion sensor
     """
 
+    driver = SharedDriver('se10')
+
     def __init__(self):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
         """
         super(Motion, self).__init__()
 
-        self.driver = Se10()
-
         self.observe_period = 1
         self.fp_format = r_defs.DEFAULT_FP_FORMAT
 
         self.payload = PayloadTable('motion', True, self.observe_period)
 
         # start observing resource
-        self.notify()
-
-    def notify(self):
-        """
-        callback function for observation to occur periodically
-        """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
+        self.start_sampling()
 
     @asyncio.coroutine
-    def render_GET(self, request):
+    def acquire(self):
         """
-        Implementation of GET request, returning motion reading in payload wrapper
-
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
+        Read motion status from the sensor
 
-        :return: Message struct containing outgoing response
+        :return: (bool) presence of motion
         """
-        has_motion = self.driver.has_motion()
-
-        # Wrap data with sensor related information and timestamps
-        jmotion = json.dumps({'motion': str(has_motion)})
-        payload = PayloadWrapper.wrap(jmotion, self.payload)
+        return (yield from self.driver.has_motion())
 
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
+    def to_data(self, value):
+        """
+        Convert motion reading into resource data
 
-        return response
+        :param bool value: presence of motion
+        :return: (dict) motion status
+        """
+        return {'motion': value}
 
 
-class ResourceTemplate(resource.ObservableResource):
+class ResourceTemplate(SampledResource):
     """
     Template resource that implements anonymous analog sensor that connects to ADC chip
     """
 
+    # Observers may not sample faster than PUT period allows (more than 2 seconds)
+    min_observer_period = 3
+
     def __init__(self, name=None, active=False, period=3, min=0, max=1023, channel=0):
         """
         Constructor initializing resource instance, creating payload wrapper and set observation
@@ -858,7 +1899,8 @@ class ResourceTemplate(resource.ObservableResource):
         
         self.observe_period = period
         self.fp_format = r_defs.DEFAULT_FP_FORMAT
-        self.sensor = MCP3008()
+        # Share the ADC driver (and its SPI session) of Adc8Channel resources
+        self.sensor = Adc8Channel.mcp3008
         self.active = active
         self.channel = channel
         self.min = min
@@ -867,34 +1909,40 @@ class ResourceTemplate(resource.ObservableResource):
 
         self.payload = PayloadTable(name, self.active, self.observe_period)
         
-        self.notify()
-    
-    def notify(self):
+        self.start_sampling()
+
+    @classmethod
+    def from_config(cls, sensor):
         """
-        callback function for observation to occur periodically
+        Create resource from its sensor entry in config.json, or from a POST payload, which gives the period
+            as 'frequency'
+
+        :param dict sensor: sensor entry with name, active, period (or frequency), channel, and optionally min
+            and max
+        :return: (ResourceTemplate) new resource
         """
-        self.updated_state()
-        asyncio.get_event_loop().call_later(self.observe_period, self.notify)
-    
+        period = sensor['period'] if 'period' in sensor else sensor['frequency']
+        return cls(sensor['name'], sensor['active'], period, sensor.get('min', 0), sensor.get('max', 1023),
+                   sensor['channel'])
+
     @asyncio.coroutine
-    def render_GET(self, request):
+    def acquire(self):
         """
-        Implementation of GET request, returning ADC channel reading in payload wrapper
+        Read raw value of the ADC channel
 
-        :param request: Message struct containing incoming request
-        :type request: aiocoap.message.Message
+        :return: (int) raw data reading from channel (0~1023)
+        """
+        return (yield from self.sensor.read_channel_raw(self.channel))
 
-        :return: Message struct containing outgoing response
+    def to_data(self, value):
         """
-        reading = self.sensor.read_channel_raw(self.channel)
-        reading_conv = ((reading/1024) * (self.max-self.min)) + self.min
-        json_temp_resource = json.dumps({self.name: format(reading_conv, self.fp_format)})
-        payload = PayloadWrapper.wrap(json_temp_resource, self.payload)
-        
-        response = aiocoap.Message(code=aiocoap.CONTENT, payload=payload)
-        response.opt.content_format = r_defs.JSON_FORMAT_CODE
-        
-        return response
+        Convert raw ADC channel reading into resource data mapped to [min, max]
+
+        :param int value: raw data reading from channel (0~1023)
+        :return: (dict) converted reading
+        """
+        reading_conv = ((value/1024) * (self.max-self.min)) + self.min
+        return {self.name: reading_conv}
 
     @asyncio.coroutine
     def render_PUT(self, request):
@@ -923,17 +1971,24 @@ class ResourceTemplate(resource.ObservableResource):
             #   double the value to improve reliability
             if new_period <= 2:
                 return err_response
-            self.observe_period = new_period
-            # PUT new value to non-data field requires updating payload wrapper content
-            self.payload.set_sample_rate(self.observe_period)
+            self.set_observe_period(new_period)
         elif args[0] == 'min':
             self.min = int(args[1])
         elif args[0] == 'max':
             self.max = int(args[1])
         elif args[0] == 'channel':
             self.channel = int(args[1])
+            # Cached reading belongs to the previous channel
+            self.cache.invalidate()
         elif args[0] == 'decimal':
             self.fp_format = '.{}f'.format(int(args[1]))
+        elif (args[0] == 'maxage') and args[1].isdigit():
+            self.set_max_age(int(args[1]))
+        elif args[0] in POLICY_COMMANDS:
+            try:
+                self.policy.configure(args[0], args[1])
+            except ValueError:
+                return err_response
         else:
             return err_response
             
@@ -944,12 +1999,52 @@ class ResourceTemplate(resource.ObservableResource):
         return response
 
 
-# Define the resources can be added dynamically
-IMPLEMENTED_RESOURCES = {'hello': HelloWorld,
-                         'time': LocalTime,
-                         'alert': Alert,
-                         'acceleration': Acceleration,
-                         'joystick': Joystick,
-                         'temperature': Temperature,
-                         'humidity': Humidity,
-                         'motion': Motion}
\ No newline at end of file
+# Resource types by sensor type name, used for both config.json and POST; sensors of unknown type
+#   are read from an ADC channel by ResourceTemplate. Plugins add types through setuptools entry points.
+RESOURCE_TYPES = ResourceRegistry(default='template')
+for type_name, resource_class in (('hello', HelloWorld),
+                                  ('time', LocalTime),
+                                  ('alert', Alert),
+                                  ('acceleration', Acceleration),
+                                  ('accelerometer', Acceleration),
+                                  ('joystick', Joystick),
+                                  ('temperature', Temperature),
+                                  ('humidity', Humidity),
+                                  ('dewpoint', DewPoint),
+                                  ('motion', Motion),
+                                  ('template', ResourceTemplate)):
+    RESOURCE_TYPES.register(type_name, resource_class)
+
+
+def create_resource(sensor):
+    """
+    Create a resource from its sensor entry, in config.json or a POST payload, with its optional settings:
+        'max_age' of cached readings, 'history' (number of past readings kept for history queries) and the
+        notification policy ('deadband' or 'relative_deadband', 'min_interval', 'heartbeat')
+
+    :param dict sensor: sensor entry; 'type' selects the resource type and defaults to 'name', unknown
+        types use the template resource
+    :return: new resource instance
+    :raises KeyError: missing entry
+    :raises ValueError: invalid entry
+    """
+    new_resource = RESOURCE_TYPES.create(sensor)
+    if isinstance(new_resource, SampledResource):
+        try:
+            if 'max_age' in sensor:
+                max_age = sensor['max_age']
+                if max_age is not None and (isinstance(max_age, bool) or not isinstance(max_age, (int, float))
+                                            or not max_age >= 0):
+                    raise ValueError("Invalid max_age {!r}".format(max_age))
+                new_resource.set_max_age(max_age)
+            if 'history' in sensor and new_resource.history is not None:
+                new_resource.history.resize(sensor['history'])
+            new_resource.policy = NotificationPolicy.from_config(sensor)
+        except (KeyError, ValueError, TypeError):
+            # The resource already samples and listens to the shared cache, but is never added to the site
+            new_resource.shutdown()
+            raise
+    elif 'max_age' in sensor or 'history' in sensor:
+        logger.warning("Ignoring 'max_age' and 'history' of {}, which is not a sampled resource"
+                       .format(sensor['name']))
+    return new_resource
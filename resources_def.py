@@ -12,9 +12,13 @@
     Python3.4 is required
 """
 
+import collections
 import json
 import datetime
+import math
+import struct
 
+import series_codec
 from defs import *
 
 # payload wrapper fields
@@ -24,12 +28,20 @@ SAMPLE_R_FIELD = 'rate'
 DATA_FIELD = 'data'
 TIME_FIELD = 'time'
 
+# Most decimals of delta coded payloads; a double holds 15 significant digits
+MAX_DECIMALS = 15
+
 
 class PayloadWrapper:
     """
     PayloadWrapper is helper class to fill PayloadTable class object with given resource data
     """
 
+    # Rendering templates of render_fields, keyed by (field names, decimal format), least recently used
+    #   first; field names of aggregate records come from the query, so the number of templates is bounded
+    _templates = collections.OrderedDict()
+    _templates_size = 64
+
     @staticmethod
     def wrap(data, wrapper):
         """
@@ -45,6 +57,260 @@ class PayloadWrapper:
         # FIXME: PayloadWrapper shouldn't deal with json or encoding the table
         return json.dumps(wrapper).encode(UTF8)
 
+    @staticmethod
+    def render_value(value, fp_format=None):
+        """
+        Render one resource data value as JSON text
+
+        :param value: value to render
+        :param str fp_format: decimal format applied to numbers (default: full precision)
+        :return: (str) JSON text of the value
+        """
+        if fp_format is not None and isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and math.isfinite(value):
+            return format(value, fp_format)
+        return json.dumps(value)
+
+    @staticmethod
+    def render_fields(data, fp_format=None):
+        """
+        Render resource data as the members of a JSON object, without the enclosing braces
+
+        :param dict data: resource data, field name -> value
+        :param str fp_format: decimal format applied to numbers (default: full precision)
+        :return: (str) JSON members sorted by field name
+        """
+        names = sorted(data)
+        values = [data[name] for name in names]
+
+        if fp_format is not None and all(type(value) in (float, int) and math.isfinite(value) for value in values):
+            # Readings of one resource always carry the same fields, so the whole object is rendered
+            #   with one cached template
+            key = (tuple(names), fp_format)
+            templates = PayloadWrapper._templates
+            template = templates.get(key)
+            if template is None:
+                template = ', '.join('{}: {{{}:{}}}'.format(json.dumps(name), i, fp_format)
+                                     for i, name in enumerate(names))
+                templates[key] = template
+                if len(templates) > PayloadWrapper._templates_size:
+                    templates.popitem(last=False)
+            else:
+                templates.move_to_end(key)
+            return template.format(*values)
+
+        return ', '.join('{}: {}'.format(json.dumps(name), PayloadWrapper.render_value(value, fp_format))
+                         for name, value in zip(names, values))
+
+    @staticmethod
+    def serialize(data, wrapper, timestamp=None, fp_format=None):
+        """
+        Fast path of wrap(): splice resource data and timestamp behind the pre-rendered header of the table
+
+        Data is emitted as a nested JSON object instead of a JSON string, and only the data and the time
+            are rendered per call. The table itself is left untouched.
+
+        :param data: resource data, field name -> value, or JSON text already rendered (e.g. a list of samples)
+        :type data: dict or str
+        :param PayloadTable wrapper: table holding the header information
+        :param float timestamp: time of the data in seconds since epoch (default: now)
+        :param str fp_format: decimal format applied to numbers (default: full precision)
+        :return: (bytes) encoded JSON table
+        """
+        if isinstance(data, dict):
+            data = '{' + PayloadWrapper.render_fields(data, fp_format) + '}'
+        if timestamp is None:
+            time = datetime.datetime.now()
+        else:
+            time = datetime.datetime.fromtimestamp(timestamp)
+
+        return wrapper.header() + '{}, "{}": "{}"}}'.format(data, TIME_FIELD, time).encode(UTF8)
+
+
+class PackedPayloadWrapper:
+    """
+    PackedPayloadWrapper is the binary counterpart of PayloadWrapper, used when a client asks for
+        PACKED_FORMAT_CODE with the CoAP Accept option
+
+    Numbers are sent as big-endian doubles and timestamps as seconds since epoch, so a reading costs
+        8 bytes per field instead of a formatted string inside a second layer of JSON.
+
+    Layout (network byte order):
+        header:  version (B), flags (B, bit 0: active), rate (I), name length (H), name (utf-8)
+        fields:  field count (H), then per field: name length (H), name (utf-8)
+        records: record count (I), then per record: timestamp (d), one value (d) per field
+    """
+
+    # Version 2 widened name lengths and the field count from one byte to two
+    VERSION = 2
+    ACTIVE_FLAG = 0x01
+    # Longest name and most fields of a payload
+    MAX_COUNT = 0xFFFF
+
+    _header = struct.Struct('!BBIH')
+    _count = struct.Struct('!H')
+    _records = struct.Struct('!I')
+
+    @staticmethod
+    def _check_count(count, what):
+        if count > PackedPayloadWrapper.MAX_COUNT:
+            raise ValueError("Too many {} to pack: {}".format(what, count))
+
+    @staticmethod
+    def _pack_str(value):
+        encoded = value.encode(UTF8)
+        PackedPayloadWrapper._check_count(len(encoded), 'name bytes')
+        return PackedPayloadWrapper._count.pack(len(encoded)) + encoded
+
+    @staticmethod
+    def _unpack_str(payload, offset):
+        length, = PackedPayloadWrapper._count.unpack_from(payload, offset)
+        offset += PackedPayloadWrapper._count.size
+        return payload[offset:offset + length].decode(UTF8), offset + length
+
+    @staticmethod
+    def wrap(samples, wrapper):
+        """
+        Pack readings with the header information of a PayloadTable
+
+        :param samples: readings as (timestamp in seconds since epoch, resource data) pairs; all readings
+            carry the fields of any reading, missing values are packed as NaN
+        :type samples: list of (float, dict)
+        :param PayloadTable wrapper: table holding the header information
+        :return: (bytes) packed payload
+        :raises ValueError: name or number of fields beyond MAX_COUNT
+        """
+        fields = sorted(set().union(*(data for _, data in samples)))
+        PackedPayloadWrapper._check_count(len(fields), 'fields')
+        record = struct.Struct('!{}d'.format(len(fields) + 1))
+
+        flags = PackedPayloadWrapper.ACTIVE_FLAG if wrapper[ACTIVE_FIELD] else 0
+        name = wrapper[NAME_FIELD].encode(UTF8)
+        PackedPayloadWrapper._check_count(len(name), 'name bytes')
+        chunks = [PackedPayloadWrapper._header.pack(PackedPayloadWrapper.VERSION, flags,
+                                                    int(wrapper[SAMPLE_R_FIELD]), len(name)),
+                  name,
+                  PackedPayloadWrapper._count.pack(len(fields))]
+        chunks += [PackedPayloadWrapper._pack_str(field) for field in fields]
+        chunks.append(PackedPayloadWrapper._records.pack(len(samples)))
+
+        for timestamp, data in samples:
+            values = [data.get(field) for field in fields]
+            chunks.append(record.pack(timestamp, *[float('nan') if v is None else float(v) for v in values]))
+
+        return b''.join(chunks)
+
+    @staticmethod
+    def unwrap(payload):
+        """
+        Unpack a payload produced by wrap()
+
+        :param bytes payload: packed payload
+        :return: (dict) name, active, rate and 'records' holding (timestamp, resource data) pairs
+        :raises ValueError: payload is truncated or of an unknown version
+        """
+        try:
+            version, flags, rate, length = PackedPayloadWrapper._header.unpack_from(payload, 0)
+            if version != PackedPayloadWrapper.VERSION:
+                raise ValueError("unknown version {}".format(version))
+            offset = PackedPayloadWrapper._header.size
+            name = payload[offset:offset + length].decode(UTF8)
+            offset += length
+
+            count, = PackedPayloadWrapper._count.unpack_from(payload, offset)
+            offset += PackedPayloadWrapper._count.size
+            fields = []
+            for i in range(count):
+                field, offset = PackedPayloadWrapper._unpack_str(payload, offset)
+                fields.append(field)
+
+            n_records, = PackedPayloadWrapper._records.unpack_from(payload, offset)
+            offset += PackedPayloadWrapper._records.size
+            record = struct.Struct('!{}d'.format(count + 1))
+            records = []
+            for i in range(n_records):
+                values = record.unpack_from(payload, offset)
+                offset += record.size
+                data = {field: None if math.isnan(v) else v for field, v in zip(fields, values[1:])}
+                records.append((values[0], data))
+        except struct.error as e:
+            raise ValueError("Truncated packed payload: {}".format(e))
+
+        return {NAME_FIELD: name,
+                ACTIVE_FIELD: bool(flags & PackedPayloadWrapper.ACTIVE_FLAG),
+                SAMPLE_R_FIELD: rate,
+                'records': records}
+
+
+class DeltaPayloadWrapper:
+    """
+    DeltaPayloadWrapper is the compressed counterpart of PayloadWrapper for series of readings, used when a
+        client asks for DELTA_FORMAT_CODE with the CoAP Accept option
+
+    Layout: header of PackedPayloadWrapper (version, flags, rate, name), followed by the readings encoded
+        by series_codec, with values quantized to the decimals of the resource's data format
+    """
+
+    # Version 2 took over the two-byte name length of PackedPayloadWrapper version 2
+    VERSION = 2
+
+    @staticmethod
+    def wrap(samples, wrapper, decimals=6):
+        """
+        Encode readings with the header information of a PayloadTable
+
+        :param samples: readings as (timestamp in seconds since epoch, resource data) pairs
+        :type samples: list of (float, dict)
+        :param PayloadTable wrapper: table holding the header information
+        :param int decimals: number of decimals of the values kept
+        :return: (bytes) encoded payload
+        :raises ValueError: name beyond PackedPayloadWrapper.MAX_COUNT bytes
+        """
+        flags = PackedPayloadWrapper.ACTIVE_FLAG if wrapper[ACTIVE_FIELD] else 0
+        name = wrapper[NAME_FIELD].encode(UTF8)
+        PackedPayloadWrapper._check_count(len(name), 'name bytes')
+        return b''.join([PackedPayloadWrapper._header.pack(DeltaPayloadWrapper.VERSION, flags,
+                                                           int(wrapper[SAMPLE_R_FIELD]), len(name)),
+                         name,
+                         series_codec.encode_series(samples, decimals)])
+
+    @staticmethod
+    def unwrap(payload):
+        """
+        Decode a payload produced by wrap()
+
+        :param bytes payload: encoded payload
+        :return: (dict) name, active, rate and 'records' holding (timestamp, resource data) pairs
+        :raises ValueError: payload is truncated or of an unknown version
+        """
+        try:
+            version, flags, rate, length = PackedPayloadWrapper._header.unpack_from(payload, 0)
+        except struct.error as e:
+            raise ValueError("Truncated delta payload: {}".format(e))
+        if version != DeltaPayloadWrapper.VERSION:
+            raise ValueError("unknown version {}".format(version))
+        offset = PackedPayloadWrapper._header.size
+        name = payload[offset:offset + length].decode(UTF8)
+
+        return {NAME_FIELD: name,
+                ACTIVE_FIELD: bool(flags & PackedPayloadWrapper.ACTIVE_FLAG),
+                SAMPLE_R_FIELD: rate,
+                'records': series_codec.decode_series(payload, offset + length)}
+
+
+def fp_decimals(fp_format, default=6):
+    """
+    Get number of decimals of a data format, within what a double holds
+
+    :param str fp_format: decimal format such as '.2f', None for full precision
+    :param int default: decimals used for full precision
+    :return: (int) number of decimals, 0 to MAX_DECIMALS
+    """
+    if fp_format is None:
+        return default
+    # Formats are set by PUT 'decimal N' with any integer N
+    return min(max(int(fp_format.strip('.f')), 0), MAX_DECIMALS)
+
 
 class PayloadTable(dict):
     """
@@ -66,6 +332,8 @@ class PayloadTable(dict):
         dict.__setitem__(self, SAMPLE_R_FIELD, rate)
         dict.__setitem__(self, DATA_FIELD, '')
         dict.__setitem__(self, TIME_FIELD, '')
+        # Encoded constant part of the table, rendered on demand by header()
+        self._header = None
 
     def __missing__(self, key):
         """
@@ -84,6 +352,7 @@ class PayloadTable(dict):
         :param str name: resource name
         """
         dict.__setitem__(self, NAME_FIELD, name)
+        self._header = None
 
     def set_active(self, is_active):
         """
@@ -92,6 +361,7 @@ class PayloadTable(dict):
         :param bool active: whether resource is observable
         """
         dict.__setitem__(self, ACTIVE_FIELD, is_active)
+        self._header = None
 
     def set_sample_rate(self, rate):
         """
@@ -100,6 +370,23 @@ class PayloadTable(dict):
         :param int rate: frequency to observe the resource
         """
         dict.__setitem__(self, SAMPLE_R_FIELD, rate)
+        self._header = None
+
+    def header(self):
+        """
+        Get the encoded start of the JSON table, up to and including the key of the data field
+
+        The header only depends on name, activeness and sample rate, so it is rendered once and kept
+            until one of them is set again
+
+        :return: (bytes) encoded JSON text, e.g. b'{"name": "hello", "active": false, "rate": 0, "data": '
+        """
+        if self._header is None:
+            fields = ((NAME_FIELD, self[NAME_FIELD]), (ACTIVE_FIELD, self[ACTIVE_FIELD]),
+                      (SAMPLE_R_FIELD, self[SAMPLE_R_FIELD]))
+            text = ''.join('{}: {}, '.format(json.dumps(key), json.dumps(value)) for key, value in fields)
+            self._header = '{{{}{}: '.format(text, json.dumps(DATA_FIELD)).encode(UTF8)
+        return self._header
 
     def set_data(self, data):
         """
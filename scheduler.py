@@ -0,0 +1,227 @@
+"""
+    Created on October 18, 2026
+
+    This is the sampling scheduler shared by all periodically sampled resources.
+
+    Every periodic acquisition is placed on one monotonic time grid: a job with period P is due at
+    origin + k * P, so deadlines never drift with callback latency, and jobs whose deadlines coincide
+    are run together in a single wakeup of the event loop.
+
+    Python3.4 is required
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingJob(object):
+    """
+    A periodic acquisition registered with SamplingScheduler
+    """
+
+    def __init__(self, callback, period):
+        """
+        Constructor of a sampling job
+
+        :param callback: function called every time the job is due
+        :param float period: sampling period in seconds
+        """
+        self.callback = callback
+        self.period = period
+        self.deadline = None
+        self.active = True
+        # number of times the job has been run
+        self.runs = 0
+        # number of grid points skipped because the job was overdue by more than one period
+        self.missed = 0
+        # sequence number of the queue entry currently representing this job
+        self._entry = None
+
+
+class SamplingScheduler(object):
+    """
+    Scheduler owning all periodic acquisitions, with a single timer armed at the earliest deadline
+    """
+
+    def __init__(self, loop=None, tolerance=0.005):
+        """
+        Constructor of the scheduler. The event loop is bound lazily on first use.
+
+        :param loop: event loop to schedule on (default: asyncio.get_event_loop())
+        :param float tolerance: jobs due within this many seconds are run in the same tick
+        """
+        self._loop = loop
+        self.tolerance = tolerance
+
+        self._origin = None
+        # heap of (deadline, sequence number, job)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._timer = None
+        self._timer_deadline = None
+        self._jobs = set()
+
+        # Statistics
+        self.wakeups = 0
+        self.runs = 0
+        self.missed = 0
+        self.lateness_last = 0.0
+        self.lateness_max = 0.0
+        self._lateness_total = 0.0
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def _grid_after(self, now, period):
+        """
+        Find the first point of the sampling grid of given period that is not earlier than now
+
+        :param float now: current loop time
+        :param float period: sampling period in seconds
+        :return: (float) loop time of the next grid point
+        """
+        if self._origin is None:
+            self._origin = now
+        return self._origin + math.ceil((now - self._origin) / period) * period
+
+    def _push(self, job, deadline):
+        job.deadline = deadline
+        job._entry = next(self._sequence)
+        heapq.heappush(self._queue, (deadline, job._entry, job))
+        self._arm()
+
+    def _arm(self):
+        """
+        (Re-)arm the timer so that it fires at the earliest pending deadline
+        """
+        # Drop entries of removed or rescheduled jobs from the head of the queue
+        while self._queue and self._queue[0][2]._entry != self._queue[0][1]:
+            heapq.heappop(self._queue)
+
+        if not self._queue:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = self._timer_deadline = None
+            return
+
+        deadline = self._queue[0][0]
+        if self._timer is not None:
+            if self._timer_deadline <= deadline:
+                return
+            self._timer.cancel()
+        self._timer_deadline = deadline
+        self._timer = self.loop.call_at(deadline, self._tick)
+
+    def _tick(self):
+        """
+        Timer callback running every job that is due in this tick
+        """
+        self._timer = self._timer_deadline = None
+        now = self.loop.time()
+        self.wakeups += 1
+
+        # Collect the batch first, so that callbacks adding or rescheduling jobs do not
+        #   affect the current tick
+        batch = []
+        while self._queue and self._queue[0][0] <= now + self.tolerance:
+            deadline, entry, job = heapq.heappop(self._queue)
+            if job._entry == entry:
+                batch.append(job)
+
+        for job in batch:
+            lateness = max(now - job.deadline, 0.0)
+            self.lateness_last = lateness
+            self.lateness_max = max(self.lateness_max, lateness)
+            self._lateness_total += lateness
+
+            # Next deadline stays on the grid; grid points already in the past are skipped
+            deadline = job.deadline + job.period
+            if deadline <= now:
+                skipped = int((now - deadline) // job.period) + 1
+                deadline += skipped * job.period
+                job.missed += skipped
+                self.missed += skipped
+            job.deadline = deadline
+            job._entry = next(self._sequence)
+            heapq.heappush(self._queue, (deadline, job._entry, job))
+
+        for job in batch:
+            if not job.active:
+                continue
+            job.runs += 1
+            self.runs += 1
+            try:
+                job.callback()
+            except Exception:
+                logger.exception("Sampling job %r failed", job.callback)
+
+        self._arm()
+
+    def add(self, callback, period):
+        """
+        Register a periodic job, first run at the next point of its sampling grid
+
+        :param callback: function called every time the job is due
+        :param float period: sampling period in seconds
+        :return: (SamplingJob) handle used to reschedule or remove the job
+        """
+        job = SamplingJob(callback, period)
+        self._jobs.add(job)
+        self._push(job, self._grid_after(self.loop.time(), period))
+        return job
+
+    def remove(self, job):
+        """
+        Unregister a periodic job
+
+        :param SamplingJob job: job returned by add()
+        """
+        job.active = False
+        job._entry = None
+        self._jobs.discard(job)
+        self._arm()
+
+    def set_period(self, job, period):
+        """
+        Change the period of a job, moving it to the next point of its new sampling grid
+
+        :param SamplingJob job: job returned by add()
+        :param float period: new sampling period in seconds
+        """
+        job.period = period
+        if job.active:
+            self._push(job, self._grid_after(self.loop.time(), period))
+
+    def next_deadline(self):
+        """
+        Get time left until the next job is due
+
+        :return: (float) seconds until the earliest deadline, None if no job is registered
+        """
+        self._arm()
+        if not self._queue:
+            return None
+        return max(self._queue[0][0] - self.loop.time(), 0.0)
+
+    def statistics(self):
+        """
+        Get scheduling statistics
+
+        :return: (dict) job count, wakeups, runs, missed grid points, lateness in seconds and next deadline
+        """
+        return {'jobs': len(self._jobs),
+                'wakeups': self.wakeups,
+                'runs': self.runs,
+                'missed': self.missed,
+                'lateness_last': self.lateness_last,
+                'lateness_max': self.lateness_max,
+                'lateness_mean': self._lateness_total / self.runs if self.runs else 0.0,
+                'next_deadline': self.next_deadline()}
@@ -0,0 +1,171 @@
+"""
+    Created on October 18, 2026
+
+    This script provides continuous high-rate acquisition of MCP3008 channels
+
+    A background thread scans the selected channels at a fixed rate (hundreds to thousands of Hz) and
+    appends raw counts and timestamps to a fixed-size ring buffer. The buffer is array-backed and
+    mirrored (every sample is written twice, capacity apart), so the newest window of any length up to
+    the capacity is always contiguous and is handed to readers as a zero-copy memoryview.
+
+    Works with both MCP3008 and MCP3008Mock, as only the scan method of the driver is used.
+
+    Example Usage:
+
+    ``>>> stream = AdcStream(MCP3008Mock(), (0, 1, 2), rate=1000)``
+    ``>>> stream.start()``
+    ``>>> seq, timestamps, counts = stream.buffer.latest(256)``
+"""
+
+import array
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default number of samples kept by a stream
+DEFAULT_CAPACITY = 4096
+
+
+class RingBuffer(object):
+    """
+    Fixed-size ring buffer of multi-channel raw ADC counts and their timestamps
+    """
+
+    def __init__(self, channels, capacity=DEFAULT_CAPACITY):
+        """
+        Constructor allocating the buffer
+
+        :param int channels: number of channels per sample
+        :param int capacity: number of samples kept
+        """
+        self.channels = channels
+        self.capacity = capacity
+        # Mirrored storage: sample i is stored at i and i + capacity
+        self._counts = array.array('H', bytes(2 * 2 * capacity * channels))
+        self._timestamps = array.array('d', bytes(8 * 2 * capacity))
+        # Total number of samples ever written, used by readers to detect new samples and overruns
+        self.written = 0
+
+    def append(self, timestamp, counts):
+        """
+        Append one sample, overwriting the oldest one once the buffer is full
+
+        :param float timestamp: time of the sample (seconds since epoch)
+        :param counts: raw count of each channel (0~1023 each)
+        :type counts: list of int
+        """
+        index = self.written % self.capacity
+        mirror = index + self.capacity
+        c = self.channels
+
+        self._timestamps[index] = self._timestamps[mirror] = timestamp
+        self._counts[index * c:(index + 1) * c] = self._counts[mirror * c:(mirror + 1) * c] = \
+            array.array('H', counts)
+        # Publish the sample only after it has been written
+        self.written += 1
+
+    def latest(self, n):
+        """
+        Get zero-copy views of the newest samples
+
+        Views point into the live buffer: samples older than capacity - n are overwritten by later
+            appends, so readers needing a stable copy should copy the views or check written afterwards
+
+        :param int n: number of samples wanted, truncated to the number available
+        :return: (int, memoryview, memoryview) sequence number after the newest sample, timestamps
+            of n samples, and n * channels raw counts (sample-major)
+        """
+        written = self.written
+        n = min(n, written, self.capacity)
+        end = written % self.capacity + self.capacity
+        start = end - n
+        c = self.channels
+        return written, memoryview(self._timestamps)[start:end], memoryview(self._counts)[start * c:end * c]
+
+    def since(self, sequence):
+        """
+        Get zero-copy views of all samples newer than a sequence number returned earlier
+
+        :param int sequence: sequence number returned by latest() or since()
+        :return: (int, memoryview, memoryview) as latest(); samples already overwritten are skipped
+        """
+        return self.latest(self.written - sequence)
+
+
+class AdcStream(object):
+    """
+    Background acquisition of selected ADC channels at a fixed rate into a ring buffer
+    """
+
+    def __init__(self, driver, channels, rate, capacity=DEFAULT_CAPACITY, lock=None):
+        """
+        Constructor of the stream, acquisition starts with start()
+
+        :param driver: MCP3008 or MCP3008Mock instance
+        :param channels: channels to sample (0~7 each)
+        :type channels: tuple of int
+        :param float rate: sampling rate in Hz
+        :param int capacity: number of samples kept in the ring buffer
+        :param lock: lock serializing access to the SPI bus (e.g. sensors.async_driver.bus_lock)
+        :type lock: threading.Lock
+        """
+        self.driver = driver
+        self.channels = tuple(channels)
+        self.rate = rate
+        self.lock = lock if lock is not None else threading.Lock()
+        self.buffer = RingBuffer(len(self.channels), capacity)
+        # Number of sampling instants missed because acquisition fell behind
+        self.overruns = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start the acquisition thread
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='adc-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the acquisition thread and wait for it to finish
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.rate
+        deadline = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                with self.lock:
+                    counts = self.driver.scan(self.channels)
+            except Exception as e:
+                logger.error("ADC stream acquisition failed: {}".format(e))
+                self._stop.wait(period)
+            else:
+                self.buffer.append(time.time(), counts)
+
+            # Keep sampling instants on a fixed grid; skip instants already passed
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                missed = int(-delay // period) + 1
+                self.overruns += missed - 1
+                deadline += (missed - 1) * period
+                delay = deadline - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
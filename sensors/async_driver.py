@@ -0,0 +1,131 @@
+"""
+    Created on October 18, 2026
+
+    This script provides awaitable access to the blocking sensor drivers
+
+    Driver calls (SHT1x bit-banging and its 1 second spacing, SPI transfers, GPIO reads) are run on a
+    dedicated thread per bus, so the event loop serving CoAP requests is never blocked by a slow sensor, and
+    calls queued behind a slow bus never hold up the other buses. Calls to devices sharing one bus run on its
+    thread one after the other; the per-bus lock additionally serializes them with threads reading the bus
+    directly (e.g. the ADC stream).
+
+    Example Usage:
+
+    ``>>> driver = AsyncDriver(WaitingSht15(), SHT15_BUS)``
+    ``>>> temperature = yield from driver.read_temperature_C()``
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Bus names, one per group of devices that must not be accessed concurrently
+SPI_BUS = 'spi0'
+SHT15_BUS = 'sht15'
+SE10_BUS = 'se10'
+
+# Bus name -> single thread executor running the driver calls of the bus
+_executors = {}
+_bus_locks = {}
+_bus_locks_guard = threading.Lock()
+
+
+def get_executor(bus):
+    """
+    Get the thread running the driver calls of a bus, creating it on first use
+
+    One thread per bus, so that calls waiting for a busy bus (e.g. SHT15 conversions) never take threads
+        needed by the other buses
+
+    :param str bus: bus name
+    :return: (ThreadPoolExecutor) single thread executor of the bus
+    """
+    with _bus_locks_guard:
+        if bus not in _executors:
+            _executors[bus] = ThreadPoolExecutor(max_workers=1)
+        return _executors[bus]
+
+
+def bus_lock(bus):
+    """
+    Get the lock serializing access to a bus
+
+    The lock is a threading lock, so it also serializes driver calls made outside the thread of the bus
+
+    :param str bus: bus name
+    :return: (threading.Lock) lock of the bus
+    """
+    with _bus_locks_guard:
+        if bus not in _bus_locks:
+            _bus_locks[bus] = threading.Lock()
+        return _bus_locks[bus]
+
+
+class AsyncDriver(object):
+    """
+    Wrapper of a blocking sensor driver, turning each driver method into a coroutine run on the thread of
+        its bus
+    """
+
+    # Function called with (driver class name, method name, seconds) after every driver call, e.g. to feed
+    #   the metrics of the server; it runs on the calling thread while the bus lock is held
+    timing = None
+    # Function running driver calls instead, called with (method, *args), e.g. under a profiler; None runs the
+    #   driver method directly
+    profile = None
+
+    def __init__(self, driver, bus):
+        """
+        Constructor wrapping a driver instance
+
+        :param driver: blocking driver instance (e.g. MCP3008, WaitingSht15, Se10 or their mocks)
+        :param str bus: name of the bus the device is connected to
+        """
+        self.driver = driver
+        self.bus = bus
+
+    def _run(self, method, args):
+        # Hooks are looked up on the class, so that plain functions are not bound to the instance
+        timing = type(self).timing
+        profile = type(self).profile
+        with bus_lock(self.bus):
+            if timing is None and profile is None:
+                return method(*args)
+            start = time.perf_counter()
+            try:
+                return method(*args) if profile is None else profile(method, *args)
+            finally:
+                if timing is not None:
+                    timing(type(self.driver).__name__, method.__name__, time.perf_counter() - start)
+
+    @asyncio.coroutine
+    def call(self, method, *args):
+        """
+        Run a blocking driver method on the thread of the bus
+
+        :param method: bound method of the driver
+        :param args: arguments passed to the method
+        :return: return value of the method
+        """
+        loop = asyncio.get_event_loop()
+        return (yield from loop.run_in_executor(get_executor(self.bus), functools.partial(self._run, method, args)))
+
+    def __getattr__(self, name):
+        """
+        Look up driver attributes; methods are returned as coroutine functions, made once per method
+
+        :param str name: attribute name
+        """
+        attr = getattr(self.driver, name)
+        if not callable(attr):
+            return attr
+
+        @asyncio.coroutine
+        def read(*args):
+            return (yield from self.call(attr, *args))
+
+        # Later lookups find the wrapper in the instance without calling __getattr__
+        setattr(self, name, read)
+        return read
@@ -0,0 +1,385 @@
+"""
+    Created on October 18, 2026
+
+    This script provides optional acquisition worker processes, one per hardware bus
+
+    In worker mode every bus (SPI/MCP3008, SHT15 GPIO, SE-10 GPIO) is sampled on a fixed grid by its own
+    process, which writes samples into a ring buffer in shared memory. The server process only reads the
+    newest sample from shared memory, through readers offering the same methods as the drivers, so driver
+    work runs on other cores and a crashing or hanging driver is restarted by the supervisor without taking
+    the server down.
+
+    Example Usage:
+
+    ``>>> supervisor = BusSupervisor({'mcp3008': {'period': 0.01}})``
+    ``>>> reader = supervisor.reader('mcp3008')``
+    ``>>> x, y, z = reader.acceleration()``
+
+    Python3.4 is required
+"""
+
+import ctypes
+import logging
+import multiprocessing
+import time
+
+logger = logging.getLogger(__name__)
+
+# Driver name -> (driver method called by the worker, its arguments, number of values per sample)
+ACQUISITIONS = {'mcp3008': ('scan', (tuple(range(8)),), 8),
+                'sht15': ('read_temperature_and_Humidity', (), 2),
+                'se10': ('has_motion', (), 1)}
+# Default sampling period of each worker in seconds
+DEFAULT_PERIODS = {'mcp3008': 0.01, 'sht15': 2.0, 'se10': 0.1}
+# Default number of samples kept in each shared ring
+DEFAULT_CAPACITY = 1024
+# Seconds a reader waits for the first sample of a (re)started worker
+FIRST_SAMPLE_TIMEOUT = 10.0
+# Seconds between two checks of the supervisor
+SUPERVISE_INTERVAL = 1.0
+
+
+class SharedRing(object):
+    """
+    Ring buffer of timestamped samples in shared memory, written by one process and read by others
+    """
+
+    def __init__(self, width, capacity=DEFAULT_CAPACITY):
+        """
+        Constructor allocating the ring in shared memory; must be created before the worker is started
+
+        :param int width: number of values per sample
+        :param int capacity: number of samples kept
+        """
+        self.width = width
+        self.capacity = capacity
+        # One record per sample: timestamp followed by the values
+        self._records = multiprocessing.RawArray(ctypes.c_double, capacity * (width + 1))
+        # Total number of samples ever written; a sample is published by incrementing it
+        self._written = multiprocessing.RawValue(ctypes.c_uint64, 0)
+
+    @property
+    def written(self):
+        # 64-bit loads are not atomic on 32-bit ARM, so read until two loads agree
+        while True:
+            written = self._written.value
+            if written == self._written.value:
+                return written
+
+    def append(self, timestamp, values):
+        """
+        Append one sample; only the worker process writes
+
+        :param float timestamp: time of the sample (seconds since epoch)
+        :param values: values of the sample, width numbers
+        :type values: sequence of float
+        """
+        written = self._written.value
+        base = (written % self.capacity) * (self.width + 1)
+        self._records[base] = timestamp
+        self._records[base + 1:base + 1 + self.width] = [float(value) for value in values]
+        self._written.value = written + 1
+
+    def latest(self):
+        """
+        Get a copy of the newest sample
+
+        :return: (int, float, list of float) sequence number after the sample, timestamp and values;
+            None if nothing has been written yet
+        """
+        while True:
+            written = self.written
+            if not written:
+                return None
+            base = ((written - 1) % self.capacity) * (self.width + 1)
+            record = self._records[base:base + self.width + 1]
+            # The record is only overwritten once the writer wrapped around the whole ring
+            if self.written - written < self.capacity - 1:
+                return written, record[0], record[1:]
+
+
+def run_worker(name, ring, period, options, backend=None):
+    """
+    Main function of a worker process: sample one driver on a fixed grid into its shared ring
+
+    :param str name: driver name, a key of ACQUISITIONS
+    :param SharedRing ring: ring receiving the samples
+    :param float period: sampling period in seconds
+    :param dict options: keyword arguments of the driver constructor
+    :param dict backend: driver backend settings (see drivers.backend), None to use the driver
+    """
+    from sensors.drivers import create_driver
+
+    driver = create_driver(name, options, backend)
+    method_name, args, _ = ACQUISITIONS[name]
+    method = getattr(driver, method_name)
+
+    deadline = time.monotonic()
+    while True:
+        try:
+            values = method(*args)
+        except Exception as e:
+            logger.error("Bus worker {} acquisition failed: {}".format(name, e))
+        else:
+            ring.append(time.time(), values if isinstance(values, (tuple, list)) else (values,))
+
+        # Keep sampling instants on a fixed grid; skip instants already passed
+        deadline += period
+        delay = deadline - time.monotonic()
+        if delay < 0:
+            deadline += (int(-delay // period) + 1) * period
+            delay = deadline - time.monotonic()
+        time.sleep(max(delay, 0))
+
+
+class BusWorker(object):
+    """
+    One worker process and its shared ring, as seen from the server process
+    """
+
+    # Worker processes are spawned, as the server process runs threads (driver pool, streams)
+    context = multiprocessing.get_context('spawn')
+
+    def __init__(self, name, period, options=None, capacity=DEFAULT_CAPACITY, backend=None):
+        """
+        Constructor of a worker, started with start()
+
+        :param str name: driver name, a key of ACQUISITIONS
+        :param float period: sampling period in seconds
+        :param dict options: keyword arguments of the driver constructor
+        :param int capacity: number of samples kept in the shared ring
+        :param dict backend: driver backend settings (see drivers.backend), None to use the driver
+        """
+        self.name = name
+        self.period = period
+        self.options = options or {}
+        self.backend = backend
+        self.ring = SharedRing(ACQUISITIONS[name][2], capacity)
+        self.process = None
+        self.restarts = 0
+        # Sequence number and monotonic time of the last progress seen by the supervisor
+        self._seen = (0, None)
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """
+        Start (or restart) the worker process
+        """
+        self.process = self.context.Process(target=run_worker, name='bus-{}'.format(self.name), daemon=True,
+                                            args=(self.name, self.ring, self.period, self.options,
+                                                  self.backend))
+        self.process.start()
+        self._seen = (self.ring.written, time.monotonic())
+        logger.info("Started bus worker {} (pid {})".format(self.name, self.process.pid))
+
+    def stop(self):
+        """
+        Terminate the worker process
+        """
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def stalled(self, now):
+        """
+        Check whether the worker has stopped producing samples
+
+        :param float now: current monotonic time
+        :return: (bool) no new sample for much longer than the sampling period
+        """
+        written = self.ring.written
+        if written != self._seen[0]:
+            self._seen = (written, now)
+            return False
+        # Allow for process start-up and slow drivers (SHT15 conversions take up to a second)
+        return now - self._seen[1] > max(10 * self.period, FIRST_SAMPLE_TIMEOUT)
+
+    def statistics(self):
+        """
+        Get worker statistics
+
+        :return: (dict) pid, alive, restarts, samples written and age of the newest sample in seconds
+        """
+        latest = self.ring.latest()
+        return {'pid': self.process.pid if self.process is not None else None,
+                'alive': self.alive,
+                'restarts': self.restarts,
+                'samples': self.ring.written,
+                'age': time.time() - latest[1] if latest is not None else None}
+
+
+class SharedSampleReader(object):
+    """
+    Parent of the readers standing in for drivers in the server process; methods return the newest sample
+        of the worker instead of accessing the hardware
+    """
+
+    def __init__(self, worker):
+        """
+        Constructor of a reader
+
+        :param BusWorker worker: worker sampling the driver
+        """
+        self.worker = worker
+
+    def values(self):
+        """
+        Get values of the newest sample, waiting for the first sample of a (re)started worker
+
+        :return: (list of float) values of the newest sample
+        :raises RuntimeError: worker produced no sample in time
+        """
+        deadline = time.monotonic() + FIRST_SAMPLE_TIMEOUT
+        latest = self.worker.ring.latest()
+        while latest is None:
+            if time.monotonic() > deadline:
+                raise RuntimeError("No sample from bus worker {}".format(self.worker.name))
+            time.sleep(0.01)
+            latest = self.worker.ring.latest()
+        return latest[2]
+
+    def configure(self, **options):
+        """
+        Change driver options; the worker is restarted with them
+        """
+        self.worker.options.update(options)
+        if self.worker.alive:
+            self.worker.stop()
+            self.worker.start()
+
+    def close(self):
+        pass
+
+
+class Mcp3008Reader(SharedSampleReader):
+    """
+    Reader with the methods of MCP3008, from samples of all 8 channels
+    """
+
+    def read_channel_raw(self, channel):
+        return int(self.values()[channel])
+
+    def scan(self, channels):
+        values = self.values()
+        return [int(values[channel]) for channel in channels]
+
+    def acceleration(self):
+        from sensors.mcp3008 import ACC_CHANNELS, convert_raw_to_g
+
+        values = self.values()
+        return tuple(convert_raw_to_g(values[channel], axis) for axis, channel in enumerate(ACC_CHANNELS))
+
+    def joystick(self):
+        # Joystick is connected to channels 3 (left-right) and 4 (up-down)
+        values = self.values()
+        return int(values[3]), int(values[4])
+
+
+class Sht15Reader(SharedSampleReader):
+    """
+    Reader with the methods of WaitingSht15
+    """
+
+    def read_temperature_and_Humidity(self):
+        temperature, humidity = self.values()
+        return temperature, humidity
+
+    def read_temperature_C(self):
+        return self.values()[0]
+
+    def read_humidity(self):
+        return self.values()[1]
+
+    def calculate_dew_point(self, temperature, humidity):
+        from sensors.temp_sensor import calculate_dew_point
+
+        return calculate_dew_point(temperature, humidity)
+
+
+class Se10Reader(SharedSampleReader):
+    """
+    Reader with the methods of Se10
+    """
+
+    def has_motion(self):
+        return bool(self.values()[0])
+
+
+READERS = {'mcp3008': Mcp3008Reader, 'sht15': Sht15Reader, 'se10': Se10Reader}
+
+
+class BusSupervisor(object):
+    """
+    Owner of the worker processes: starts a worker when its driver is first used and restarts workers
+        that died or stalled
+    """
+
+    def __init__(self, settings=None):
+        """
+        Constructor of the supervisor, no worker is started yet
+
+        :param dict settings: driver name -> worker settings ('period' in seconds, 'capacity' in samples);
+            drivers missing from settings use the defaults
+        """
+        self.settings = settings or {}
+        self.workers = {}
+        self._timer = None
+
+    def reader(self, name, options=None, backend=None):
+        """
+        Get a reader of a driver, starting its worker on first use
+
+        :param str name: driver name, a key of ACQUISITIONS
+        :param dict options: keyword arguments of the driver constructor
+        :param dict backend: driver backend settings (see drivers.backend), None to use the driver
+        :return: (SharedSampleReader) reader standing in for the driver
+        """
+        if name not in self.workers:
+            settings = self.settings.get(name, {})
+            worker = BusWorker(name, settings.get('period', DEFAULT_PERIODS[name]), options,
+                               settings.get('capacity', DEFAULT_CAPACITY), backend)
+            worker.start()
+            self.workers[name] = worker
+        return READERS[name](self.workers[name])
+
+    def supervise(self, loop):
+        """
+        Check all workers now and then every SUPERVISE_INTERVAL seconds on the event loop
+
+        :param loop: event loop of the server
+        """
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if not worker.alive:
+                logger.error("Bus worker {} exited ({}), restarting".format(
+                    worker.name, worker.process.exitcode if worker.process is not None else None))
+            elif worker.stalled(now):
+                logger.error("Bus worker {} stalled, restarting".format(worker.name))
+                worker.stop()
+            else:
+                continue
+            worker.restarts += 1
+            worker.start()
+        self._timer = loop.call_later(SUPERVISE_INTERVAL, self.supervise, loop)
+
+    def stop(self):
+        """
+        Stop supervising and terminate all workers
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for worker in self.workers.values():
+            worker.stop()
+
+    def statistics(self):
+        """
+        Get statistics of all workers
+
+        :return: (dict) driver name -> worker statistics
+        """
+        return {name: worker.statistics() for name, worker in self.workers.items()}
@@ -0,0 +1,221 @@
+"""
+    Created on October 18, 2026
+
+    This script provides the shared sensor drivers, loaded on first use
+
+    Driver modules (and the hardware modules they import, e.g. spidev and RPi.GPIO) are only imported, and
+    the devices only opened, when a resource actually uses the driver, so resources missing from the
+    configuration cost nothing at start-up. Mock drivers are used on x86_64 development machines.
+
+    In simulation mode (enable_simulation) the timing-faithful simulators of sensors.simulators are used
+    instead of the drivers or mocks, taking as long as the devices do (see sensors.simulators). In replay
+    mode (enable_replay) traces of recorded sessions are played back instead, and in recording mode
+    (enable_recording) the raw readings of the drivers are recorded to traces (see sensors.trace).
+
+    In worker mode (enable_workers) drivers are run in acquisition worker processes, one per bus, and
+    get_driver returns readers of the samples they share instead (see sensors.bus_worker).
+
+    Example Usage:
+
+    ``>>> class Adc8Channel(SampledResource):``
+    ``...     mcp3008 = SharedDriver('mcp3008')``
+"""
+
+import importlib
+import inspect
+import logging
+import platform
+import threading
+import time
+
+from sensors.async_driver import AsyncDriver
+from sensors.async_driver import SPI_BUS, SHT15_BUS, SE10_BUS
+
+logger = logging.getLogger(__name__)
+
+# Driver name -> (module, driver class, mock class, bus)
+DRIVERS = {'mcp3008': ('sensors.mcp3008', 'MCP3008', 'MCP3008Mock', SPI_BUS),
+           'sht15': ('sensors.temp_sensor', 'WaitingSht15', 'WaitingSht15Mock', SHT15_BUS),
+           'se10': ('sensors.se10', 'Se10', 'Se10Mock', SE10_BUS)}
+
+# Driver name -> simulator class in sensors.simulators
+SIMULATORS = {'mcp3008': 'Mcp3008Simulator',
+              'sht15': 'Sht15Simulator',
+              'se10': 'Se10Simulator'}
+# Driver name -> (recording wrapper class, replay class) in sensors.trace
+TRACES = {'mcp3008': ('RecordingMcp3008', 'ReplayMcp3008'),
+          'sht15': ('RecordingSht15', 'ReplaySht15'),
+          'se10': ('RecordingSe10', 'ReplaySe10')}
+
+# Mock Classes since Raspberry Pi is running 32 bit operating system
+USE_MOCKS = platform.machine() == 'x86_64'
+
+_drivers = {}
+_options = {}
+_guard = threading.Lock()
+# BusSupervisor of the worker processes in worker mode, None when drivers run in the server process
+supervisor = None
+# Settings of the driver backends: 'simulation', 'replay' and 'recording', see enable_simulation, enable_replay
+#   and enable_recording; empty when drivers (or mocks) are used
+backend = {}
+# Driver name -> seconds spent importing and opening the driver
+load_times = {}
+
+
+def configure_driver(name, **options):
+    """
+    Set constructor options of a driver, e.g. SPI settings of the ADC
+
+    Options are passed to the constructor when the driver is loaded; a driver already loaded is
+        reconfigured with its configure method
+
+    :param str name: driver name, a key of DRIVERS
+    :param options: keyword arguments of the driver constructor
+    """
+    _options[name] = options
+    if name in _drivers:
+        # In worker mode, the reader restarts the worker with the new options
+        _drivers[name].driver.configure(**options)
+
+
+def enable_workers(settings=None):
+    """
+    Run drivers in acquisition worker processes; drivers already loaded stay in the server process
+
+    :param dict settings: driver name -> worker settings, see BusSupervisor
+    :return: (BusSupervisor) supervisor of the workers, to be scheduled on the event loop
+    """
+    global supervisor
+    from sensors.bus_worker import BusSupervisor
+
+    supervisor = BusSupervisor(settings)
+    return supervisor
+
+
+def enable_simulation(settings=None):
+    """
+    Use the simulators instead of the drivers; drivers already loaded are kept
+
+    :param dict settings: simulator options: options given directly (e.g. 'speedup') apply to all simulators
+        accepting them, options given under a driver name (e.g. 'sht15': {'failure_rate': 0.01}) to its
+        simulator only
+    """
+    backend['simulation'] = settings or {}
+
+
+def enable_replay(settings):
+    """
+    Replay recorded traces instead of using the drivers; drivers already loaded are kept
+
+    :param dict settings: replay options: 'path' of the traces (a directory, its newest trace of each driver
+        is used), 'speed' (1 for real time, 0 for as fast as possible) and 'loop'; options given under a
+        driver name (e.g. 'sht15': {'path': 'sht15.trace'}) apply to its replay only
+    """
+    backend['replay'] = settings
+
+
+def enable_recording(path):
+    """
+    Record the raw readings of the drivers (or their mocks, simulators or replays) to traces
+
+    :param str path: directory of the traces, one new trace per driver and process
+    """
+    backend['recording'] = path
+
+
+def driver_settings(settings, name, cls):
+    """
+    Get the options of a driver out of backend settings
+
+    Options given directly are shared by drivers of different classes, so each only gets those its
+        constructor accepts; options given under its name must all be accepted
+
+    :param dict settings: options given directly, for all drivers, and dicts of options by driver name
+    :param str name: driver name, a key of DRIVERS
+    :param type cls: class the options are for
+    :return: (dict) options of the driver
+    :raises ValueError: option under the driver name not accepted by the class
+    """
+    accepted = [parameter.name for parameter in inspect.signature(cls).parameters.values()
+                if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)]
+    options = {key: value for key, value in settings.items() if not isinstance(value, dict) and key in accepted}
+    unknown = sorted(set(settings.get(name, {})) - set(accepted))
+    if unknown:
+        raise ValueError("Unknown {} options of {}: {}".format(name, cls.__name__, ', '.join(unknown)))
+    options.update(settings.get(name, {}))
+    return options
+
+
+def create_driver(name, options, backend=None):
+    """
+    Import the module of a driver and open the device, or its mock, simulator or replay
+
+    :param str name: driver name, a key of DRIVERS
+    :param dict options: keyword arguments of the driver constructor
+    :param dict backend: backend settings (see the backend attribute), None to use the driver or mock
+    :return: driver object
+    """
+    backend = backend or {}
+    if 'replay' in backend:
+        from sensors import trace
+
+        cls = getattr(trace, TRACES[name][1])
+        settings = driver_settings(backend['replay'], name, cls)
+        settings.update(options)
+        driver = cls(**settings)
+    elif 'simulation' in backend:
+        from sensors import simulators
+
+        cls = getattr(simulators, SIMULATORS[name])
+        settings = driver_settings(backend['simulation'], name, cls)
+        settings.update(options)
+        driver = cls(**settings)
+    else:
+        module_name, class_name, mock_name, _ = DRIVERS[name]
+        module = importlib.import_module(module_name)
+        driver = getattr(module, mock_name if USE_MOCKS else class_name)(**options)
+
+    if 'recording' in backend:
+        from sensors import trace
+
+        driver = getattr(trace, TRACES[name][0])(driver, trace.TraceWriter.create(backend['recording'], name))
+    return driver
+
+
+def get_driver(name):
+    """
+    Get the shared driver, importing its module and opening the device on first use
+
+    :param str name: driver name, a key of DRIVERS
+    :return: (AsyncDriver) driver wrapped for use from the event loop
+    :raises KeyError: unknown driver name
+    """
+    with _guard:
+        if name not in _drivers:
+            bus = DRIVERS[name][3]
+            start = time.perf_counter()
+            if supervisor is not None:
+                driver = supervisor.reader(name, _options.get(name, {}), backend)
+            else:
+                driver = create_driver(name, _options.get(name, {}), backend)
+            _drivers[name] = AsyncDriver(driver, bus)
+            load_times[name] = time.perf_counter() - start
+            logger.info("Loaded driver {} in {:.3f} s".format(type(driver).__name__, load_times[name]))
+        return _drivers[name]
+
+
+class SharedDriver(object):
+    """
+    Class attribute resolving to a shared driver on first access, from the class or any instance
+    """
+
+    def __init__(self, name):
+        """
+        Constructor of the attribute
+
+        :param str name: driver name, a key of DRIVERS
+        """
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return get_driver(self.name)
@@ -12,14 +12,81 @@
 
 import platform
 
+# Default SPI settings, MCP3008 supports up to 1.35MHz clock at 2.7V
+SPI_MAX_SPEED_HZ = 1000000
+SPI_MODE = 0
+
+# Accelerometer channels of x, y, z axis
+ACC_CHANNELS = (0, 1, 2)
+# Digital data received is in range 0~1023:
+# Reference point zero acceleration on x, y, z axis,
+#   number below reference point represents negative acceleration
+ZERO_G_REF = [512, 502, 522]
+# delta per g (m/s^2)
+DELTA_PER_G = [102, 104, 102]
+
+
+def convert_raw_to_g(raw_acc, axis):
+    """
+    Algorithm to convert ADC raw reading to acceleration in units of g (9.8m/s^2)
+
+    Does not need the hardware, so it is shared by the driver, its mock and streamed readings
+
+    :param int raw_acc: raw ADC channel reading (0~1023)
+    :param int axis: axis this data corresponds to (x, y or z)
+    :return: (float) acceleration of indicated axis in units of g
+    """
+    return (float(raw_acc - ZERO_G_REF[axis])) / DELTA_PER_G[axis]
+
 if platform.machine() != 'x86_64':
     import spidev
 
     class SPIDevice(object):
         """
         Base class for a generic SPI device
+
+        The SPI device is opened once and kept open for the lifetime of the process; instances
+            addressing the same bus and chip select share one session
         """
-        spi = spidev.SpiDev()
+
+        # (bus, chip select) -> opened spidev.SpiDev
+        _sessions = {}
+
+        def __init__(self, bus, device, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+            """
+            Constructor opening (or reusing) the SPI session of given bus and chip select
+
+            :param int bus: SPI bus number
+            :param int device: chip select of the device on the bus
+            :param int max_speed_hz: SPI clock speed in Hz
+            :param int mode: SPI mode (clock polarity and phase, 0~3)
+            """
+            key = (bus, device)
+            if key not in self._sessions:
+                spi = spidev.SpiDev()
+                spi.open(bus, device)
+                self._sessions[key] = spi
+            self.spi = self._sessions[key]
+            self.configure(max_speed_hz, mode)
+
+        def configure(self, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+            """
+            Change settings of the open SPI session
+
+            :param int max_speed_hz: SPI clock speed in Hz
+            :param int mode: SPI mode (clock polarity and phase, 0~3)
+            """
+            self.spi.max_speed_hz = max_speed_hz
+            self.spi.mode = mode
+
+        def close(self):
+            """
+            Close the SPI session, which is shared with all devices on the same bus and chip select
+            """
+            for key, spi in list(self._sessions.items()):
+                if spi is self.spi:
+                    del self._sessions[key]
+            self.spi.close()
 
     class MCP3008(SPIDevice):
         """
@@ -55,12 +122,21 @@ if platform.machine() != 'x86_64':
         JOYSTICK_LR_CH = MCP3008_CH3
         JOYSTICK_UD_CH = MCP3008_CH4
 
-        # Digital data received is in range 0~1023:
-        # Reference point zero acceleration on x, y, z axis,
-        #   number below reference point represents negative acceleration
-        ZERO_G_REF = [512, 502, 522]
-        # delta per g (m/s^2)
-        DELTA_PER_G = [102, 104, 102]
+        def __init__(self, bus=0, device=MCP3008_CS0, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+            """
+            Constructor of MCP3008 driver, opening the SPI session used by all later readings
+
+            :param int bus: SPI bus number
+            :param int device: chip select the MCP3008 is connected to
+            :param int max_speed_hz: SPI clock speed in Hz
+            :param int mode: SPI mode (clock polarity and phase, 0~3)
+            """
+            super(MCP3008, self).__init__(bus, device, max_speed_hz, mode)
+
+            # 3-byte command to read a 10 bit data from MCP3008:
+            # 1st byte contains only Start Bit, then operation mode and channel select
+            self._commands = [[self.MCP3008_START, (self.MCP3008_SINGLE + channel) << 4, 0]
+                              for channel in range(8)]
 
         def _read_channel_raw(self, channel):
             """
@@ -69,17 +145,11 @@ if platform.machine() != 'x86_64':
             :param int channel: channel to read from (0~7)
             :return: (int) raw data reading from channel (0~1023)
             """
-            self.spi.open(0, self.MCP3008_CS0)
-
-            # 3-byte command to read a 10 bit data from MCP3008:
-            # 1st byte contains only Start Bit, then operation mode and channel select
-            adc = self.spi.xfer2([self.MCP3008_START, (self.MCP3008_SINGLE + channel) << 4, 0])
+            # xfer2 overwrites its argument with received bytes, hence the copy
+            adc = self.spi.xfer2(list(self._commands[channel]))
 
             # last 10 bits out of 3 bytes are received data
-            data = ((adc[1] & 0x03) << 8) + adc[2]
-
-            self.spi.close()
-            return data
+            return ((adc[1] & 0x03) << 8) + adc[2]
 
         def _convert_raw_to_g(self, raw_acc, axis):
             """
@@ -89,7 +159,7 @@ if platform.machine() != 'x86_64':
             :param int axis: axis this data corresponds to (x, y or z)
             :return: (float) acceleration of indicated axis in units of g
             """
-            return (float(raw_acc - self.ZERO_G_REF[axis])) / self.DELTA_PER_G[axis]
+            return convert_raw_to_g(raw_acc, axis)
 
         def read_channel_raw(self, channel):
             """
@@ -100,6 +170,25 @@ if platform.machine() != 'x86_64':
             """
             return self._read_channel_raw(channel)
 
+        def scan(self, channels):
+            """
+            Read raw data of several channels back to back on the open SPI session
+
+            MCP3008 only starts a new conversion on a falling edge of chip select, so each channel
+                still needs its own 3-byte transfer; no open/close happens in between
+
+            :param channels: channels to read from (0~7 each)
+            :type channels: list of int
+            :return: (list of int) raw data readings in the order of channels (0~1023 each)
+            """
+            xfer2 = self.spi.xfer2
+            commands = self._commands
+            data = []
+            for channel in channels:
+                adc = xfer2(list(commands[channel]))
+                data.append(((adc[1] & 0x03) << 8) + adc[2])
+            return data
+
         # FIXME: This hierarchy may have some issues. Accelerometer device should be an individual class /
         #       based on MCP3008 channels
         def acceleration(self):
@@ -108,10 +197,11 @@ if platform.machine() != 'x86_64':
 
             :return: (float, float, float) 3 acceleration readings in units of g
             """
+            raw_x, raw_y, raw_z = self.scan((self.ACC_X_CH, self.ACC_Y_CH, self.ACC_Z_CH))
             # Raw data is converted to g (m/s^2) before output
-            x = self._convert_raw_to_g(self._read_channel_raw(self.ACC_X_CH), self.AXIS_X)
-            y = self._convert_raw_to_g(self._read_channel_raw(self.ACC_Y_CH), self.AXIS_Y)
-            z = self._convert_raw_to_g(self._read_channel_raw(self.ACC_Z_CH), self.AXIS_Z)
+            x = self._convert_raw_to_g(raw_x, self.AXIS_X)
+            y = self._convert_raw_to_g(raw_y, self.AXIS_Y)
+            z = self._convert_raw_to_g(raw_z, self.AXIS_Z)
             return x, y, z
 
         def joystick(self):
@@ -120,8 +210,7 @@ if platform.machine() != 'x86_64':
 
             :return: (int, int) relative positions of two axis of the joystick
             """
-            leftright = self._read_channel_raw(self.JOYSTICK_LR_CH)
-            updown = self._read_channel_raw(self.JOYSTICK_UD_CH)
+            leftright, updown = self.scan((self.JOYSTICK_LR_CH, self.JOYSTICK_UD_CH))
             return leftright, updown
 
 
@@ -141,6 +230,49 @@ class MCP3008Mock():
     leftright = 516
     updown = 510
 
+    def __init__(self, bus=0, device=0, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+        """
+        Simulate constructor of MCP3008 class, no SPI session is opened
+
+        :param int bus: SPI bus number
+        :param int device: chip select the MCP3008 is connected to
+        :param int max_speed_hz: SPI clock speed in Hz
+        :param int mode: SPI mode (clock polarity and phase, 0~3)
+        """
+        self.configure(max_speed_hz, mode)
+        # Iterator of recorded or synthetic samples replayed by scan, None for random values
+        self.source = None
+        self.source_channels = ()
+
+    def configure(self, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+        """
+        Simulate configure method of MCP3008 class
+
+        :param int max_speed_hz: SPI clock speed in Hz
+        :param int mode: SPI mode (clock polarity and phase, 0~3)
+        """
+        self.max_speed_hz = max_speed_hz
+        self.mode = mode
+
+    def close(self):
+        """
+        Simulate close method of MCP3008 class
+        """
+        pass
+
+    def set_source(self, samples, channels=ACC_CHANNELS):
+        """
+        Replay given samples through scan, e.g. a synthetic earthquake trace; random values are returned
+            again once the samples are exhausted
+
+        :param samples: raw counts (0~1023), one tuple per scan with one count per channel in channels
+        :type samples: iterable of tuple of int
+        :param channels: channels the counts belong to; other channels keep returning random values
+        :type channels: tuple of int
+        """
+        self.source = iter(samples)
+        self.source_channels = tuple(channels)
+
     def read_channel_raw(self, channel):
         """
         Simulate read_channel_raw method of MCP3008 class with randomly generated values
@@ -152,6 +284,24 @@ class MCP3008Mock():
         self.adc[2] = self.random.randint(0, 0xff)
         return ((self.adc[1] & 0x03) << 8) + self.adc[2]
 
+    def scan(self, channels):
+        """
+        Simulate scan method of MCP3008 class with randomly generated values
+
+        :param channels: channels to read from (0~7 each)
+        :type channels: list of int
+        :return: (list of int) simulated channel readings (0~1023 each)
+        """
+        if self.source is not None:
+            try:
+                counts = dict(zip(self.source_channels, next(self.source)))
+            except StopIteration:
+                self.source = None
+            else:
+                return [counts[channel] if channel in counts else self.read_channel_raw(channel)
+                        for channel in channels]
+        return [self.read_channel_raw(channel) for channel in channels]
+
     def acceleration(self):
         """
         Simulate acceleration method of MCP3008 class with randomly generated values
@@ -0,0 +1,341 @@
+"""
+    Created on October 18, 2026
+
+    This script provides timing-faithful simulators of the sensor hardware, standing in for the drivers
+
+    Unlike the mocks, which return random numbers instantly, the simulators take as long as the devices do
+    and block the calling thread meanwhile (sleeping, so other threads run, as during real SPI/GPIO I/O):
+        MCP3008: one 3-byte SPI transfer per channel at the configured clock, plus the ioctl overhead
+        SHT15: at least 1 s between two measurements (as enforced by WaitingSht1x), conversions of up to
+            320 ms (14-bit temperature) and 80 ms (12-bit humidity) polled every 10 ms, plus bit-banging
+        SE-10: a GPIO read; motion comes as random events holding the output high for a while
+    Readings are plausible signals with sensor noise (gravity on the z axis, slowly drifting temperature and
+    humidity), and each simulator injects the failures of its device at a configurable rate. All durations
+    are divided by a speed-up factor, so long runs can be compressed while keeping the relative costs.
+
+    Example Usage:
+
+    ``>>> sht15 = Sht15Simulator(speedup=10, failure_rate=0.01)``
+    ``>>> temperature, humidity = sht15.read_temperature_and_Humidity()``
+
+    Python3.4 is required
+"""
+
+import errno
+import math
+import random
+import time
+
+from sensors.mcp3008 import MCP3008Mock, SPI_MAX_SPEED_HZ, SPI_MODE, ACC_CHANNELS, ZERO_G_REF, DELTA_PER_G
+from sensors.mcp3008 import convert_raw_to_g
+from sensors.temp_sensor import calculate_dew_point
+
+# Seconds of kernel and spidev overhead of one SPI transfer on a Raspberry Pi
+SPI_TRANSFER_OVERHEAD = 40e-6
+# SHT1x timing: minimum spacing of measurements, conversion times (typical, maximum) of 14-bit temperature
+#   and 12-bit humidity, polling interval of the driver while waiting, and bit-banging of one measurement
+SHT15_SPACING = 1.0
+SHT15_TEMPERATURE_CONVERSION = (0.21, 0.32)
+SHT15_HUMIDITY_CONVERSION = (0.055, 0.08)
+SHT15_POLL_INTERVAL = 0.01
+SHT15_TRANSFER_TIME = 0.004
+# Seconds the SHT1x driver polls before giving up on a conversion
+SHT15_TIMEOUT = 1.0
+# Seconds of one GPIO read through RPi.GPIO
+GPIO_READ_TIME = 50e-6
+
+
+class DeviceSimulator(object):
+    """
+    Parent of the simulators: simulated clock, delays, random source and failure injection
+    """
+
+    def __init__(self, speedup=1.0, failure_rate=0.0, seed=None):
+        """
+        Constructor of a simulator
+
+        :param float speedup: factor dividing all durations of the device
+        :param float failure_rate: probability of a failure of each transaction (0~1)
+        :param int seed: seed of the random source, None for a random seed
+        """
+        if speedup <= 0:
+            raise ValueError("speedup must be positive")
+        self.speedup = speedup
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self._start = time.monotonic()
+        # Number of transactions and of injected failures
+        self.transactions = 0
+        self.failures = 0
+
+    def elapsed(self):
+        """
+        Get simulated time since the simulator was created
+
+        :return: (float) simulated seconds
+        """
+        return (time.monotonic() - self._start) * self.speedup
+
+    def delay(self, seconds):
+        """
+        Block for a duration of the device
+
+        :param float seconds: simulated seconds
+        """
+        if seconds > 0:
+            time.sleep(seconds / self.speedup)
+
+    def fails(self):
+        """
+        Account for one transaction and decide whether it fails
+
+        :return: (bool) transaction fails
+        """
+        self.transactions += 1
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.failures += 1
+            return True
+        return False
+
+
+class Mcp3008Simulator(MCP3008Mock, DeviceSimulator):
+    """
+    Simulator of the MCP3008 ADC with the accelerometer (channels 0~2) and joystick (channels 3, 4)
+    """
+
+    def __init__(self, bus=0, device=0, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE, speedup=1.0,
+                 failure_rate=0.0, seed=None, noise=2.0, glitch_rate=0.0):
+        """
+        Constructor of the simulator, taking the options of MCP3008
+
+        :param int bus: SPI bus number
+        :param int device: chip select the MCP3008 is connected to
+        :param int max_speed_hz: SPI clock speed in Hz, setting the transfer time
+        :param int mode: SPI mode (clock polarity and phase, 0~3)
+        :param float speedup: factor dividing all durations of the device
+        :param float failure_rate: probability of an SPI transfer failing with OSError (EIO)
+        :param int seed: seed of the random source, None for a random seed
+        :param float noise: standard deviation of the readings in counts
+        :param float glitch_rate: probability of a reading stuck at a rail (0 or 1023), as with a loose wire
+        """
+        MCP3008Mock.__init__(self, bus, device, max_speed_hz, mode)
+        DeviceSimulator.__init__(self, speedup, failure_rate, seed)
+        self.noise = noise
+        self.glitch_rate = glitch_rate
+        # Resting level of every channel: accelerometer at 1 g on z, joystick centered, others mid-scale
+        self.levels = [ZERO_G_REF[0], ZERO_G_REF[1], ZERO_G_REF[2] + DELTA_PER_G[2], 516, 510, 512, 512, 512]
+
+    def transfer_time(self):
+        """
+        Get duration of one 3-byte SPI transfer
+
+        :return: (float) seconds
+        """
+        return 24.0 / self.max_speed_hz + SPI_TRANSFER_OVERHEAD
+
+    def _convert(self, channel):
+        """
+        Simulate one conversion
+
+        :param int channel: channel to read from (0~7)
+        :return: (int) reading (0~1023)
+        :raises OSError: injected SPI failure
+        """
+        if self.fails():
+            raise OSError(errno.EIO, "Simulated SPI transfer failure")
+        if self.glitch_rate and self.random.random() < self.glitch_rate:
+            return self.random.choice((0, 1023))
+        return min(max(int(round(self.random.gauss(self.levels[channel], self.noise))), 0), 1023)
+
+    def read_channel_raw(self, channel):
+        """
+        Simulate read_channel_raw method of MCP3008 class: one SPI transfer
+
+        :param int channel: channel to read from (0~7)
+        :return: (int) simulated channel reading (0~1023)
+        """
+        self.delay(self.transfer_time())
+        return self._convert(channel)
+
+    def scan(self, channels):
+        """
+        Simulate scan method of MCP3008 class: one SPI transfer per channel, replayed samples first if a source
+            is set
+
+        :param channels: channels to read from (0~7 each)
+        :type channels: list of int
+        :return: (list of int) simulated channel readings (0~1023 each)
+        """
+        self.delay(len(channels) * self.transfer_time())
+        counts = {}
+        if self.source is not None:
+            try:
+                counts = dict(zip(self.source_channels, next(self.source)))
+            except StopIteration:
+                self.source = None
+        return [counts[channel] if channel in counts else self._convert(channel) for channel in channels]
+
+    def acceleration(self):
+        """
+        Simulate acceleration method of MCP3008 class
+
+        :return: (float, float, float) simulated 3 acceleration readings in units of g
+        """
+        return tuple(convert_raw_to_g(raw, axis) for axis, raw in enumerate(self.scan(ACC_CHANNELS)))
+
+    def joystick(self):
+        """
+        Simulate joystick method of MCP3008 class
+
+        :return: (int, int) simulated relative positions of two axis of the joystick
+        """
+        leftright, updown = self.scan((3, 4))
+        return leftright, updown
+
+
+class Sht15Simulator(DeviceSimulator):
+    """
+    Simulator of the SHT15 hygrothermo sensor behind WaitingSht15
+    """
+
+    def __init__(self, dataPin=None, sckPin=None, speedup=1.0, failure_rate=0.0, seed=None,
+                 temperature=21.0, humidity=45.0, noise=0.02):
+        """
+        Constructor of the simulator, taking the options of WaitingSht15
+
+        :param int dataPin: unused, as the GPIO pins of WaitingSht15
+        :param int sckPin: unused, as the GPIO pins of WaitingSht15
+        :param float speedup: factor dividing all durations of the device
+        :param float failure_rate: probability of a conversion never completing, raising SystemError after the
+            driver's polling timeout as WaitingSht15 does
+        :param int seed: seed of the random source, None for a random seed
+        :param float temperature: initial temperature in Celsius degree
+        :param float humidity: initial relative humidity in percentage
+        :param float noise: standard deviation of the temperature readings in Celsius degree (five times as much
+            for humidity, in percentage)
+        """
+        DeviceSimulator.__init__(self, speedup, failure_rate, seed)
+        self.temperature = temperature
+        self.humidity = humidity
+        self.noise = noise
+        self._last_measurement = -SHT15_SPACING
+        self._last_drift = 0.0
+
+    def _wait(self):
+        """
+        Wait until SHT15_SPACING seconds passed since the previous measurement, as WaitingSht1x does
+        """
+        remaining = SHT15_SPACING - (self.elapsed() - self._last_measurement)
+        self.delay(remaining)
+        self._last_measurement = self.elapsed()
+
+    def _drift(self):
+        """
+        Let temperature and humidity drift as a random walk in simulated time
+        """
+        now = self.elapsed()
+        scale = math.sqrt(max(now - self._last_drift, 0.0))
+        self._last_drift = now
+        self.temperature = min(max(self.temperature + self.random.gauss(0, 0.01) * scale, -40.0), 123.8)
+        self.humidity = min(max(self.humidity + self.random.gauss(0, 0.03) * scale, 0.0), 100.0)
+
+    def _measure(self, conversion):
+        """
+        Simulate one measurement: command, conversion polled every SHT15_POLL_INTERVAL, then data transfer
+
+        :param conversion: (typical, maximum) conversion time in seconds
+        :type conversion: tuple of float
+        :raises SystemError: injected conversion timeout
+        """
+        if self.fails():
+            self.delay(SHT15_TRANSFER_TIME + SHT15_TIMEOUT)
+            raise SystemError("Simulated SHT15 conversion timeout")
+        duration = self.random.uniform(*conversion)
+        polls = math.ceil(duration / SHT15_POLL_INTERVAL)
+        self.delay(SHT15_TRANSFER_TIME + polls * SHT15_POLL_INTERVAL)
+        self._drift()
+
+    def read_temperature_C(self):
+        """
+        Simulate read_temperature_C method of WaitingSht15 class
+
+        :return: (float) temperature reading in Celsius degree
+        """
+        self._wait()
+        self._measure(SHT15_TEMPERATURE_CONVERSION)
+        return round(self.temperature + self.random.gauss(0, self.noise), 2)
+
+    def _read_humidity(self):
+        self._wait()
+        self._measure(SHT15_HUMIDITY_CONVERSION)
+        return min(max(round(self.humidity + self.random.gauss(0, 5 * self.noise), 2), 0.0), 100.0)
+
+    def read_humidity(self):
+        """
+        Simulate read_humidity method of WaitingSht15 class: a temperature measurement (for the temperature
+            correction), then a humidity measurement
+
+        :return: (float) humidity in percentage
+        """
+        self.read_temperature_C()
+        return self._read_humidity()
+
+    def read_temperature_and_Humidity(self):
+        """
+        Simulate read_temperature_and_Humidity method of WaitingSht15 class
+
+        :return: (float, float) temperature in Celsius, and humidity in percentage
+        """
+        temperature = self.read_temperature_C()
+        return temperature, self._read_humidity()
+
+    def calculate_dew_point(self, temperature, humidity):
+        """
+        Dew point calculation with temperature and humidity reading
+
+        :param float temperature: temperature in Celsius degree
+        :param float humidity: humidity in percentage
+        :return: (float) dew point in Celsius degree
+        """
+        return calculate_dew_point(temperature, humidity)
+
+
+class Se10Simulator(DeviceSimulator):
+    """
+    Simulator of the SE-10 PIR motion sensor
+    """
+
+    def __init__(self, gpio=None, gpioMode=None, speedup=1.0, failure_rate=0.0, seed=None, motion_rate=0.05,
+                 hold_time=2.0):
+        """
+        Constructor of the simulator, taking the options of Se10
+
+        :param int gpio: unused, as the GPIO pin of Se10
+        :param int gpioMode: unused, as the GPIO mode of Se10
+        :param float speedup: factor dividing all durations of the device
+        :param float failure_rate: probability of a GPIO read raising RuntimeError, as RPi.GPIO does without access
+        :param int seed: seed of the random source, None for a random seed
+        :param float motion_rate: motion events per second (Poisson arrivals)
+        :param float hold_time: seconds the output stays high after a motion event
+        """
+        DeviceSimulator.__init__(self, speedup, failure_rate, seed)
+        self.motion_rate = motion_rate
+        self.hold_time = hold_time
+        self._next_motion = self.random.expovariate(motion_rate) if motion_rate > 0 else float('inf')
+        self._motion_until = -1.0
+
+    def has_motion(self):
+        """
+        Simulate has_motion method of Se10 class: one GPIO read
+
+        :return: (bool) presence of motion
+        :raises RuntimeError: injected GPIO failure
+        """
+        self.delay(GPIO_READ_TIME)
+        if self.fails():
+            raise RuntimeError("Simulated GPIO read failure")
+        now = self.elapsed()
+        while self._next_motion <= now:
+            self._motion_until = max(self._motion_until, self._next_motion + self.hold_time)
+            self._next_motion += self.random.expovariate(self.motion_rate)
+        return now < self._motion_until
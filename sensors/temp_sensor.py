@@ -34,6 +34,70 @@ import math
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+# Lowest humidity in percentage used for the dew point; the linear conversion of the SHT1x gives values down
+#   to about -2 % for the driest air, where the logarithm of the formula is undefined
+MIN_DEW_POINT_HUMIDITY = 0.01
+
+
+def calculate_dew_point(temperature, humidity):
+    """
+    Dew point calculation with temperature and humidity reading (Magnus formula, SHT1x datasheet)
+
+    Does not need the hardware, so it is shared by the driver and its mock
+
+    :param float temperature: temperature in Celsius degree
+    :param float humidity: humidity in percentage, raised to MIN_DEW_POINT_HUMIDITY if lower
+    :return: (float) dew point in Celsius degree
+    """
+    humidity = max(humidity, MIN_DEW_POINT_HUMIDITY)
+    if temperature > 0:
+        tn = 243.12
+        m = 17.62
+    else:
+        tn = 272.62
+        m = 22.46
+    return tn * (math.log(humidity / 100.0) + (m * temperature) / (tn + temperature)) / \
+                (m - math.log(humidity / 100.0) - m * temperature / (tn + temperature))
+
+
+# Conversion coefficients from SHT15 datasheet
+D1 = -40.0          # for 14 Bit @ 5V
+D2 = 0.01           # for 14 Bit DEGC
+
+C1 = -2.0468        # for 12 Bit
+C2 = 0.0367         # for 12 Bit
+C3 = -0.0000015955  # for 12 Bit
+T1 = 0.01           # for 14 Bit @ 5V
+T2 = 0.00008        # for 14 Bit @ 5V
+
+
+def convert_temperature(raw_temperature):
+    """
+    Convert a raw 14-bit temperature word of the SHT1x into Celsius degree
+
+    Does not need the hardware, so traces of raw words can be replayed without it
+
+    :param int raw_temperature: raw temperature reading
+    :return: (float) temperature in Celsius degree
+    """
+    return raw_temperature * D2 + D1
+
+
+def convert_humidity(raw_humidity, temperature):
+    """
+    Convert a raw 12-bit humidity word of the SHT1x into percentage with temperature correction
+
+    :param int raw_humidity: raw humidity reading
+    :param float temperature: temperature in Celsius degree
+    :return: (float) humidity in percentage
+    """
+    # Apply linear conversion to raw value
+    linearHumidity = C1 + C2 * raw_humidity + C3 * raw_humidity * raw_humidity
+    # Correct humidity value for current temperature
+    return (temperature - 25.0) * (T1 + T2 * raw_humidity) + linearHumidity
+
+
 import platform
 if platform.machine() != 'x86_64':
     try:
@@ -50,16 +114,6 @@ if platform.machine() != 'x86_64':
         import RPiMock.GPIO as GPIO
         traceback.print_exc(file=sys.stdout)
 
-    # Conversion coefficients from SHT15 datasheet
-    D1 = -40.0          # for 14 Bit @ 5V
-    D2 = 0.01           # for 14 Bit DEGC
-
-    C1 = -2.0468        # for 12 Bit
-    C2 = 0.0367         # for 12 Bit
-    C3 = -0.0000015955  # for 12 Bit
-    T1 = 0.01           # for 14 Bit @ 5V
-    T2 = 0.00008        # for 14 Bit @ 5V
-
     SHT15_PIN_SDA = 11  # Pin 11 = GPIO 17
     SHT15_PIN_SCLK = 7  # PIn 7 = GPIO 4
 
@@ -197,10 +251,7 @@ if platform.machine() != 'x86_64':
             self.__skipCrc()
             GPIO.cleanup()
 
-            # Apply linear conversion to raw value
-            linearHumidity = C1 + C2 * rawHumidity + C3 * rawHumidity * rawHumidity
-            # Correct humidity value for current temperature
-            return (temperature - 25.0 ) * (T1 + T2 * rawHumidity) + linearHumidity
+            return convert_humidity(rawHumidity, temperature)
 
         def read_temperature_C(self):
             """
@@ -216,7 +267,7 @@ if platform.machine() != 'x86_64':
             self.__skipCrc()
             GPIO.cleanup()
 
-            return rawTemperature * D2 + D1
+            return convert_temperature(rawTemperature)
 
         def read_humidity(self):
             """
@@ -231,16 +282,12 @@ if platform.machine() != 'x86_64':
         def calculate_dew_point(self, temperature, humidity):
             """
             Dew point calculation with temperature and humidity reading
-            # Don't know what this method should be used for, haven't really used it
+
+            :param float temperature: temperature in Celsius degree
+            :param float humidity: humidity in percentage
+            :return: (float) dew point in Celsius degree
             """
-            if temperature > 0:
-                tn = 243.12
-                m = 17.62
-            else:
-                tn = 272.62
-                m = 22.46
-            return tn * (math.log(humidity / 100.0) + (m * temperature) / (tn + temperature)) / \
-                        (m - math.log(humidity / 100.0) - m * temperature / (tn + temperature))
+            return calculate_dew_point(temperature, humidity)
 
     class WaitingSht1x(Sht1x):
         """
@@ -356,3 +403,13 @@ class WaitingSht15Mock():
         """
         self.temperature = self.random.uniform(-40.0, 123.8)
         return self.temperature
+
+    def calculate_dew_point(self, temperature, humidity):
+        """
+        Same dew point calculation as calculate_dew_point method of WaitingSht15 class
+
+        :param float temperature: temperature in Celsius degree
+        :param float humidity: humidity in percentage
+        :return: (float) dew point in Celsius degree
+        """
+        return calculate_dew_point(temperature, humidity)
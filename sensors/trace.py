@@ -0,0 +1,608 @@
+"""
+    Created on October 18, 2026
+
+    This script provides the trace backend of the sensor drivers: recording of real sensor sessions, and
+    deterministic replay of them with the interfaces of the drivers
+
+    Recording wraps a driver (real, mock or simulator) and logs its raw readings with timestamps, one trace
+    file per driver: the counts of every MCP3008 channel read, the raw temperature and humidity words of the
+    SHT15 (the readings converted back, which gives the exact words of the real driver) and the edges of the
+    SE-10 output.
+
+    Replay reads a trace and returns the recorded readings in order, converted as the drivers do:
+        speed 1 (or any positive factor): readings are not returned before their recorded time (divided by
+            the speed), the first reading of the trace being due at the first read; the SE-10 returns the
+            level at that time
+        speed 0: as fast as possible; every read returns the next recorded reading, the SE-10 the next edge
+    So a replay returns the same sequence whenever and however fast it is read.
+
+    File layout:
+        header:  'PTRC', version byte, driver name length (varint), driver name (utf-8), start time (double,
+            seconds since the epoch, little endian)
+        records: microseconds since the previous record (the start for the first), tag and value, as varints
+    Tags are the channel of MCP3008 counts, the SHT1x command of SHT15 words and 0 for SE-10 levels, so a
+    record takes 3~6 bytes. A file cut short by a crash is read up to its last complete record.
+
+    Example Usage:
+
+    ``>>> adc = RecordingMcp3008(MCP3008(), TraceWriter.create('traces', 'mcp3008'))``
+    ``>>> replay = ReplayMcp3008('traces', speed=0)``
+    ``>>> x, y, z = replay.acceleration()``
+
+    Python3.4 is required
+"""
+
+import bisect
+import collections
+import glob
+import math
+import os
+import struct
+import threading
+import time
+
+from series_codec import write_varint, read_varint
+from sensors.mcp3008 import SPI_MAX_SPEED_HZ, SPI_MODE, ACC_CHANNELS, convert_raw_to_g
+from sensors.temp_sensor import calculate_dew_point, convert_temperature, convert_humidity, D1, D2, C1, C2, \
+    C3, T1, T2
+
+MAGIC = b'PTRC'
+VERSION = 1
+SUFFIX = '.trace'
+# Tags of the SHT15 words: SHT1x measurement commands
+TEMPERATURE_COMMAND = 0b00000011
+HUMIDITY_COMMAND = 0b00000101
+# Tag of the SE-10 levels
+MOTION_TAG = 0
+# Seconds between two flushes of a trace being recorded
+FLUSH_INTERVAL = 1.0
+
+_START = struct.Struct('<d')
+
+
+def raw_temperature(temperature):
+    """
+    Get the raw 14-bit temperature word of the SHT1x giving a temperature, inverse of convert_temperature
+
+    :param float temperature: temperature in Celsius degree
+    :return: (int) raw temperature word (0~16383)
+    """
+    return min(max(int(round((temperature - D1) / D2)), 0), 0x3fff)
+
+
+def raw_humidity(humidity, temperature):
+    """
+    Get the raw 12-bit humidity word of the SHT1x giving a humidity, inverse of convert_humidity
+
+    :param float humidity: humidity in percentage
+    :param float temperature: temperature in Celsius degree the humidity was corrected with
+    :return: (int) raw humidity word (0~4095)
+    """
+    # convert_humidity is a quadratic of the raw word; its increasing branch is the smaller root, as C3 < 0
+    a = C3
+    b = C2 + (temperature - 25.0) * T2
+    c = C1 + (temperature - 25.0) * T1 - humidity
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return 0xfff
+    return min(max(int(round((-b + math.sqrt(discriminant)) / (2 * a))), 0), 0xfff)
+
+
+def trace_file(path, name):
+    """
+    Find the trace of a driver
+
+    :param str path: trace file, or directory holding traces named by TraceWriter.create
+    :param str name: driver name, a key of drivers.DRIVERS
+    :return: (str) the file, or the newest trace of the driver in the directory
+    :raises FileNotFoundError: no trace of the driver in the directory
+    """
+    if not os.path.isdir(path):
+        return path
+    files = sorted(glob.glob(os.path.join(path, '{}-*{}'.format(name, SUFFIX))))
+    if not files:
+        raise FileNotFoundError("No {} trace in {}".format(name, path))
+    return files[-1]
+
+
+class TraceWriter(object):
+    """
+    Writer of the trace of one driver
+    """
+
+    def __init__(self, path, name, start=None):
+        """
+        Constructor of a writer, creating the file
+
+        :param str path: trace file
+        :param str name: driver name
+        :param float start: start time of the trace in seconds since the epoch, default now
+        """
+        self.path = path
+        self.records = 0
+        self._file = open(path, 'wb')
+        self._last = time.time() if start is None else start
+        self._flushed = time.monotonic()
+        # Driver calls of a bus are serialized, but recording wrappers may be called from any thread
+        self._lock = threading.Lock()
+
+        encoded = name.encode('utf-8')
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        write_varint(header, len(encoded))
+        header += encoded
+        header += _START.pack(self._last)
+        self._file.write(header)
+
+    @classmethod
+    def create(cls, directory, name):
+        """
+        Create a trace of a driver in a directory, named by driver, start time and process
+
+        :param str directory: directory of the traces, created if needed
+        :param str name: driver name
+        :return: (TraceWriter) writer of a new trace file
+        """
+        os.makedirs(directory, exist_ok=True)
+        file_name = '{}-{}-{}{}'.format(name, time.strftime('%Y%m%d-%H%M%S'), os.getpid(), SUFFIX)
+        return cls(os.path.join(directory, file_name), name)
+
+    def write(self, tag, value, timestamp=None):
+        """
+        Append one reading
+
+        :param int tag: channel, command or MOTION_TAG
+        :param int value: raw reading
+        :param float timestamp: time of the reading in seconds since the epoch, default now
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        record = bytearray()
+        with self._lock:
+            # Wall clock steps back are recorded as simultaneous readings
+            write_varint(record, max(int(round((timestamp - self._last) * 1e6)), 0))
+            self._last = max(timestamp, self._last)
+            write_varint(record, tag)
+            write_varint(record, value)
+            self._file.write(record)
+            self.records += 1
+            # Worker processes are terminated without closing their traces, so flush now and then
+            if time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+                self._file.flush()
+                self._flushed = time.monotonic()
+
+    def close(self):
+        """
+        Flush and close the file
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_trace(path):
+    """
+    Read a trace file
+
+    :param str path: trace file
+    :return: (str, float, list of (float, int, int)) driver name, start time, and timestamp, tag and value of
+        every record
+    :raises ValueError: not a trace file
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC) or data[len(MAGIC)] != VERSION:
+        raise ValueError("{} is not a version {} trace".format(path, VERSION))
+
+    length, offset = read_varint(data, len(MAGIC) + 1)
+    name = data[offset:offset + length].decode('utf-8')
+    offset += length
+    if len(data) < offset + _START.size:
+        raise ValueError("{} is not a version {} trace".format(path, VERSION))
+    start, = _START.unpack_from(data, offset)
+    offset += _START.size
+
+    records = []
+    micros = 0
+    try:
+        while offset < len(data):
+            delta, offset = read_varint(data, offset)
+            tag, offset = read_varint(data, offset)
+            value, offset = read_varint(data, offset)
+            micros += delta
+            records.append((start + micros / 1e6, tag, value))
+    except ValueError:
+        # Last record cut short
+        pass
+    return name, start, records
+
+
+class RecordingDriver(object):
+    """
+    Parent of the recording wrappers: other attributes are those of the wrapped driver
+    """
+
+    def __init__(self, driver, writer):
+        """
+        Constructor of a recording wrapper
+
+        :param driver: driver instance (e.g. MCP3008 or its mock or simulator)
+        :param TraceWriter writer: trace receiving the readings
+        """
+        self.driver = driver
+        self.writer = writer
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def close(self):
+        """
+        Close the driver and its trace
+        """
+        self.writer.close()
+        if hasattr(self.driver, 'close'):
+            self.driver.close()
+
+
+class RecordingMcp3008(RecordingDriver):
+    """
+    MCP3008 recording the count of every channel read
+    """
+
+    def read_channel_raw(self, channel):
+        """
+        Read a channel and record its count
+
+        :param int channel: channel to read from (0~7)
+        :return: (int) raw data reading from channel (0~1023)
+        """
+        count = self.driver.read_channel_raw(channel)
+        self.writer.write(channel, count)
+        return count
+
+    def scan(self, channels):
+        """
+        Read several channels and record their counts with the same timestamp
+
+        :param channels: channels to read from (0~7 each)
+        :type channels: list of int
+        :return: (list of int) raw data readings in the order of channels (0~1023 each)
+        """
+        counts = self.driver.scan(channels)
+        timestamp = time.time()
+        for channel, count in zip(channels, counts):
+            self.writer.write(channel, count, timestamp)
+        return counts
+
+    def acceleration(self):
+        """
+        Acquire 3-axis acceleration readings, recording the counts
+
+        :return: (float, float, float) 3 acceleration readings in units of g
+        """
+        return tuple(convert_raw_to_g(raw, axis) for axis, raw in enumerate(self.scan(ACC_CHANNELS)))
+
+    def joystick(self):
+        """
+        Acquire 2-axis joystick relative position, recording the counts
+
+        :return: (int, int) relative positions of two axis of the joystick
+        """
+        leftright, updown = self.scan((3, 4))
+        return leftright, updown
+
+
+class RecordingSht15(RecordingDriver):
+    """
+    SHT15 recording the raw words of every measurement
+    """
+
+    def read_temperature_C(self):
+        """
+        Read temperature and record its raw word
+
+        :return: (float) temperature reading in Celsius degree
+        """
+        temperature = self.driver.read_temperature_C()
+        self.writer.write(TEMPERATURE_COMMAND, raw_temperature(temperature))
+        return temperature
+
+    def read_temperature_and_Humidity(self):
+        """
+        Read temperature and humidity and record their raw words
+
+        :return: (float, float) temperature in Celsius, and humidity in percentage
+        """
+        temperature, humidity = self.driver.read_temperature_and_Humidity()
+        timestamp = time.time()
+        self.writer.write(TEMPERATURE_COMMAND, raw_temperature(temperature), timestamp)
+        self.writer.write(HUMIDITY_COMMAND, raw_humidity(humidity, temperature), timestamp)
+        return temperature, humidity
+
+    def read_humidity(self):
+        """
+        Read humidity, with the temperature measurement WaitingSht15 makes for the correction, and record
+            both raw words
+
+        :return: (float) humidity in percentage
+        """
+        return self.read_temperature_and_Humidity()[1]
+
+
+class RecordingSe10(RecordingDriver):
+    """
+    SE-10 recording the edges of its output
+    """
+
+    def __init__(self, driver, writer):
+        """
+        Constructor of a recording wrapper
+
+        :param driver: Se10 instance or its mock or simulator
+        :param TraceWriter writer: trace receiving the edges
+        """
+        super(RecordingSe10, self).__init__(driver, writer)
+        self._level = None
+
+    def has_motion(self):
+        """
+        Get motion status, recording it when it changed (and on the first read)
+
+        :return: (bool) presence of motion
+        """
+        motion = self.driver.has_motion()
+        if motion != self._level:
+            self.writer.write(MOTION_TAG, int(motion))
+            self._level = motion
+        return motion
+
+
+class TraceReplay(object):
+    """
+    Recorded readings of one driver played back by tag, paced by the replay speed
+    """
+
+    def __init__(self, path, name, speed=1.0, loop=True):
+        """
+        Constructor of a replay, loading the trace
+
+        :param str path: trace file, or directory holding traces (the newest trace of the driver is used)
+        :param str name: driver name, a key of drivers.DRIVERS
+        :param float speed: replay speed factor, 0 for as fast as possible
+        :param bool loop: start over at the end of the trace, else raise EOFError
+        :raises ValueError: not a trace of the driver, or empty trace
+        """
+        if speed < 0:
+            raise ValueError("speed must not be negative")
+        self.path = trace_file(path, name)
+        recorded, self.start, records = read_trace(self.path)
+        if recorded != name:
+            raise ValueError("{} is a {} trace, not a {} trace".format(self.path, recorded, name))
+        if not records:
+            raise ValueError("{} holds no reading".format(self.path))
+        self.speed = speed
+        self.loop = loop
+        # Trace times are counted from the first reading; a lap of a looping replay spans the readings and
+        #   the mean interval between them, so that periodic readings keep their period across laps
+        first = records[0][0]
+        span = records[-1][0] - first
+        self.length = span + (span / (len(records) - 1) if len(records) > 1 and span > 0 else 1.0)
+        # Tag -> (trace times, values) of its readings
+        self.streams = collections.OrderedDict()
+        for timestamp, tag, value in records:
+            times, values = self.streams.setdefault(tag, ([], []))
+            times.append(timestamp - first)
+            values.append(value)
+        # Tag -> number of readings returned
+        self._positions = dict.fromkeys(self.streams, 0)
+        # Monotonic time of the first read
+        self._origin = None
+
+    def elapsed(self):
+        """
+        Get trace time of the replay: time since the first read multiplied by the speed
+
+        :return: (float) seconds since the first reading of the trace
+        """
+        if self._origin is None:
+            self._origin = time.monotonic()
+        return (time.monotonic() - self._origin) * self.speed
+
+    def next(self, tag):
+        """
+        Get the next reading of a tag, waiting for its time unless replaying as fast as possible
+
+        :param int tag: channel, command or MOTION_TAG
+        :return: (int) raw reading
+        :raises KeyError: no reading of the tag in the trace
+        :raises EOFError: end of the trace, without loop
+        """
+        if tag not in self.streams:
+            raise KeyError("No reading of {} in {}".format(tag, self.path))
+        times, values = self.streams[tag]
+        lap, index = divmod(self._positions[tag], len(values))
+        if lap and not self.loop:
+            raise EOFError("End of trace {}".format(self.path))
+        self._positions[tag] += 1
+        if self.speed:
+            delay = (times[index] + lap * self.length - self.elapsed()) / self.speed
+            if delay > 0:
+                time.sleep(delay)
+        return values[index]
+
+    def current(self, tag):
+        """
+        Get the last reading of a tag at the trace time of the replay; before its first reading in a lap, the
+            last one of the previous lap (the first one in the first lap)
+
+        :param int tag: channel, command or MOTION_TAG
+        :return: (int) raw reading
+        :raises KeyError: no reading of the tag in the trace
+        :raises EOFError: end of the trace, without loop
+        """
+        if tag not in self.streams:
+            raise KeyError("No reading of {} in {}".format(tag, self.path))
+        times, values = self.streams[tag]
+        lap, elapsed = divmod(self.elapsed(), self.length)
+        if lap and not self.loop:
+            raise EOFError("End of trace {}".format(self.path))
+        index = bisect.bisect_right(times, elapsed) - 1
+        if index < 0:
+            # Before the first reading of a lap the level of the previous lap holds
+            index = len(values) - 1 if lap else 0
+        return values[index]
+
+
+class ReplayMcp3008(object):
+    """
+    MCP3008 replaying a trace
+    """
+
+    def __init__(self, path, speed=1.0, loop=True, bus=0, device=0, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+        """
+        Constructor of the replay, taking the options of MCP3008
+
+        :param str path: trace file, or directory holding traces
+        :param float speed: replay speed factor, 0 for as fast as possible
+        :param bool loop: start over at the end of the trace, else raise EOFError
+        :param int bus: unused, as the SPI bus number of MCP3008
+        :param int device: unused, as the chip select of MCP3008
+        :param int max_speed_hz: unused, as the SPI clock speed of MCP3008
+        :param int mode: unused, as the SPI mode of MCP3008
+        """
+        self.replay = TraceReplay(path, 'mcp3008', speed, loop)
+        self.configure(max_speed_hz, mode)
+
+    def configure(self, max_speed_hz=SPI_MAX_SPEED_HZ, mode=SPI_MODE):
+        """
+        Replay configure method of MCP3008 class
+
+        :param int max_speed_hz: SPI clock speed in Hz
+        :param int mode: SPI mode (clock polarity and phase, 0~3)
+        """
+        self.max_speed_hz = max_speed_hz
+        self.mode = mode
+
+    def close(self):
+        """
+        Replay close method of MCP3008 class
+        """
+        pass
+
+    def read_channel_raw(self, channel):
+        """
+        Replay read_channel_raw method of MCP3008 class
+
+        :param int channel: channel to read from (0~7)
+        :return: (int) recorded channel reading (0~1023)
+        """
+        return self.replay.next(channel)
+
+    def scan(self, channels):
+        """
+        Replay scan method of MCP3008 class
+
+        :param channels: channels to read from (0~7 each)
+        :type channels: list of int
+        :return: (list of int) recorded channel readings (0~1023 each)
+        """
+        return [self.replay.next(channel) for channel in channels]
+
+    def acceleration(self):
+        """
+        Replay acceleration method of MCP3008 class
+
+        :return: (float, float, float) recorded 3 acceleration readings in units of g
+        """
+        return tuple(convert_raw_to_g(raw, axis) for axis, raw in enumerate(self.scan(ACC_CHANNELS)))
+
+    def joystick(self):
+        """
+        Replay joystick method of MCP3008 class
+
+        :return: (int, int) recorded relative positions of two axis of the joystick
+        """
+        leftright, updown = self.scan((3, 4))
+        return leftright, updown
+
+
+class ReplaySht15(object):
+    """
+    SHT15 replaying a trace
+    """
+
+    def __init__(self, path, speed=1.0, loop=True, dataPin=None, sckPin=None):
+        """
+        Constructor of the replay, taking the options of WaitingSht15
+
+        :param str path: trace file, or directory holding traces
+        :param float speed: replay speed factor, 0 for as fast as possible
+        :param bool loop: start over at the end of the trace, else raise EOFError
+        :param int dataPin: unused, as the GPIO pins of WaitingSht15
+        :param int sckPin: unused, as the GPIO pins of WaitingSht15
+        """
+        self.replay = TraceReplay(path, 'sht15', speed, loop)
+
+    def read_temperature_C(self):
+        """
+        Replay read_temperature_C method of WaitingSht15 class
+
+        :return: (float) recorded temperature in Celsius degree
+        """
+        return convert_temperature(self.replay.next(TEMPERATURE_COMMAND))
+
+    def read_temperature_and_Humidity(self):
+        """
+        Replay read_temperature_and_Humidity method of WaitingSht15 class
+
+        :return: (float, float) recorded temperature in Celsius, and humidity in percentage
+        """
+        temperature = self.read_temperature_C()
+        return temperature, convert_humidity(self.replay.next(HUMIDITY_COMMAND), temperature)
+
+    def read_humidity(self):
+        """
+        Replay read_humidity method of WaitingSht15 class
+
+        :return: (float) recorded humidity in percentage
+        """
+        return self.read_temperature_and_Humidity()[1]
+
+    def calculate_dew_point(self, temperature, humidity):
+        """
+        Dew point calculation with temperature and humidity reading
+
+        :param float temperature: temperature in Celsius degree
+        :param float humidity: humidity in percentage
+        :return: (float) dew point in Celsius degree
+        """
+        return calculate_dew_point(temperature, humidity)
+
+
+class ReplaySe10(object):
+    """
+    SE-10 replaying a trace
+    """
+
+    def __init__(self, path, speed=1.0, loop=True, gpio=None, gpioMode=None):
+        """
+        Constructor of the replay, taking the options of Se10
+
+        :param str path: trace file, or directory holding traces
+        :param float speed: replay speed factor, 0 for as fast as possible
+        :param bool loop: start over at the end of the trace, else raise EOFError
+        :param int gpio: unused, as the GPIO pin of Se10
+        :param int gpioMode: unused, as the GPIO mode of Se10
+        """
+        self.replay = TraceReplay(path, 'se10', speed, loop)
+
+    def has_motion(self):
+        """
+        Replay has_motion method of Se10 class: the level at the replay time, or the next edge when replaying
+            as fast as possible
+
+        :return: (bool) recorded presence of motion
+        """
+        if self.replay.speed:
+            return bool(self.replay.current(MOTION_TAG))
+        return bool(self.replay.next(MOTION_TAG))
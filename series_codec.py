@@ -0,0 +1,177 @@
+"""
+    Created on October 18, 2026
+
+    This is the delta/varint codec for series of readings, used for compressed segments of the
+    time-series store and for the delta content format of history responses
+
+    Readings of a sensor change slowly and are taken at nearly regular intervals, so a series is stored
+    column by column: timestamps (in milliseconds) as delta-of-delta, and every field as the difference
+    between consecutive values quantized to the field's number of decimals. Differences are zigzag
+    encoded and packed as varints, so a regular timestamp or an unchanged value costs one byte.
+
+    Layout:
+        header:  record count, field count, then per field: name length, name (utf-8), decimals
+        columns: timestamps, then one column per field, in the order of the header
+    Every number is a varint. A value column holds zigzag(delta) + 1 per record, 0 for a missing value.
+
+    Example Usage:
+
+    ``>>> encoded = encode_series([(time.time(), {'temperature': 21.5})], decimals=2)``
+    ``>>> samples = decode_series(encoded)``
+
+    Python3.4 is required
+"""
+
+import math
+
+# Timestamps are kept to the millisecond
+TIME_SCALE = 1000
+
+
+def zigzag(value):
+    """
+    Map a signed integer to an unsigned one, small magnitudes to small numbers
+
+    :param int value: signed integer
+    :return: (int) 0, -1, 1, -2, ... mapped to 0, 1, 2, 3, ...
+    """
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    """
+    Inverse of zigzag()
+
+    :param int value: unsigned integer
+    :return: (int) signed integer
+    """
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+def write_varint(buffer, value):
+    """
+    Append an unsigned integer as a varint, 7 bits per byte, least significant first
+
+    :param bytearray buffer: output
+    :param int value: unsigned integer
+    """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(buffer, offset):
+    """
+    Read a varint
+
+    :param buffer: input
+    :type buffer: bytes, bytearray or memoryview
+    :param int offset: position of the varint
+    :return: (int, int) value and position after the varint
+    :raises ValueError: buffer ends inside the varint
+    """
+    value = shift = 0
+    try:
+        while True:
+            byte = buffer[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value, offset
+            shift += 7
+    except IndexError:
+        raise ValueError("Truncated varint at {}".format(offset))
+
+
+def encode_series(samples, decimals=6):
+    """
+    Encode readings
+
+    :param samples: (timestamp in seconds since epoch, resource data) pairs in increasing timestamp order;
+        numeric (and boolean) fields of any reading are encoded, missing or non-finite values as missing
+    :type samples: list of (float, dict)
+    :param decimals: number of decimals kept, for all fields or per field name
+    :type decimals: int or dict
+    :return: (bytes) encoded series
+    """
+    fields = sorted({name for _, data in samples for name, value in data.items()
+                     if isinstance(value, (int, float))})
+    if not isinstance(decimals, dict):
+        decimals = dict.fromkeys(fields, decimals)
+
+    buffer = bytearray()
+    write_varint(buffer, len(samples))
+    write_varint(buffer, len(fields))
+    for field in fields:
+        name = field.encode('utf-8')
+        write_varint(buffer, len(name))
+        buffer += name
+        write_varint(buffer, decimals[field])
+
+    previous = delta = 0
+    for index, (timestamp, _) in enumerate(samples):
+        current = int(round(timestamp * TIME_SCALE))
+        if index == 0:
+            write_varint(buffer, zigzag(current))
+        else:
+            write_varint(buffer, zigzag(current - previous - delta))
+            delta = current - previous
+        previous = current
+
+    for field in fields:
+        scale = 10 ** decimals[field]
+        previous = 0
+        for _, data in samples:
+            value = data.get(field)
+            if value is None or not math.isfinite(value):
+                buffer.append(0)
+                continue
+            current = int(round(value * scale))
+            write_varint(buffer, zigzag(current - previous) + 1)
+            previous = current
+
+    return bytes(buffer)
+
+
+def decode_series(buffer, offset=0):
+    """
+    Decode readings encoded by encode_series()
+
+    :param buffer: encoded series
+    :type buffer: bytes, bytearray, memoryview or mmap
+    :param int offset: position of the series in buffer
+    :return: (list of (float, dict)) readings; missing values are left out of the resource data
+    :raises ValueError: buffer is truncated
+    """
+    count, offset = read_varint(buffer, offset)
+    n_fields, offset = read_varint(buffer, offset)
+    fields = []
+    for _ in range(n_fields):
+        length, offset = read_varint(buffer, offset)
+        name = bytes(buffer[offset:offset + length]).decode('utf-8')
+        offset += length
+        places, offset = read_varint(buffer, offset)
+        fields.append((name, 10 ** places))
+
+    timestamps = []
+    previous = delta = 0
+    for index in range(count):
+        value, offset = read_varint(buffer, offset)
+        if index == 0:
+            previous = unzigzag(value)
+        else:
+            delta += unzigzag(value)
+            previous += delta
+        timestamps.append(previous / TIME_SCALE)
+
+    samples = [(timestamp, {}) for timestamp in timestamps]
+    for name, scale in fields:
+        previous = 0
+        for _, data in samples:
+            value, offset = read_varint(buffer, offset)
+            if value:
+                previous += unzigzag(value - 1)
+                data[name] = previous / scale
+
+    return samples
@@ -13,15 +13,26 @@
     Python3.4 is required
 """
 
+import time
+
+# Start of the server, for reporting time to first response
+START_TIME = time.perf_counter()
+
 import logging
 import json
 
 import asyncio
 
 import aiocoap
-from aiocoap.resource import Site
 
 import resources as r
+import metrics
+from profiler import Profiler, DEFAULT_PATH, DEFAULT_DURATION, SAMPLING_INTERVAL
+from sensors import drivers
+from sensors.async_driver import AsyncDriver
+from store import TimeSeriesStore
+
+IMPORT_TIME = time.perf_counter()
 
 # logging setup
 logging.basicConfig(level=logging.INFO)
@@ -29,46 +40,87 @@ logging.getLogger('coap-server').setLevel(logging.DEBUG)
 # TODO: Add logging function to replace "print" in the code
 
 
+def log_flush_error(future):
+    """
+    Log the exception of a store flush run in an executor
+
+    :param asyncio.Future future: finished flush
+    """
+    if not future.cancelled() and future.exception() is not None:
+        logging.error("Failed to flush the store", exc_info=future.exception())
+
+
 def main():
     """
     Create resource tree from given configuration file
     """
 
-    root = Site()
+    root = r.SensorSite()
 
-    # default resources to add
-    root.add_resource('', r.RootResource(root))
-    root.add_resource(('.well-known', 'core'), r.CoreResource(root))
+    # default resources to add, which cannot be removed
+    root.add_resource('', r.RootResource(root), removable=False)
+    root.add_resource(('.well-known', 'core'), r.CoreResource(root), removable=False)
+    root.add_resource(('snapshot',), r.SnapshotResource(root), removable=False)
+    root.add_resource(('.well-known', 'metrics'), r.MetricsResource(root), removable=False)
 
-    # temporarily disabled
-    #root.add_resource(('alert',), r.Alert())
+    # Metrics of driver calls, scheduler, bus workers and store; cheap enough to stay on
+    AsyncDriver.timing = lambda driver, method, seconds: metrics.registry.observe(
+        'driver_seconds', (('driver', driver), ('method', method)), seconds)
+    metrics.registry.collectors.append(metrics.statistics_collector('scheduler',
+                                                                    r.SampledResource.scheduler.statistics))
 
     with open('config.json') as data_file:
-        sensor_list = json.load(data_file)['sensors']
-    
+        config = json.load(data_file)
+    sensor_list = config['sensors']
+
+    # SPI session settings of the ADC, shared by all ADC based resources; applied when the ADC
+    #   driver is loaded by the first resource using it
+    if 'spi' in config:
+        drivers.configure_driver('mcp3008', max_speed_hz=config['spi']['max_speed_hz'],
+                                 mode=config['spi']['mode'])
+
+    # Optional simulation mode: timing-faithful simulators instead of the drivers, for load testing without
+    #   hardware, e.g. "simulation": {"speedup": 10, "sht15": {"failure_rate": 0.01}}; see sensors.simulators
+    if 'simulation' in config:
+        drivers.enable_simulation(config['simulation'])
+    # Optional replay of recorded sessions instead of the drivers, e.g. "replay": {"path": "traces", "speed": 1},
+    #   and recording of the raw readings of the drivers, e.g. "recording": {"path": "traces"}; see sensors.trace
+    if 'replay' in config:
+        drivers.enable_replay(config['replay'])
+    if 'recording' in config:
+        drivers.enable_recording(config['recording']['path'])
+
+    # Optional worker mode: each bus is sampled by its own process writing to shared memory, e.g.
+    #   "workers": {"mcp3008": {"period": 0.01}, "sht15": {"period": 2}}; buses not listed use defaults
+    supervisor = None
+    if 'workers' in config:
+        supervisor = drivers.enable_workers(config['workers'])
+        metrics.registry.collectors.append(metrics.statistics_collector('bus_worker', supervisor.statistics,
+                                                                        'bus'))
+
+    # Optional on-device store of all readings, e.g. "store": {"path": "data", "max_bytes": 67108864,
+    #   "max_age": 604800, "fsync": "interval"}; keys are arguments of TimeSeriesStore
+    store = None
+    if 'store' in config:
+        store = TimeSeriesStore(**config['store'])
+        r.SampledResource.store = store
+        metrics.registry.collectors.append(lambda: [('store_bytes', (), store.size())])
+
+    # Opt-in profiling, switched by PUT to /.well-known/profile or started by configuration, e.g.
+    #   "profiling": {"mode": "sampling", "duration": 60, "path": "profiles"}
+    profiling = config.get('profiling', {})
+    profiler = Profiler(profiling.get('path', DEFAULT_PATH))
+    # Driver calls are only wrapped while cProfile is running
+    profiler.listeners.append(lambda profile: setattr(AsyncDriver, 'profile',
+                                                      profile.runcall if profile is not None else None))
+    root.add_resource(('.well-known', 'profile'), r.ProfileResource(profiler), removable=False)
+
     for sensor in sensor_list:
-        # Known sensors that has been pre-defined
-        if sensor['name'] == 'hello':
-            root.add_resource(tuple(sensor['url'].split('/')), r.HelloWorld())
-        elif sensor['name'] == 'time':
-            root.add_resource(tuple(sensor['url'].split('/')), r.LocalTime())
-        elif sensor['name'] == 'accelerometer':
-            root.add_resource(tuple(sensor['url'].split('/')), r.Acceleration())
-        elif sensor['name'] == 'temperature':
-            root.add_resource(tuple(sensor['url'].split('/')), r.Temperature())
-        elif sensor['name'] == 'humidity':
-            root.add_resource(tuple(sensor['url'].split('/')), r.Humidity())
-        elif sensor['name'] == 'joystick':
-            root.add_resource(tuple(sensor['url'].split('/')), r.Joystick())
-        # For unknown sensors, use template resource
-        else:
-            root.add_resource(tuple(sensor['url'].split('/')),
-                              r.ResourceTemplate(sensor['name'],
-                                                 sensor['active'],
-                                                 sensor['period'],
-                                                 sensor['min'],
-                                                 sensor['max'],
-                                                 sensor['channel']))
+        # Resource type is given by 'type', or by the sensor name for pre-defined sensors;
+        #   unknown sensors use template resource. Optional 'max_age', 'history' and notification policy
+        #   settings are applied to sampled resources
+        new_resource = r.create_resource(sensor)
+        root.add_resource(tuple(sensor['url'].split('/')), new_resource)
 
         print("{} resource added to path /{}".format(sensor['name'], sensor['url']))
         '''
@@ -78,8 +130,41 @@ def main():
                 print("{}:{}".format(entry, sensor[entry]))
         '''
 
-    asyncio.async(aiocoap.Context.create_server_context(root))
-    asyncio.get_event_loop().run_forever()
+    resources_time = time.perf_counter()
+
+    loop = asyncio.get_event_loop()
+    # Optional UDP port of the server, e.g. "server": {"port": 5690}, for running next to another server
+    port = config.get('server', {}).get('port', aiocoap.COAP_PORT)
+    loop.run_until_complete(aiocoap.Context.create_server_context(root, bind=('::', port)))
+    # Restart bus workers that crashed or hang
+    if supervisor is not None:
+        supervisor.supervise(loop)
+    # Profile the start of the server if configured
+    if 'mode' in profiling:
+        profiler.start(loop, profiling['mode'], profiling.get('duration', DEFAULT_DURATION),
+                       profiling.get('interval', SAMPLING_INTERVAL))
+    # Measure how late the event loop runs timers
+    metrics.LoopLagMonitor(metrics.registry).start(loop)
+    # Write stored readings in batches, off the event loop; failures of a flush are logged as nobody awaits it
+    if store is not None:
+        r.SampledResource.scheduler.add(
+            lambda: loop.run_in_executor(None, store.flush).add_done_callback(log_flush_error),
+            store.flush_interval)
+
+    # Time to first response: the server answers requests from here on
+    ready_time = time.perf_counter()
+    logging.info("Server ready after {:.3f} s (imports {:.3f} s, resources {:.3f} s of which drivers {:.3f} s, "
+                 "context {:.3f} s)".format(ready_time - START_TIME, IMPORT_TIME - START_TIME,
+                                           resources_time - IMPORT_TIME, sum(drivers.load_times.values()),
+                                           ready_time - resources_time))
+
+    try:
+        loop.run_forever()
+    finally:
+        # Keep the profile of a window cut short
+        profiler.stop()
+        if store is not None:
+            store.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,522 @@
+"""
+    Created on October 18, 2026
+
+    This is the on-device time-series store keeping the readings of all sampled resources
+
+    Every resource (series) has a directory of append-only segment files. A segment starts with a header
+    listing the fields of its records, followed by fixed-width records: timestamp and one value per field,
+    as little-endian doubles. Readings are buffered in memory and written in batches by flush(), called
+    periodically by the server; how often the data is forced to the SD card is set by the fsync policy.
+    Segments are rotated when they reach a size limit, and the oldest segments are deleted to stay within
+    a total size limit and a maximum age. Range queries memory-map the segments they cover and find the
+    first record by binary search on the timestamps, so a query reads only the records it returns.
+    Closed segments are compacted with the delta/varint codec of series_codec (values kept to a number of
+    decimals), typically to a fraction of their size; compacted segments are decoded whole when queried.
+
+    Example Usage:
+
+    ``>>> store = TimeSeriesStore('data', max_bytes=64 * 1024 * 1024)``
+    ``>>> store.append('temperature', time.time(), {'temperature': 21.5})``
+    ``>>> store.flush()``
+    ``>>> store.query('temperature', since=time.time() - 3600)``
+
+    Python3.4 is required
+"""
+
+import contextlib
+import itertools
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import urllib.parse
+
+import series_codec
+
+logger = logging.getLogger(__name__)
+
+# Default size of a segment file before a new one is started
+SEGMENT_SIZE = 1024 * 1024
+# Default total size of all segments
+MAX_BYTES = 64 * 1024 * 1024
+# fsync policies: after every flush, at most every fsync_interval seconds, or left to the operating system
+FSYNC_ALWAYS = 'always'
+FSYNC_INTERVAL = 'interval'
+FSYNC_NEVER = 'never'
+
+SEGMENT_SUFFIX = '.seg'
+MAGIC = b'PTS\x01'
+# Segments are named <first>.seg, times in microseconds, with _<sequence> after <first> if started within the
+#   same microsecond; compacted segments are named <first>-<last>.dseg and start with their own magic
+COMPACT_SUFFIX = '.dseg'
+COMPACT_MAGIC = b'PTZ\x01'
+# Header: magic, length of the JSON list of field names, then the list padded to 8 bytes
+_header = struct.Struct('<4sI')
+_timestamp = struct.Struct('<d')
+
+
+def series_directory(name):
+    """
+    Get the directory name of a series; characters other than letters, digits and '_.-~' are %-escaped,
+        so that different names never share a directory
+
+    :param str name: series name, e.g. resource path
+    :return: (str) directory name within the store
+    :raises ValueError: name with no directory of its own
+    """
+    directory = urllib.parse.quote(name, safe='')
+    if directory in ('', '.', '..'):
+        raise ValueError("Invalid series name {!r}".format(name))
+    return directory
+
+
+def record_struct(fields):
+    """
+    Get layout of the records of a segment
+
+    :param fields: field names of the segment
+    :type fields: list of str
+    :return: (struct.Struct) timestamp and one double per field
+    """
+    return struct.Struct('<{}d'.format(len(fields) + 1))
+
+
+def segment_header(fields):
+    """
+    Build the header of a new segment
+
+    :param fields: field names of the records
+    :type fields: list of str
+    :return: (bytes) header, a multiple of 8 bytes long
+    """
+    names = json.dumps(fields).encode('utf-8')
+    names += b' ' * (-(_header.size + len(names)) % 8)
+    return _header.pack(MAGIC, len(names)) + names
+
+
+def read_header(buffer):
+    """
+    Parse the header of a segment
+
+    :param buffer: segment contents, e.g. mmap
+    :return: (list of str, int) field names and offset of the first record
+    :raises ValueError: not a segment
+    """
+    magic, length = _header.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("not a segment")
+    fields = json.loads(bytes(buffer[_header.size:_header.size + length]).decode('utf-8'))
+    return fields, _header.size + length
+
+
+def last_timestamp(file_path):
+    """
+    Get time of the last record of a segment
+
+    :param str file_path: segment file
+    :return: (float) timestamp of the last whole record, None if the segment has no record
+    :raises ValueError: not a segment
+    """
+    with open(file_path, 'rb') as segment_file:
+        if os.fstat(segment_file.fileno()).st_size <= _header.size:
+            return None
+        with contextlib.closing(mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)) as buffer:
+            fields, offset = read_header(buffer)
+            record = record_struct(fields)
+            count = (len(buffer) - offset) // record.size
+            if not count:
+                return None
+            return _timestamp.unpack_from(buffer, offset + (count - 1) * record.size)[0]
+
+
+class Series(object):
+    """
+    Segments and buffered readings of one resource
+    """
+
+    def __init__(self, path):
+        """
+        Constructor loading the list of existing segments; new readings always go to a new segment
+
+        :param str path: directory of the series
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # [time of first record, file path, size in bytes, time of last record] of every segment, oldest first
+        self.segments = []
+        for name in os.listdir(path):
+            file_path = os.path.join(path, name)
+            if name.endswith(SEGMENT_SUFFIX):
+                first = int(name[:-len(SEGMENT_SUFFIX)].split('_')[0]) / 1e6
+                try:
+                    last = last_timestamp(file_path)
+                except (OSError, ValueError, struct.error):
+                    last = None
+                self.segments.append([first, file_path, os.path.getsize(file_path),
+                                      first if last is None else last])
+            elif name.endswith(COMPACT_SUFFIX):
+                # <first>[_<sequence>]-<last>
+                first, last = (int(time_us.split('_')[0]) / 1e6
+                               for time_us in name[:-len(COMPACT_SUFFIX)].split('-'))
+                self.segments.append([first, file_path, os.path.getsize(file_path), last])
+        self.segments.sort()
+
+        # Readings waiting for the next flush
+        self.pending = []
+        # Open segment and the fields and layout of its records
+        self.file = None
+        self.fields = None
+        self.record = None
+
+    def rotate(self, timestamp, fields, sync=True):
+        """
+        Close the open segment and start a new one
+
+        :param float timestamp: time of the first record of the new segment
+        :param fields: field names of the new segment
+        :type fields: list of str
+        :param bool sync: fsync the closed segment, which is not synced by later flushes
+        """
+        self.close(sync)
+        # Segments started within the same microsecond, e.g. when the fields change, get a sequence suffix
+        stem = '{:020d}'.format(int(timestamp * 1e6))
+        file_path = os.path.join(self.path, stem + SEGMENT_SUFFIX)
+        for sequence in itertools.count(1):
+            try:
+                self.file = open(file_path, 'xb')
+                break
+            except FileExistsError:
+                file_path = os.path.join(self.path, '{}_{}{}'.format(stem, sequence, SEGMENT_SUFFIX))
+        header = segment_header(fields)
+        self.file.write(header)
+        self.fields = fields
+        self.record = record_struct(fields)
+        self.segments.append([timestamp, file_path, len(header), timestamp])
+
+    def write(self, readings, segment_size, sync=True):
+        """
+        Write readings to the open segment, rotating segments when full or when the fields change
+
+        :param readings: (timestamp, resource data) pairs in increasing timestamp order
+        :type readings: list of (float, dict)
+        :param int segment_size: size in bytes at which a new segment is started
+        :param bool sync: fsync segments closed by rotation
+        """
+        chunk = []
+        for timestamp, data in readings:
+            fields = sorted(name for name, value in data.items() if isinstance(value, (int, float)))
+            if self.file is None or fields != self.fields or self.segments[-1][2] >= segment_size:
+                if chunk:
+                    self.file.write(b''.join(chunk))
+                    chunk = []
+                self.rotate(timestamp, fields, sync)
+            chunk.append(self.record.pack(timestamp, *[float(data[field]) for field in fields]))
+            self.segments[-1][2] += self.record.size
+            self.segments[-1][3] = timestamp
+        if chunk:
+            self.file.write(b''.join(chunk))
+        if self.file is not None:
+            self.file.flush()
+
+    def compact(self, segment, decimals):
+        """
+        Replace a closed segment by its delta/varint coded version
+
+        :param list segment: entry of the segment in segments
+        :param int decimals: number of decimals of the values kept
+        """
+        first, file_path, _, last = segment
+        records = self._read_segment(file_path, None, None, None)
+        # Named after the raw segment, keeping its sequence suffix, so compacted names are unique too
+        stem = os.path.basename(file_path)[:-len(SEGMENT_SUFFIX)]
+        compact_path = os.path.join(self.path, '{}-{:020d}{}'.format(stem, int(last * 1e6), COMPACT_SUFFIX))
+        with open(compact_path + '.tmp', 'wb') as compact_file:
+            compact_file.write(COMPACT_MAGIC + series_codec.encode_series(records, decimals))
+            # The raw segment is only deleted once its replacement is on the card
+            compact_file.flush()
+            os.fsync(compact_file.fileno())
+        os.replace(compact_path + '.tmp', compact_path)
+        os.remove(file_path)
+        segment[1] = compact_path
+        segment[2] = os.path.getsize(compact_path)
+
+    def close(self, sync=False):
+        """
+        Close the open segment
+
+        :param bool sync: fsync the segment before closing it
+        """
+        if self.file is not None:
+            if sync:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+    def read(self, since=None, until=None, limit=None):
+        """
+        Read records of the segments within a time range
+
+        :param float since: only records with a later timestamp (default: from the oldest record)
+        :param float until: only records with this or an earlier timestamp (default: up to the newest record)
+        :param int limit: maximum number of records (default: no limit)
+        :return: (list of (float, dict)) records in increasing timestamp order
+        """
+        records = []
+        for first, file_path, _, last in self.segments:
+            if until is not None and first > until:
+                break
+            if since is not None and last <= since:
+                continue
+            try:
+                records += self._read_segment(file_path, since, until, limit and limit - len(records))
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping segment {}: {}".format(file_path, e))
+            if limit is not None and len(records) >= limit:
+                break
+        return records
+
+    @staticmethod
+    def _read_segment(file_path, since, until, limit):
+        if file_path.endswith(COMPACT_SUFFIX):
+            return Series._read_compact_segment(file_path, since, until, limit)
+
+        with open(file_path, 'rb') as segment_file:
+            if os.fstat(segment_file.fileno()).st_size <= _header.size:
+                return []
+            with contextlib.closing(mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)) as buffer:
+                fields, offset = read_header(buffer)
+                record = record_struct(fields)
+                # A record torn by a power cut is ignored
+                count = (len(buffer) - offset) // record.size
+
+                # Binary search for the first record after since
+                low, high = 0, count
+                while since is not None and low < high:
+                    middle = (low + high) // 2
+                    if _timestamp.unpack_from(buffer, offset + middle * record.size)[0] <= since:
+                        low = middle + 1
+                    else:
+                        high = middle
+
+                records = []
+                for position in range(low, count):
+                    values = record.unpack_from(buffer, offset + position * record.size)
+                    if (until is not None and values[0] > until) or (limit is not None and len(records) >= limit):
+                        break
+                    records.append((values[0], dict(zip(fields, values[1:]))))
+                return records
+
+    @staticmethod
+    def _read_compact_segment(file_path, since, until, limit):
+        with open(file_path, 'rb') as segment_file:
+            with contextlib.closing(mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)) as buffer:
+                if buffer[:len(COMPACT_MAGIC)] != COMPACT_MAGIC:
+                    raise ValueError("not a compacted segment")
+                records = series_codec.decode_series(buffer, len(COMPACT_MAGIC))
+
+        selected = [(timestamp, data) for timestamp, data in records
+                    if (since is None or timestamp > since) and (until is None or timestamp <= until)]
+        return selected if limit is None else selected[:limit]
+
+
+class TimeSeriesStore(object):
+    """
+    Append-only store of the readings of all series, with batched writes, rotation and retention
+    """
+
+    def __init__(self, path, segment_size=SEGMENT_SIZE, max_bytes=MAX_BYTES, max_age=None, fsync=FSYNC_INTERVAL,
+                 fsync_interval=60, flush_interval=5, compact=True, decimals=6):
+        """
+        Constructor of a store, keeping the segments already in its directory
+
+        :param str path: directory of the store, one sub-directory per series
+        :param int segment_size: size in bytes at which a new segment is started
+        :param int max_bytes: total size in bytes of all segments; oldest segments are deleted beyond it
+        :param float max_age: seconds records are kept, None to keep them until max_bytes is reached
+        :param str fsync: FSYNC_ALWAYS, FSYNC_INTERVAL or FSYNC_NEVER
+        :param float fsync_interval: minimum seconds between two fsyncs with FSYNC_INTERVAL
+        :param float flush_interval: seconds between two flushes, as scheduled by the server
+        :param bool compact: compact closed segments with the delta/varint codec
+        :param int decimals: number of decimals of the values kept in compacted segments
+        """
+        if fsync not in (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER):
+            raise ValueError("Unknown fsync policy {}".format(fsync))
+        self.path = path
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.flush_interval = flush_interval
+        self.compact = compact
+        self.decimals = decimals
+
+        self._series = {}
+        # Guards buffered readings and segment lists, shared by the event loop and the flushing thread
+        self._lock = threading.Lock()
+        # Serializes file access: flushes and queries
+        self._io_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+
+        os.makedirs(path, exist_ok=True)
+        for directory in sorted(os.listdir(path)):
+            if os.path.isdir(os.path.join(path, directory)):
+                self._series[urllib.parse.unquote(directory)] = Series(os.path.join(path, directory))
+
+    def _get_series(self, name):
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = Series(os.path.join(self.path, series_directory(name)))
+        return series
+
+    def series(self):
+        """
+        Get names of all series
+
+        :return: (list of str) sorted series names
+        """
+        with self._lock:
+            return sorted(self._series)
+
+    def size(self):
+        """
+        Get total size of all segments
+
+        :return: (int) size in bytes
+        """
+        with self._lock:
+            return sum(segment[2] for series in self._series.values() for segment in series.segments)
+
+    def append(self, name, timestamp, data):
+        """
+        Buffer a reading until the next flush
+
+        :param str name: series name, e.g. resource path
+        :param float timestamp: time of the reading (seconds since epoch)
+        :param dict data: resource data, field name -> value; only numeric (and boolean) values are stored
+        :raises ValueError: invalid series name
+        """
+        with self._lock:
+            self._get_series(name).pending.append((timestamp, data))
+
+    def flush(self):
+        """
+        Write buffered readings, fsync according to the policy and enforce retention
+
+        Meant to be run in an executor thread; the event loop keeps appending meanwhile
+        """
+        with self._io_lock:
+            with self._lock:
+                batches = [(series, series.pending) for series in self._series.values() if series.pending]
+                for series, _ in batches:
+                    series.pending = []
+
+            for series, readings in batches:
+                try:
+                    series.write(readings, self.segment_size, self.fsync != FSYNC_NEVER)
+                except OSError as e:
+                    logger.error("Failed to store {} readings of {}: {}".format(len(readings), series.path, e))
+
+            now = time.monotonic()
+            if self.fsync == FSYNC_ALWAYS:
+                synced = [series for series, _ in batches]
+            elif self.fsync == FSYNC_INTERVAL and now - self._last_fsync >= self.fsync_interval:
+                # Also series written by earlier flushes since the last fsync
+                with self._lock:
+                    synced = list(self._series.values())
+            else:
+                synced = None
+            if synced is not None:
+                for series in synced:
+                    if series.file is not None:
+                        os.fsync(series.file.fileno())
+                self._last_fsync = now
+
+            if self.compact:
+                self.compact_segments()
+            self.enforce_retention()
+
+    def compact_segments(self):
+        """
+        Compact all closed segments not compacted yet
+        """
+        with self._lock:
+            closed = [(series, segment) for series in self._series.values()
+                      for segment in series.segments[:-1 if series.file is not None else None]
+                      if segment[1].endswith(SEGMENT_SUFFIX)]
+
+        # Segment files are only touched by flushes and queries, both holding the I/O lock
+        for series, segment in closed:
+            try:
+                series.compact(segment, self.decimals)
+            except (OSError, ValueError, struct.error) as e:
+                logger.error("Failed to compact segment {}: {}".format(segment[1], e))
+
+    def enforce_retention(self):
+        """
+        Delete the oldest segments beyond max_bytes and those holding only records older than max_age;
+            open segments are never deleted
+        """
+        with self._lock:
+            expired = []
+            if self.max_age is not None:
+                cutoff = time.time() - self.max_age
+                for series in self._series.values():
+                    while series.segments and series.segments[0][3] < cutoff and \
+                            not (series.file is not None and len(series.segments) == 1):
+                        expired.append(series.segments.pop(0))
+
+            closed = [(segment, series) for series in self._series.values()
+                      for segment in series.segments[:-1 if series.file is not None else None]]
+            total = sum(segment[2] for series in self._series.values() for segment in series.segments)
+            for segment, series in sorted(closed, key=lambda item: item[0][0]):
+                if total <= self.max_bytes:
+                    break
+                series.segments.remove(segment)
+                expired.append(segment)
+                total -= segment[2]
+
+        for _, file_path, _, _ in expired:
+            try:
+                os.remove(file_path)
+            except OSError as e:
+                logger.error("Failed to delete segment {}: {}".format(file_path, e))
+
+    def query(self, name, since=None, until=None, limit=None):
+        """
+        Get stored readings of a series within a time range, including readings not flushed yet
+
+        :param str name: series name
+        :param float since: only readings with a later timestamp (default: from the oldest reading)
+        :param float until: only readings with this or an earlier timestamp (default: up to the newest)
+        :param int limit: maximum number of readings, oldest first (default: no limit)
+        :return: (list of (float, dict)) readings in increasing timestamp order
+        """
+        with self._io_lock:
+            with self._lock:
+                series = self._series.get(name)
+                if series is None:
+                    return []
+                pending = list(series.pending)
+            records = series.read(since, until, limit)
+
+        for timestamp, data in pending:
+            if limit is not None and len(records) >= limit:
+                break
+            if (since is None or timestamp > since) and (until is None or timestamp <= until):
+                records.append((timestamp, {field: float(value) for field, value in data.items()
+                                            if isinstance(value, (int, float))}))
+        return records
+
+    def close(self):
+        """
+        Flush buffered readings to disk and close all segments
+        """
+        self.flush()
+        with self._io_lock:
+            for series in self._series.values():
+                series.close(sync=True)